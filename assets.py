@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import os
+import mmap
+import struct
+from collections import OrderedDict
+
+PACK_MAGIC = b'TSAP'
+PACK_VERSION = 1
+
+# Заголовок пака: сигнатура, версия, число картинок
+HEADER = struct.Struct('<4sHI')
+# Индекс: длина имени, смещение и длина байтов картинки, mtime_ns и размер исходника
+ENTRY = struct.Struct('<HQIqQ')
+
+ART_SUFFIX = ".txt"
+
+
+def default_pack_path():
+    return os.path.join(os.path.expanduser("~/.terminal_shadows_ultimate"), "ascii_arts.pack")
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def art_files(art_dir):
+    files = []
+    for f in sorted(os.listdir(art_dir)):
+        if f.endswith(ART_SUFFIX):
+            files.append((f[:-len(ART_SUFFIX)], os.path.join(art_dir, f)))
+    return files
+
+
+def render(text, color=""):
+    # Готовые байты для вывода: как print(art), но с цветом на каждой строке
+    if color:
+        text = "\n".join(color + line for line in text.split("\n")) + "\x1b[0m"
+    return (text + "\n").encode('utf-8')
+
+
+def read_art(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def build_pack(art_dir, path=None):
+    path = path or default_pack_path()
+    entries = []
+    for name, art_path in art_files(art_dir):
+        stamp = file_stamp(art_path)
+        entries.append((name.encode('utf-8'), render(read_art(art_path)), stamp))
+
+    offset = HEADER.size + sum(ENTRY.size + len(name) for name, data, stamp in entries)
+    index = []
+    for name, data, stamp in entries:
+        index.append(ENTRY.pack(len(name), offset, len(data), stamp[0], stamp[1]) + name)
+        offset += len(data)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(entries)))
+        f.write(b''.join(index))
+        f.write(b''.join(data for name, data, stamp in entries))
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+class ArtPack:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.mm, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"{path}: неизвестный формат")
+        self.index = {}
+        offset = HEADER.size
+        for _ in range(count):
+            name_len, data_offset, length, mtime_ns, size = ENTRY.unpack_from(self.mm, offset)
+            offset += ENTRY.size
+            name = self.mm[offset:offset + name_len].decode('utf-8')
+            offset += name_len
+            self.index[name] = (data_offset, length, (mtime_ns, size))
+
+    def get(self, name, stamp):
+        # Срез из mmap без копирования; None, если исходник менялся после сборки пака
+        entry = self.index.get(name)
+        if entry is None or (stamp is not None and entry[2] != stamp):
+            return None
+        offset, length, _ = entry
+        return memoryview(self.mm)[offset:offset + length]
+
+    def stale(self, art_dir):
+        current = {name: file_stamp(path) for name, path in art_files(art_dir)}
+        return current != {name: entry[2] for name, entry in self.index.items()}
+
+    def close(self):
+        try:
+            self.mm.close()
+        except BufferError:
+            # Кто-то ещё держит срез: mmap закроется вместе с последней ссылкой
+            pass
+        self.file.close()
+
+
+def open_pack(art_dir, path=None, report=print):
+    path = path or default_pack_path()
+    try:
+        if os.path.exists(path):
+            pack = ArtPack(path)
+            if not pack.stale(art_dir):
+                return pack
+            pack.close()
+        build_pack(art_dir, path)
+        return ArtPack(path)
+    except Exception as e:
+        report(f"Art pack error: {e}")
+        return None
+
+
+class AssetCache:
+    # LRU готовых к выводу байтов: (имя, цвет) -> (штамп исходника, байты).
+    # Запись сбрасывается, когда меняется mtime или размер файла.
+    # Картинки без цвета отдаются прямо из пака, не занимая место в кэше
+    def __init__(self, art_dir, pack_path=None, capacity=16, use_pack=True):
+        self.art_dir = art_dir
+        self.pack_path = pack_path
+        self.capacity = capacity
+        self.use_pack = use_pack
+        self.pack = None
+        self.pack_checked = False
+        self.entries = OrderedDict()
+
+    def get_pack(self, report=print):
+        # report - вывод порта, который первым попросил картинку
+        if not self.pack_checked:
+            self.pack_checked = True
+            if self.use_pack and os.path.isdir(self.art_dir):
+                self.pack = open_pack(self.art_dir, self.pack_path, report)
+        return self.pack
+
+    def get(self, name, color="", report=print):
+        path = os.path.join(self.art_dir, name + ART_SUFFIX)
+        stamp = file_stamp(path)
+        key = (name, color)
+        cached = self.entries.get(key)
+        if cached and cached[0] == stamp:
+            self.entries.move_to_end(key)
+            return cached[1]
+
+        pack = self.get_pack(report)
+        if not color and pack:
+            data = pack.get(name, stamp)
+            if data is not None:
+                return data
+
+        if stamp is None:
+            self.entries.pop(key, None)
+            return None
+        data = render(read_art(path), color)
+        self.entries[key] = (stamp, data)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return data
+
+    def close(self):
+        if self.pack:
+            self.pack.close()
+            self.pack = None
+        self.entries.clear()
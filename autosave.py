@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import os
+import time
+import atexit
+import threading
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def fsync_dir(path):
+    if os.name != 'posix':
+        return
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, data, fsync=True):
+    # Пишем во временный файл рядом и подменяем через os.replace:
+    # при падении на диске остаётся либо старое, либо новое сохранение целиком
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if fsync:
+        fsync_dir(path)
+
+
+class AutosaveWriter:
+    def __init__(self, store, fsync="interval", fsync_interval=5.0, coalesce_delay=0.2):
+        self.store = store
+        self.fsync = fsync if fsync in FSYNC_POLICIES else "interval"
+        self.fsync_interval = fsync_interval
+        self.coalesce_delay = coalesce_delay
+        self.last_fsync = 0.0
+        self.pending = {}
+        self.in_flight = 0
+        self.errors = []
+        self.closed = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="autosave-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def submit(self, slot, game_mode, save_data, codec_name, on_written=None):
+        # save_data должен быть снимком: игрок продолжает меняться, пока идёт запись
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("autosave writer is closed")
+            self.pending[(slot, game_mode)] = (save_data, codec_name, on_written)
+            self.cond.notify_all()
+            ok = not self.errors
+            self.errors.clear()
+        return ok
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while self.pending or self.in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        self.raise_errors()
+        return True
+
+    def close(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+        # Закрытый писатель не должен держаться в atexit до конца процесса
+        atexit.unregister(self.close)
+        self.raise_errors()
+
+    def raise_errors(self):
+        # После flush/close следующего submit уже не будет: ошибки последних записей
+        # (выход, компакция журнала) иначе пропали бы молча
+        with self.cond:
+            errors = self.errors
+            self.errors = []
+        if errors:
+            raise RuntimeError("; ".join(errors))
+
+    def should_fsync(self):
+        if self.fsync == "always":
+            return True
+        if self.fsync == "never":
+            return False
+        now = time.monotonic()
+        if now - self.last_fsync >= self.fsync_interval:
+            self.last_fsync = now
+            return True
+        return False
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending and self.closed:
+                    return
+                # Даём серии автосохранений схлопнуться в одну запись
+                deadline = time.monotonic() + self.coalesce_delay
+                while not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch = self.pending
+                self.pending = {}
+                self.in_flight = len(batch)
+
+            # Вся пачка уходит в хранилище разом: SQLite пишет её одной транзакцией
+            items = [(slot, game_mode, save_data, codec_name) for (slot, game_mode), (save_data, codec_name, on_written) in batch.items()]
+            try:
+                self.store.write_batch(items, self.should_fsync() or self.closed)
+                for save_data, codec_name, on_written in batch.values():
+                    if on_written:
+                        on_written()
+            except Exception as e:
+                with self.cond:
+                    self.errors.append(str(e))
+
+            with self.cond:
+                self.in_flight = 0
+                self.cond.notify_all()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# Точные шансы боя fight_boss: цепь Маркова по состояниям (HP игрока, HP босса, ход).
+# Любое действие, кроме побега, продвигает ход, поэтому цепь - ациклический граф по
+# ходам, и итерация по ценности сходится за один обратный проход: от последнего хода
+# к первому. Слой хода - сетка [исход, HP игрока - 1, HP босса - 1], но только на полосе
+# HP, достижимой к этому ходу; равномерные броски урона превращаются в скользящие
+# средние, которые считаются через префиксные суммы
+import sys
+import json
+import functools
+
+import numpy as np
+
+import combat
+
+OUTCOMES = ("win", "draw", "loss", "flee")
+WIN, DRAW, LOSS, FLEE = np.eye(len(OUTCOMES))
+# Порядок важен: при равной ценности выбирается более раннее действие
+ACTIONS = (combat.ATTACK, combat.POWER, combat.DEFEND, combat.FLEE)
+# По умолчанию оптимальная стратегия максимизирует шанс победы
+DEFAULT_UTILITY = (("win", 1.0), ("draw", 0.0), ("loss", 0.0), ("flee", 0.0))
+TIE = 1e-12
+
+
+class Layer:
+    # Вероятности исходов одного хода на полосе достижимых состояний;
+    # origin - индексы (HP - 1) первой клетки полосы по HP игрока и HP босса
+    def __init__(self, values, origin):
+        self.values = values
+        self.origin = origin
+
+    def take(self, start, stop, axis, terminal):
+        # Клетки [start, stop) по оси 1 (игрок) или 2 (босс): HP <= 0 - исход terminal,
+        # вне полосы - нули (из полосы текущего хода туда не попасть)
+        index = np.arange(start, stop)
+        shape = [1, 1, 1]
+        shape[axis] = len(index)
+        fill = np.where(index.reshape(shape) < 0, terminal[:, None, None], 0.0)
+        size = self.values.shape[axis]
+        if not size:
+            return np.broadcast_to(fill, self.shape_with(axis, len(index))).copy()
+        origin = self.origin[axis - 1]
+        inside = ((index >= origin) & (index < origin + size)).reshape(shape)
+        taken = self.values.take(np.clip(index - origin, 0, size - 1), axis=axis)
+        return np.where(inside, taken, fill)
+
+    def shape_with(self, axis, size):
+        shape = list(self.values.shape)
+        shape[axis] = size
+        return shape
+
+
+class FightOdds:
+    def __init__(self, win, draw, loss, flee, action, policy=None):
+        self.win = win
+        self.draw = draw
+        self.loss = loss
+        self.flee = flee
+        # Оптимальный первый ход; policy[turn] = (действия на полосе, origin) - вся стратегия,
+        # если сохранена; policy[TURN_LIMIT + 1] - действие после лимита ходов
+        self.action = action
+        self.policy = policy
+
+    def best_action(self, player_hp, boss_hp, turn):
+        if self.policy is None:
+            raise ValueError("стратегия не сохранена: solve(..., keep_policy=True)")
+        if turn > combat.TURN_LIMIT:
+            return self.policy[combat.TURN_LIMIT + 1]
+        actions, (p0, b0) = self.policy[turn]
+        return int(actions[player_hp - 1 - p0, boss_hp - 1 - b0])
+
+    def as_dict(self):
+        return {"win": self.win, "draw": self.draw, "loss": self.loss, "flee": self.flee, "action": self.action}
+
+
+def expect_below(layer, start, count, low, high, axis, terminal):
+    # out[i] = среднее val(start + i - d) по d = low..high вдоль оси
+    width = high - low + 1
+    ext = layer.take(start - high, start + count - low, axis, terminal)
+    pad = [(0, 0)] * 3
+    pad[axis] = (1, 0)
+    sums = np.pad(np.cumsum(ext, axis=axis), pad)
+    upper = sums.take(np.arange(width, count + width), axis=axis)
+    lower = sums.take(np.arange(count), axis=axis)
+    return (upper - lower) / width
+
+
+def hit(nxt, band, damage, boss_damage):
+    # Удар игрока, затем ответ босса, если он выжил
+    (p0, count_p), (b0, count_b) = band
+    low, high = damage
+    answered = expect_below(nxt, p0, count_p, boss_damage - combat.BOSS_SPREAD,
+                            boss_damage + combat.BOSS_SPREAD, 1, LOSS)
+    return expect_below(Layer(answered, (p0, nxt.origin[1])), b0, count_b, low, high, 2, WIN)
+
+
+def defend(nxt, band, defended):
+    (p0, count_p), (b0, count_b) = band
+    shifted = nxt.take(p0 - defended, p0 - defended + count_p, 1, LOSS)
+    return Layer(shifted, (p0, nxt.origin[1])).take(b0, b0 + count_b, 2, WIN)
+
+
+def utility_of(values, weights):
+    return np.tensordot(weights, values, axes=1)
+
+
+def choose(candidates, weights):
+    # Лучшее действие в каждой клетке; ничья решается порядком ACTIONS
+    scores = np.stack([utility_of(values, weights) for _, values in candidates])
+    best = scores >= scores.max(axis=0) - TIE
+    index = best.argmax(axis=0)
+    values = np.stack([values for _, values in candidates])
+    chosen = np.take_along_axis(values, index[None, None], axis=0)[0]
+    actions = np.array([action for action, _ in candidates], dtype=np.int8)[index]
+    return chosen, actions
+
+
+def allowed_actions(utility):
+    # Если ничья и побег не лучше поражения, защита и побег не бывают строго выгоднее удара:
+    # лишнее HP и лишние ходы только помогают, а на равной ценности удар стоит раньше в ACTIONS
+    if utility["draw"] == utility["loss"] == utility["flee"] <= utility["win"]:
+        return (combat.ATTACK, combat.POWER)
+    return ACTIONS
+
+
+def bands(player_hp, boss_hp, boss, damages, actions):
+    # Полосы HP, достижимые к каждому ходу; недостижимых ходов в словаре нет
+    defended = combat.defended_damage(boss)
+    hits = [damages[action] for action in actions if action in damages]
+    player_loss = [boss["damage"] - combat.BOSS_SPREAD, boss["damage"] + combat.BOSS_SPREAD]
+    boss_loss = [min(low for low, _ in hits), max(high for _, high in hits)]
+    if combat.DEFEND in actions:
+        player_loss = [min(player_loss[0], defended), max(player_loss[1], defended)]
+        boss_loss[0] = 0
+    result = {}
+    for turn in range(1, combat.TURN_LIMIT + 1):
+        done = turn - 1
+        p_high = player_hp - 1 - done * player_loss[0]
+        b_high = boss_hp - 1 - done * boss_loss[0]
+        if p_high < 0 or b_high < 0:
+            break
+        p_low = max(0, player_hp - 1 - done * player_loss[1])
+        b_low = max(0, boss_hp - 1 - done * boss_loss[1])
+        result[turn] = ((p_low, p_high - p_low + 1), (b_low, b_high - b_low + 1))
+    return result
+
+
+def solve(boss, hacking, programming, level, utility=DEFAULT_UTILITY, keep_policy=False):
+    utility = dict(utility)
+    weights = np.array([utility[name] for name in OUTCOMES])
+    actions = allowed_actions(utility)
+    damages = {
+        combat.ATTACK: (combat.attack_damage(combat.ATTACK_ROLL[0], hacking),
+                        combat.attack_damage(combat.ATTACK_ROLL[1], hacking)),
+        combat.POWER: (combat.power_damage(combat.POWER_ROLL[0], programming),
+                       combat.power_damage(combat.POWER_ROLL[1], programming))
+    }
+    defended = combat.defended_damage(boss)
+    reachable = bands(combat.player_max_hp(level), boss["hp"], boss, damages, actions)
+
+    # После лимита ходов (туда ведёт только защита) любой удар - ничья, защита - путь к поражению
+    after = {combat.ATTACK: DRAW, combat.POWER: DRAW, combat.DEFEND: LOSS, combat.FLEE: FLEE}
+    after_values, after_action = choose([(a, after[a][:, None, None]) for a in actions], weights)
+    after_values = after_values[:, 0, 0]
+    policy = {combat.TURN_LIMIT + 1: int(after_action[0, 0])} if keep_policy else None
+
+    nxt = None
+    for turn in sorted(reachable, reverse=True):
+        band = reachable[turn]
+        shape = (len(OUTCOMES), band[0][1], band[1][1])
+        last = turn == combat.TURN_LIMIT
+        if nxt is None:
+            # Следующий ход недостижим: любой переход из этого хода завершает бой,
+            # полоса игрока пуста, а по HP босса берётся вся шкала
+            nxt = Layer(np.zeros((len(OUTCOMES), 0, boss["hp"])), (0, 0))
+        candidates = []
+        for action in actions:
+            if action in damages:
+                # На последнем ходу проверка лимита идёт раньше проверки победы
+                values = np.broadcast_to(DRAW[:, None, None], shape) if last else hit(
+                    nxt, band, damages[action], boss["damage"])
+            elif action == combat.DEFEND:
+                if last:
+                    alive = (np.arange(band[0][0], band[0][0] + band[0][1]) >= defended)[None, :, None]
+                    values = np.broadcast_to(np.where(alive, after_values[:, None, None], LOSS[:, None, None]), shape)
+                else:
+                    values = defend(nxt, band, defended)
+            else:
+                values = np.broadcast_to(FLEE[:, None, None], shape)
+            candidates.append((action, values))
+        values, chosen = choose(candidates, weights)
+        nxt = Layer(values, (band[0][0], band[1][0]))
+        if keep_policy:
+            policy[turn] = (chosen, nxt.origin)
+        first_action = int(chosen[0, 0])
+
+    start = nxt.values[:, 0, 0]
+    return FightOdds(*(float(p) for p in start), first_action, policy)
+
+
+@functools.lru_cache(maxsize=512)
+def cached_odds(boss_index, hacking, programming, level):
+    return solve(combat.BOSSES[boss_index], hacking, programming, level)
+
+
+def main():
+    # Для меню боссов: игра запускает этот файл отдельным процессом и передаёт на stdin
+    # JSON-список [босс, hacking, programming, уровень]; ответ - список шансов в том же порядке
+    requests = json.load(sys.stdin)
+    json.dump([cached_odds(*request).as_dict() for request in requests], sys.stdout)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# Боссы и формулы боя (fight_boss). Ими же пользуются симулятор боёв
+# scripts/sim_bosses.py и точный расчёт шансов
+
+BOSSES = [
+    {"name": "🤖 Киберстраж", "hp": 100, "damage": 10, "reward": 20000, "level": 5, "skill_drop": ("stealth", 3)},
+    {"name": "👨‍💼 Корпоративный Титан", "hp": 200, "damage": 15, "reward": 50000, "level": 10, "skill_drop": ("social", 4)},
+    {"name": "🧠 Нейромант", "hp": 300, "damage": 20, "reward": 100000, "level": 15, "skill_drop": ("programming", 5)},
+    {"name": "👁️ Всевидящее Око", "hp": 500, "damage": 30, "reward": 200000, "level": 25, "skill_drop": ("investigation", 6)},
+    {"name": "💀 Цифровой Жнец", "hp": 800, "damage": 40, "reward": 350000, "level": 35, "skill_drop": ("hacking", 7)},
+    {"name": "🐉 Квантовый Дракон", "hp": 1200, "damage": 50, "reward": 500000, "level": 50, "skill_drop": ("hacking", 10)},
+    {"name": "👹 Повелитель Хаоса", "hp": 2000, "damage": 70, "reward": 1000000, "level": 75, "skill_drop": ("programming", 15)},
+    {"name": "♾️ Абсолютная Сингулярность", "hp": 5000, "damage": 100, "reward": 5000000, "level": 100, "skill_drop": ("hacking", 20)}
+]
+
+# Действия игрока - номера пунктов меню боя
+ATTACK, DEFEND, POWER, FLEE = 1, 2, 3, 4
+
+# Атака хакингом: случайная часть + навык hacking * 3
+ATTACK_ROLL = (10, 20)
+ATTACK_SKILL = 3
+# Мощная атака: случайная часть + навык programming * 5
+POWER_ROLL = (30, 50)
+POWER_SKILL = 5
+# Урон босса: damage ± BOSS_SPREAD; под защитой - damage // DEFEND_DIVISOR без разброса
+BOSS_SPREAD = 5
+DEFEND_DIVISOR = 2
+# После этого хода битва заканчивается ничьёй
+TURN_LIMIT = 30
+
+LOSS_PENALTY_CAP = 50000
+EXP_PER_BOSS_LEVEL = 500
+
+
+def player_max_hp(level):
+    return 100 + level * 10
+
+
+def attack_damage(roll, hacking):
+    return roll + hacking * ATTACK_SKILL
+
+
+def power_damage(roll, programming):
+    return roll + programming * POWER_SKILL
+
+
+def defended_damage(boss):
+    return boss["damage"] // DEFEND_DIVISOR
+
+
+def loss_penalty(bitcoins):
+    return min(LOSS_PENALTY_CAP, bitcoins // 4)
+
+
+def boss_exp(boss):
+    return boss["level"] * EXP_PER_BOSS_LEVEL
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# Таблицы и формулы экономики взлома. Ими пользуется и игра (hacking_menu),
+# и симулятор scripts/sim_hacking.py - баланс меняется только здесь
+
+HACK_TARGETS = [
+    {"name": "🏢 MegaCorp Inc", "reward": 500, "difficulty": 1, "req_level": 1},
+    {"name": "🏛️  Police Database", "reward": 1000, "difficulty": 2, "req_level": 2},
+    {"name": "💊 Black Market", "reward": 2000, "difficulty": 3, "req_level": 3},
+    {"name": "🔐 Shadow Network", "reward": 5000, "difficulty": 5, "req_level": 5},
+    {"name": "🌍 Global Bank", "reward": 10000, "difficulty": 8, "req_level": 8},
+    {"name": "🐉 КиберДракон", "reward": 20000, "difficulty": 10, "req_level": 10},
+    {"name": "🤖 ИИ Авалон", "reward": 50000, "difficulty": 15, "req_level": 15},
+    {"name": "⚛️  Квантовая Сеть", "reward": 100000, "difficulty": 20, "req_level": 20},
+    {"name": "🌀 Портал Мультиверса", "reward": 150000, "difficulty": 25, "req_level": 25},
+    {"name": "👁️ Око Провидения", "reward": 200000, "difficulty": 30, "req_level": 30},
+    {"name": "🔮 Кристалл Судьбы", "reward": 300000, "difficulty": 35, "req_level": 35},
+    {"name": "⚡ Сердце Реальности", "reward": 500000, "difficulty": 40, "req_level": 40}
+]
+
+HACK_ITEMS = ["🔑 Ключ шифрования", "💾 Эксплойт", "🛡️ Файрвол", "📡 Сниффер", "⚡ Ускоритель"]
+
+SUCCESS_CAP = 0.95
+# Вклад одного уровня навыка hacking в шанс успеха на цели сложности 1
+SKILL_WEIGHT = 0.25
+DROP_CHANCE = 0.4
+PENALTY_CAP = 500
+# Штраф за провал - эта доля баланса (1/4), но не больше PENALTY_CAP
+PENALTY_SHARE = 4
+MASTER_REWARD = 50000
+# Опыт до следующего уровня: level * EXP_PER_LEVEL
+EXP_PER_LEVEL = 1000
+
+
+def success_chance(hacking, difficulty):
+    return min(SUCCESS_CAP, (hacking * SKILL_WEIGHT) / difficulty)
+
+
+def mastery_bonus(reward, hacking, difficulty):
+    # Навык выше сложности цели - половина награды сверху
+    return reward // 2 if hacking > difficulty else 0
+
+
+def hack_exp(reward):
+    return reward // 2
+
+
+def failure_penalty(bitcoins):
+    return min(PENALTY_CAP, bitcoins // PENALTY_SHARE)
+
+
+def exp_to_level(level):
+    return level * EXP_PER_LEVEL
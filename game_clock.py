@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import time
+
+
+class RealClock:
+    # Обычное время: паузы между сценами, ходами босса и кадрами анимаций как есть
+    scale = 1.0
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def now(self):
+        # Игровое время для анимаций: за sleep(x) оно сдвигается ровно на x
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        # Пауза не блокирует цикл событий: соседние сессии сервера продолжают работать
+        if seconds > 0:
+            import asyncio
+            await asyncio.sleep(seconds)
+
+
+class ScaledClock(RealClock):
+    # Все паузы умножаются на scale: 0.1 - в десять раз быстрее, 2 - вдвое медленнее
+    def __init__(self, scale):
+        self.scale = max(0.0, float(scale))
+        self.skipped = 0.0
+
+    def now(self):
+        # Сжатая или растянутая часть пауз добавляется к реальному времени
+        return time.monotonic() + self.skipped
+
+    async def sleep(self, seconds):
+        await super().sleep(seconds * self.scale)
+        if seconds > 0:
+            self.skipped += seconds * (1.0 - self.scale)
+
+
+class VirtualClock:
+    # Время только считается: sleep мгновенно сдвигает часы. Для ботов, тестов
+    # и прогонов без человека - игра идёт на полной скорости процессора
+    scale = 0.0
+
+    def __init__(self, start=None):
+        self.start = time.time() if start is None else start
+        self.elapsed = 0.0
+
+    def time(self):
+        return self.start + self.elapsed
+
+    def monotonic(self):
+        return self.elapsed
+
+    def now(self):
+        return self.elapsed
+
+    async def sleep(self, seconds):
+        if seconds > 0:
+            self.elapsed += seconds
+
+
+def make_clock(spec):
+    # "real", "virtual" или число - множитель для ScaledClock
+    if spec in (None, "", "real"):
+        return RealClock()
+    if spec == "virtual":
+        return VirtualClock()
+    return ScaledClock(float(spec))
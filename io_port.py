@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import sys
+
+
+def numbered(first, last):
+    return [str(i) for i in range(first, last + 1)]
+
+
+class IOPort:
+    # Всё общение движка с игроком идёт через порт: движок сообщает, что показать,
+    # и получает ответы, не зная, терминал это, сетевая сессия или бот
+    def frame(self):
+        # Начало нового экрана (раньше - clear_screen)
+        raise NotImplementedError
+
+    def text(self, *values, sep=" ", end="\n"):
+        # Строка текста, аргументы как у print
+        raise NotImplementedError
+
+    async def text_block(self, text, delay=0.03):
+        # Абзац сюжета, печатается посимвольно
+        raise NotImplementedError
+
+    def art(self, name, color=""):
+        raise NotImplementedError
+
+    async def prompt(self, message=""):
+        # Свободный ввод: имя, номер из списка
+        raise NotImplementedError
+
+    async def choice(self, message, options):
+        # Выбор пункта меню; options - допустимые ответы (для ботов и повторов)
+        return await self.prompt(message)
+
+    async def pause(self, message=""):
+        # «Нажмите Enter...»
+        await self.prompt(message)
+
+
+class TerminalPort(IOPort):
+    def __init__(self, terminal, assets):
+        self.terminal = terminal
+        self.assets = assets
+
+    def frame(self):
+        self.terminal.clear()
+
+    def text(self, *values, sep=" ", end="\n"):
+        self.terminal.write(sep.join(str(value) for value in values) + end)
+
+    async def text_block(self, text, delay=0.03):
+        # Кадры ждут через часы игры; клавиша проверяется раз в кадр
+        await self.terminal.typewrite(text, delay)
+
+    def art(self, name, color=""):
+        data = self.assets.get(name, color if self.terminal.caps["colors"] else "", self.text)
+        if data is not None:
+            self.terminal.write_bytes(data)
+
+    async def prompt(self, message=""):
+        # Кадр дорисовывается до приглашения; сам input() оставляем ради readline
+        self.terminal.flush()
+        if self.terminal.input_stream is sys.stdin and self.terminal.stream is sys.stdout:
+            return input(message)
+        self.terminal.write(message)
+        self.terminal.flush()
+        line = self.terminal.input_stream.readline()
+        if not line:
+            raise EOFError
+        return line.rstrip("\n")
@@ -1,71 +1,187 @@
 #!/usr/bin/env python3
 import sys
-import platform
+import startup_profiler
 
-system = platform.system()
+profiler = startup_profiler.StartupProfiler(__name__ == "__main__" and "--profile-startup" in sys.argv[1:])
 
-if system in ("Darwin"):
-    print("❌ Эта игра доступна только для пользователей Linux-дистрибутивов и Windows.")
-    print(f"Обнаружена ОС: {system}")
-    sys.exit(1)
+with profiler.phase("platform_check"):
+    import platform
+
+    system = platform.system()
+
+    if system in ("Darwin"):
+        print("❌ Эта игра доступна только для пользователей Linux-дистрибутивов и Windows.")
+        print(f"Обнаружена ОС: {system}")
+        sys.exit(1)
 
 import os
-import sys
 import time
 import random
-import pickle
 import json
+import copy
+import getpass
+import functools
 from datetime import datetime
+from collections import OrderedDict
 
 sys.path.append('story')
 import re
+from scene_graph import compile_chapter, CHAPTER_END, GAME_END, MISSING_SCENE
+from startup_cache import StartupCache
+import save_codecs
+from autosave import AutosaveWriter
+import save_journal
+import save_store
+import economy
+import combat
+from terminal import Terminal
+from game_clock import RealClock, make_clock
+from assets import AssetCache
+from io_port import TerminalPort, numbered
+
+with profiler.phase("colorama"):
+    try:
+        from colorama import init, Fore, Style
+        init(autoreset=True)
+        COLORS_ENABLED = True
+    except ImportError:
+        COLORS_ENABLED = False
+        class Fore:
+            RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = RESET = ""
+        class Style:
+            BRIGHT = DIM = RESET_ALL = ""
+
+class ChapterRegistry:
+    def __init__(self, story_dir='story', bundle_path=None):
+        self.story_dir = story_dir
+        self.bundle_path = bundle_path
+        self.bundle = None
+        self.bundle_checked = False
+        self.numbers = []
+        self.loaded = {}
+        self.graphs = {}
+        self.scan()
+
+    def scan(self):
+        try:
+            nums = []
+            for f in os.listdir(self.story_dir):
+                m = re.match(r'chapter(\d+)\.py$', f)
+                if m:
+                    nums.append(int(m.group(1)))
+            nums.sort()
+            self.numbers = nums
+        except Exception as e:
+            print(f"Error scanning story directory: {e}")
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __iter__(self):
+        for i in range(1, len(self.numbers) + 1):
+            chapter = self.get(i)
+            if chapter:
+                yield chapter
+
+    def get(self, index, report=print):
+        # index - порядковый номер главы (с 1), как story_progress.
+        # report - куда писать ошибки загрузки: в игре это GameData.report
+        num = self.numbers[index - 1]
+        if num not in self.loaded:
+            self.loaded[num] = self.load(num, report)
+        return self.loaded[num]
+
+    def graph(self, index, report=print):
+        num = self.numbers[index - 1]
+        if num not in self.graphs:
+            chapter = self.get(index, report)
+            self.graphs[num] = compile_chapter(chapter) if chapter else None
+        return self.graphs[num]
 
-try:
-    from colorama import init, Fore, Back, Style
-    init(autoreset=True)
-    COLORS_ENABLED = True
-except ImportError:
-    COLORS_ENABLED = False
-    class Fore:
-        RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = RESET = ""
-    class Style:
-        BRIGHT = DIM = RESET_ALL = ""
+    def build(self, index):
+        # Глава и граф заново, мимо кэшей реестра - для замеров --profile-startup
+        chapter = self.load(self.numbers[index - 1])
+        return compile_chapter(chapter) if chapter else None
 
-chapters = []
-try:
-    files = [f for f in os.listdir('story') if re.match(r'chapter\d+\.py$', f)]
-    nums = []
-    for f in files:
-        m = re.match(r'chapter(\d+)\.py$', f)
-        if m:
-            nums.append(int(m.group(1)))
-    nums.sort()
+    def open_bundle(self, report=print):
+        if not self.bundle_checked:
+            self.bundle_checked = True
+            try:
+                import story_bundle
+                with profiler.phase("story_bundle"):
+                    self.bundle = story_bundle.open_bundle(self.story_dir, self.bundle_path, report)
+            except ImportError:
+                self.bundle = None
+        return self.bundle
+
+    def load(self, num, report=print):
+        bundle = self.open_bundle(report)
+        if bundle and num in bundle:
+            return bundle.chapter(num)
 
-    for i in nums:
-        mod = f'chapter{i}'
+        mod = f'chapter{num}'
         try:
             module = __import__(mod)
-            chap = getattr(module, f'CHAPTER_{i}', None)
-            if chap:
-                chapters.append(chap)
-            else:
-                print(f"Warning: {mod} содержит нет CHAPTER_{i}")
+            chap = getattr(module, f'CHAPTER_{num}', None)
+            if not chap:
+                report(f"Warning: {mod} содержит нет CHAPTER_{num}")
+            return chap
         except Exception as e:
-            print(f"Error loading {mod}: {e}")
-except Exception as e:
-    print(f"Error scanning story directory: {e}")
+            report(f"Error loading {mod}: {e}")
+            return None
+
+with profiler.phase("chapter_scan"):
+    chapters = ChapterRegistry('story')
+
+def default_owner():
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "player"
 
 class GameData:
-    def __init__(self):
+    def __init__(self, owner=None, config=None):
         self.data_dir = os.path.expanduser("~/.terminal_shadows_ultimate")
         self.save_dir = os.path.join(self.data_dir, "saves")
+        # Владелец сохранений: по его хэшу выбирается папка игрока
+        self.owner = owner or default_owner()
+        self.player_dir = save_store.shard_dir(self.save_dir, self.owner)
+        # Та же блокировка, что у FileSaveStore: журналы и снимки сессий игрока пишутся под ней
+        self.lock_path = os.path.join(self.player_dir, ".lock")
         self.config_file = os.path.join(self.data_dir, "config.json")
-        self.ensure_directories()
-        self.load_config()
+        self.startup_cache = StartupCache(os.path.join(self.data_dir, "startup.cache"))
+        self.store = None
+        self.writer = None
+        self.journals = {}
+        # Поток для блокирующих сохранений (run) и сообщения об ошибках для движка:
+        # print ушёл бы в stdout сервера, а не игроку
+        self.executor = None
+        self.messages = []
+        # С переданным config это сессия сервера: своя копия настроек, общий config.json не трогаем
+        self.shared_config = config is None
+        with profiler.phase("ensure_directories"):
+            self.ensure_directories()
+        if config is not None:
+            self.config = dict(config)
+            return
+        with profiler.phase("startup_cache"):
+            snapshot = self.startup_cache.load(self.config_file)
+        if snapshot:
+            self.config = snapshot["config"]
+        else:
+            with profiler.phase("load_config"):
+                self.load_config()
+            if self.config.get("startup_cache", True):
+                with profiler.phase("startup_cache_store"):
+                    self.startup_cache.store(self.config, self.config_file)
         
     def ensure_directories(self):
         os.makedirs(self.data_dir, exist_ok=True)
         os.makedirs(self.save_dir, exist_ok=True)
+        os.makedirs(self.player_dir, exist_ok=True)
+        if self.shared_config:
+            # Плоская раскладка была только у локального игрока
+            save_store.migrate_flat_saves(self.save_dir, self.owner)
         
     def load_config(self):
         default_config = {
@@ -73,7 +189,16 @@ class GameData:
             "difficulty": "normal",
             "autosave": True,
             "animations": True,
-            "music": False
+            "music": False,
+            "startup_cache": True,
+            "save_codec": save_codecs.DEFAULT_CODEC,
+            "autosave_background": True,
+            "autosave_fsync": "interval",
+            "autosave_fsync_interval": 5,
+            "journal": True,
+            "journal_compact_records": 200,
+            "save_backend": "files",
+            "diff_render": True
         }
         if os.path.exists(self.config_file):
             try:
@@ -89,52 +214,290 @@ class GameData:
             self.save_config()
             
     def save_config(self):
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
-        
-    def save_game(self, filename=None, slot=0, game_mode="story"):
-        if slot == 0:
-            save_file = os.path.join(self.save_dir, f"autosave_{game_mode}.dat")
-        else:
-            save_file = os.path.join(self.save_dir, f"save{slot}_{game_mode}.dat")
+        if not self.shared_config:
+            return
+        with profiler.phase("save_config"):
+            with open(self.config_file, 'w') as f:
+                json.dump(self.config, f, indent=2)
+            if self.config.get("startup_cache", True):
+                self.startup_cache.update_config(self.config, self.config_file)
+        
+    def get_store(self):
+        if self.store is None:
+            self.store = save_store.open_store(self.config.get("save_backend", "files"), self.data_dir, self.save_dir, self.owner, self.shared_config)
+        return self.store
+        
+    def get_writer(self):
+        if self.writer is None:
+            self.writer = AutosaveWriter(
+                self.get_store(),
+                self.config.get("autosave_fsync", "interval"),
+                self.config.get("autosave_fsync_interval", 5)
+            )
+        return self.writer
+        
+    def flush_saves(self):
+        if self.writer:
+            try:
+                self.writer.flush()
+            except RuntimeError as e:
+                self.report(f"Save error: {e}")
+                return False
+        return True
+            
+    def report(self, message):
+        self.messages.append(message)
+        
+    def take_messages(self):
+        messages, self.messages = self.messages, []
+        return messages
+        
+    def get_executor(self):
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            # Один поток: операции игрока выполняются в том порядке, в каком пришли
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="saves")
+        return self.executor
+        
+    async def run(self, fn, *args, **kwargs):
+        # Сохранения, журнал (fsync), flock и транзакции SQLite блокируют поток: на сервере
+        # это остановило бы цикл событий для всех сессий, поэтому вызов уходит в поток данных
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_executor(), functools.partial(fn, *args, **kwargs))
+        
+    def close(self):
+        if self.executor:
+            # Без ожидания: close может выполняться в самом этом потоке; начатое доделывается
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        if self.writer:
+            writer, self.writer = self.writer, None
+            try:
+                writer.close()
+            except RuntimeError as e:
+                self.report(f"Save error: {e}")
+        for journal in self.journals.values():
+            journal.close()
+        self.journals = {}
+        if self.store:
+            self.store.close()
+            self.store = None
+        
+    def journal_path(self, game_mode="story"):
+        return os.path.join(self.player_dir, f"autosave_{game_mode}.journal")
+        
+    def get_journal(self, game_mode="story"):
+        if not self.config.get("journal", True) or not self.config.get("autosave", True):
+            return None
+        if game_mode not in self.journals:
+            self.journals[game_mode] = save_journal.SaveJournal(
+                self.journal_path(game_mode),
+                self.config.get("autosave_fsync", "interval"),
+                self.config.get("autosave_fsync_interval", 5),
+                self.lock_path
+            )
+        return self.journals[game_mode]
+        
+    def attach_journal(self, player_data, game_mode="story"):
+        journal = self.get_journal(game_mode)
+        if journal:
+            journal.attach(player_data)
             
+    def record_change(self, source, player_data, game_mode="story"):
+        journal = self.get_journal(game_mode)
+        if not journal:
+            return
+        try:
+            journal.record(source, player_data)
+            if journal.count >= self.config.get("journal_compact_records", 200):
+                self.compact_journal(player_data, game_mode)
+        except Exception as e:
+            self.report(f"Journal error: {e}")
+            
+    def compact_journal(self, player_data, game_mode="story"):
+        journal = self.get_journal(game_mode)
+        seq = journal.last_seq
+        save_data = {
+            'player': copy.deepcopy(player_data),
+            'timestamp': datetime.now().isoformat(),
+            'version': '4.0',
+            'game_mode': game_mode,
+            'journal_seq': seq
+        }
+        codec = self.config.get("save_codec", save_codecs.DEFAULT_CODEC)
+        on_written = lambda: journal.truncate_upto(seq)
+        if self.config.get("autosave_background", True):
+            return self.get_writer().submit(0, game_mode, save_data, codec, on_written)
+        self.write_save(0, game_mode, save_data, codec)
+        on_written()
+        return True
+        
+    def write_save(self, slot, game_mode, save_data, codec):
+        self.get_store().write(slot, game_mode, save_data, codec, self.config.get("autosave_fsync") != "never")
+        
+    def save_game(self, player_data, slot=0, game_mode="story"):
         save_data = {
             'player': player_data,
             'timestamp': datetime.now().isoformat(),
             'version': '4.0',
             'game_mode': game_mode
         }
+        journal = self.get_journal(game_mode) if slot == 0 else None
+        if journal:
+            journal.record("save", player_data)
+            save_data['journal_seq'] = journal.last_seq
+        elif slot == 0:
+            # Старые записи журнала этого слота не должны применяться поверх нового снимка
+            save_data['journal_seq'] = time.time_ns()
+        codec = self.config.get("save_codec", save_codecs.DEFAULT_CODEC)
         try:
-            with open(save_file, 'wb') as f:
-                pickle.dump(save_data, f)
+            self.flush_saves()
+            self.write_save(slot, game_mode, save_data, codec)
+            if journal:
+                journal.truncate_upto(save_data['journal_seq'])
             return True
         except Exception as e:
-            print(f"Save error: {e}")
+            self.report(f"Save error: {e}")
+            return False
+            
+    def autosave(self, player_data, game_mode="story", compact=False):
+        journal = self.get_journal(game_mode)
+        if journal:
+            # С журналом автосохранение - это дозапись изменений; снимок пишется при компакции
+            try:
+                journal.record("autosave", player_data)
+                if compact or journal.count >= self.config.get("journal_compact_records", 200):
+                    return self.compact_journal(player_data, game_mode)
+                return True
+            except Exception as e:
+                self.report(f"Save error: {e}")
+                return False
+            
+        if not self.config.get("autosave_background", True):
+            return self.save_game(player_data, 0, game_mode)
+            
+        save_data = {
+            'player': copy.deepcopy(player_data),
+            'timestamp': datetime.now().isoformat(),
+            'version': '4.0',
+            'game_mode': game_mode,
+            'journal_seq': time.time_ns()
+        }
+        codec = self.config.get("save_codec", save_codecs.DEFAULT_CODEC)
+        try:
+            return self.get_writer().submit(0, game_mode, save_data, codec)
+        except Exception as e:
+            self.report(f"Save error: {e}")
             return False
             
+    def journal_records(self, slot=0, game_mode="story"):
+        if slot != 0 or not os.path.exists(self.journal_path(game_mode)):
+            return []
+        journal = self.journals.get(game_mode) or save_journal.SaveJournal(self.journal_path(game_mode), lock_path=self.lock_path)
+        return journal.records()
+        
     def load_game(self, slot=0, game_mode="story"):
-        if slot == 0:
-            save_file = os.path.join(self.save_dir, f"autosave_{game_mode}.dat")
+        self.flush_saves()
+        
+        save_data = None
+        try:
+            save_data = self.get_store().read(slot, game_mode)
+        except Exception as e:
+            self.report(f"Load error: {e}")
+            return None
+                
+        records = self.journal_records(slot, game_mode)
+        if records:
+            if save_data is None:
+                save_data = {'player': {}, 'timestamp': '', 'version': '4.0', 'game_mode': game_mode}
+            save_data = save_journal.replay(save_data, records)
+            if not save_data['player']:
+                return None
+        return save_data
+        
+    def session_path(self, session_id):
+        return os.path.join(self.player_dir, f"session_{session_id}.hib")
+
+    def save_session(self, session_id, state):
+        # Снимок усыплённой сессии сервера; pickle - в состоянии есть кортежи (генератор случайных чисел)
+        path = self.session_path(session_id)
+        tmp_path = f"{path}.tmp"
+        with save_store.file_lock(self.lock_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(save_codecs.encode(state, "pickle"))
+            os.replace(tmp_path, path)
+
+    def load_session(self, session_id, remove=True):
+        path = self.session_path(session_id)
+        with save_store.file_lock(self.lock_path, exclusive=remove):
+            with open(path, 'rb') as f:
+                state = save_codecs.decode(f.read())
+            if remove:
+                os.remove(path)
+        return state
+
+    def delete_saves(self):
+        self.close()
+        self.get_store().delete_all()
+        with save_store.file_lock(self.lock_path):
+            for mode in ["story", "sandbox"]:
+                if os.path.exists(self.journal_path(mode)):
+                    os.remove(self.journal_path(mode))
+        
+    def switch_backend(self, backend):
+        # Сохранения перекодируются текущим кодеком; журналы остаются на месте
+        self.flush_saves()
+        old_store = self.get_store()
+        new_store = save_store.open_store(backend, self.data_dir, self.save_dir, self.owner, self.shared_config)
+        codec = self.config.get("save_codec", save_codecs.DEFAULT_CODEC)
+        items = []
+        for mode in ["story", "sandbox"]:
+            for slot in old_store.slots(mode):
+                items.append((slot, mode, old_store.read(slot, mode), codec))
+        if new_store.unlimited or all(slot <= 3 for slot, mode, save_data, codec in items):
+            new_store.write_batch(items)
         else:
-            save_file = os.path.join(self.save_dir, f"save{slot}_{game_mode}.dat")
-            
-        if os.path.exists(save_file):
+            new_store.close()
+            raise ValueError("в файловом хранилище только 3 слота")
+        self.close()
+        self.store = new_store
+        self.config["save_backend"] = backend
+        self.save_config()
+        return len(items)
+        
+    def slot_count(self, game_mode="story"):
+        # Файловое хранилище держит три слота; в SQLite всегда есть ещё один свободный
+        if not self.get_store().unlimited:
+            return 3
+        return max([3] + [slot + 1 for slot in self.get_saves(game_mode)])
+        
+    def recent_saves(self, limit=10, game_mode=None, player=None):
+        self.flush_saves()
+        return self.get_store().recent(limit, game_mode, player)
+        
+    def get_slot_summaries(self, game_mode="story"):
+        self.flush_saves()
+        store = self.get_store()
+        summaries = {}
+        for slot in store.slots(game_mode):
             try:
-                with open(save_file, 'rb') as f:
-                    return pickle.load(f)
+                summaries[slot] = store.summary(slot, game_mode)
             except Exception as e:
-                print(f"Load error: {e}")
-                return None
-        return None
+                self.report(f"Load error: {e}")
+        records = self.journal_records(0, game_mode)
+        if records:
+            # Журнал новее снимка: сводка берётся из последней записи
+            summary = dict(records[-1].get("summary", {}))
+            summary.update({'timestamp': records[-1].get("time", ""), 'game_mode': game_mode})
+            summaries[0] = summary
+        return summaries
         
     def get_saves(self, game_mode="story"):
-        saves = []
-        if os.path.exists(os.path.join(self.save_dir, f"autosave_{game_mode}.dat")):
-            saves.append(0)
-        for i in range(1, 4):
-            if os.path.exists(os.path.join(self.save_dir, f"save{i}_{game_mode}.dat")):
-                saves.append(i)
-                
+        self.flush_saves()
+        saves = self.get_store().slots(game_mode)
+        if 0 not in saves and os.path.exists(self.journal_path(game_mode)):
+            saves.insert(0, 0)
         return saves
 
 class Player:
@@ -182,7 +545,7 @@ class Player:
         
     def add_exp(self, amount):
         self.exp += amount
-        if self.exp >= self.level * 1000:
+        if self.exp >= economy.exp_to_level(self.level):
             old_level = self.level
             self.level_up()
             return old_level
@@ -240,42 +603,167 @@ class Player:
         elif rep < 1000: return "💎 Почитаемый"
         else: return "👑 Легендарный"
 
+# Шансы боссов по (босс, hacking, programming, уровень) - LRU, общий для всех сессий процесса.
+# Хранятся только удачные расчёты: неудавшийся запустится снова при следующем показе меню
+BOSS_ODDS = OrderedDict()
+BOSS_ODDS_SIZE = 512
+BOSS_ODDS_PENDING = set()
+BOSS_ODDS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "boss_odds.py")
+
+@functools.lru_cache(maxsize=None)
+def odds_solver_available():
+    # Только поиск модуля: сам numpy в процесс игры не импортируется
+    import importlib.util
+    return os.path.exists(BOSS_ODDS_SCRIPT) and importlib.util.find_spec("numpy") is not None
+
+def solve_boss_odds(keys):
+    # Выполняется в пуле потоков цикла событий: подпроцесс из asyncio, отменённый на
+    # запуске (выход из игры сразу после меню боссов), подвешивал завершение asyncio.run
+    import subprocess
+    try:
+        proc = subprocess.run(
+            [sys.executable, BOSS_ODDS_SCRIPT], input=json.dumps(keys).encode('utf-8'),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=60
+        )
+        if proc.returncode == 0:
+            return json.loads(proc.stdout)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        pass
+    return []
+
+def store_boss_odds(keys, future):
+    # В цикле событий, когда поток закончил: BOSS_ODDS меняется только здесь
+    results = [] if future.cancelled() or future.exception() else future.result()
+    for key, result in zip(keys, results):
+        if result is not None:
+            BOSS_ODDS[key] = result
+    while len(BOSS_ODDS) > BOSS_ODDS_SIZE:
+        BOSS_ODDS.popitem(last=False)
+    BOSS_ODDS_PENDING.difference_update(keys)
+
+# Меню, в которые можно вернуть усыплённую сессию: циклы, которые после
+# возврата из вложенного меню просто показывают себя снова
+RESUMABLE_MENUS = set()
+
+def resumable(method):
+    # Пока меню открыто, его имя лежит в стеке engine.menus - по этому стеку
+    # сессия восстанавливается после гибернации
+    RESUMABLE_MENUS.add(method.__name__)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        self.menus.append(method.__name__)
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            self.menus.pop()
+    return wrapper
+
 class GameEngine:
-    def __init__(self):
-        self.data = GameData()
+    def __init__(self, clock=None, io=None, data=None, rng=None):
+        # Для сервера у каждой сессии свои данные, часы, порт и генератор случайных чисел
+        self.data = data or GameData()
+        self.clock = clock or RealClock()
+        self.rng = rng or random.Random()
         self.player = None
         self.current_chapter = None
         self.current_scene = "start"
         self.game_mode = "story"  # story или sandbox
-        self.start_time = time.time()
+        self.start_time = self.clock.time()
+        # Явное положение в меню: стек открытых меню и вопрос, на который ждём ответ
+        self.menus = []
+        self.pending_choice = None
+        self.resuming = False
+        if io is None:
+            terminal = Terminal(sys.stdout, clock=self.clock)
+            if self.data.config.get("diff_render", True):
+                terminal.enable_screen()
+            io = TerminalPort(terminal, AssetCache("data/ascii_arts"))
+        self.io = io
+        
+    async def data_call(self, fn, *args, **kwargs):
+        # Блокирующие операции GameData - в её потоке; ошибки показываются игроку через порт
+        result = await self.data.run(fn, *args, **kwargs)
+        for message in self.data.take_messages():
+            self.io.text(message)
+        return result
+        
+    async def record_change(self, source):
+        if self.player:
+            await self.data_call(self.data.record_change, source, self.player.__dict__, self.game_mode)
         
     def clear_screen(self):
-        os.system('clear' if os.name == 'posix' else 'cls')
+        self.io.frame()
         
-    def print_ascii(self, art_name):
-        art_file = f"data/ascii_arts/{art_name}.txt"
-        if os.path.exists(art_file):
-            with open(art_file, 'r', encoding='utf-8') as f:
-                print(f.read())
+    def print_ascii(self, art_name, color=""):
+        self.io.art(art_name, color)
                 
-    def type_text(self, text, delay=0.03):
-        if self.data.config.get("animations", True):
-            for char in text:
-                print(char, end='', flush=True)
-                time.sleep(delay)
-            print()
+    async def menu_choice(self, message, options):
+        # Ответ в открытом меню: пока он ждёт, сессию можно усыпить и продолжить с этого места
+        self.pending_choice = {"menu": self.menus[-1] if self.menus else "", "message": message, "options": options}
+        self.resuming = False
+        try:
+            return await self.io.choice(message, options)
+        finally:
+            self.pending_choice = None
+
+    def session_state(self):
+        return {
+            'version': '4.0',
+            'timestamp': datetime.now().isoformat(),
+            'game_mode': self.game_mode,
+            'menus': list(self.menus),
+            'pending_choice': self.pending_choice,
+            'current_chapter': self.current_chapter,
+            'current_scene': self.current_scene,
+            'player': copy.deepcopy(self.player.__dict__) if self.player else {},
+            'play_time': self.clock.time() - self.start_time,
+            'rng': self.rng.getstate()
+        }
+
+    async def resume(self, state):
+        # Восстановление после гибернации: открываем меню стека заново, от вложенного
+        # к внешнему. Внутреннее меню перерисовывается без анимаций, и строка, которая
+        # разбудила сессию, становится ответом на ожидавший выбор
+        self.game_mode = state['game_mode']
+        self.current_chapter = state['current_chapter']
+        self.current_scene = state['current_scene']
+        if state['player']:
+            self.player = Player(state['player']['name'])
+            self.player.__dict__.update(state['player'])
+            await self.data_call(self.data.attach_journal, self.player.__dict__, self.game_mode)
+        self.start_time = self.clock.time() - state['play_time']
+        self.rng.setstate(state['rng'])
+
+        menus = [menu for menu in state['menus'] if menu in RESUMABLE_MENUS]
+        for depth in range(len(menus) - 1, -1, -1):
+            innermost = depth == len(menus) - 1
+            self.resuming = innermost
+            # Внешние меню ещё не открыты заново, но в стеке должны быть: иначе
+            # повторная гибернация во вложенном меню потеряла бы их
+            self.menus = menus[:depth]
+            if menus[depth] == "play_story_mode":
+                # Снаружи другого меню сюжет уже дошёл до свободного режима - не повторяем его
+                if innermost:
+                    await self.play_story_mode(self.current_scene)
+                continue
+            await getattr(self, menus[depth])()
+
+    async def type_text(self, text, delay=0.03):
+        if self.data.config.get("animations", True) and not self.resuming:
+            await self.io.text_block(text, delay)
         else:
-            print(text)
+            self.io.text(text)
             
     def show_guide(self):
         self.print_ascii("anonymous_guide")
         
-    def hacking_animation(self, target):
+    async def hacking_animation(self, target):
         if not self.data.config.get("animations", True):
-            print(f"Взлом {target}...")
+            self.io.text(f"Взлом {target}...")
             return
             
-        print(f"\n🎯 Начинаем взлом {target}...")
+        self.io.text(f"\n🎯 Начинаем взлом {target}...")
         self.show_guide()
         
         frames = [
@@ -285,270 +773,292 @@ class GameEngine:
             "▌▌▌▌▌▌▌▌▌▌ 100%"
         ]
         for frame in frames:
-            print(f"🖥️  {frame}", end='\r')
-            time.sleep(0.2)
-        print("\n")
+            self.io.text(f"🖥️  {frame}", end='\r')
+            await self.clock.sleep(0.2)
+        self.io.text("\n")
         
-    def show_main_menu(self):
+    @resumable
+    async def show_main_menu(self):
         while True:
             self.clear_screen()
             self.print_ascii("main_menu")
-            print("\n" + Fore.CYAN + "="*60)
-            print(Fore.GREEN + Style.BRIGHT + "1. 📖 СЮЖЕТНЫЙ РЕЖИМ")
-            print(Fore.YELLOW + Style.BRIGHT + "2. 🎯 СВОБОДНЫЙ РЕЖИМ")
-            print(Fore.BLUE + "3. 💾 ЗАГРУЗИТЬ ИГРУ") 
-            print(Fore.MAGENTA + "4. ⚙️  НАСТРОЙКИ")
-            print(Fore.CYAN + "5. 📊 СТАТИСТИКА")
-            print(Fore.WHITE + "6. 🔄 ПРОВЕРИТЬ ОБНОВЛЕНИЯ")
-            print(Fore.RED + "7. 🚪 ВЫХОД")
-            print(Fore.CYAN + "="*60 + Style.RESET_ALL)
-            
-            choice = input("\nВыберите опцию [1-7]: ").strip()
+            self.io.text("\n" + Fore.CYAN + "="*60)
+            self.io.text(Fore.GREEN + Style.BRIGHT + "1. 📖 СЮЖЕТНЫЙ РЕЖИМ")
+            self.io.text(Fore.YELLOW + Style.BRIGHT + "2. 🎯 СВОБОДНЫЙ РЕЖИМ")
+            self.io.text(Fore.BLUE + "3. 💾 ЗАГРУЗИТЬ ИГРУ") 
+            self.io.text(Fore.MAGENTA + "4. ⚙️  НАСТРОЙКИ")
+            self.io.text(Fore.CYAN + "5. 📊 СТАТИСТИКА")
+            self.io.text(Fore.WHITE + "6. 🔄 ПРОВЕРИТЬ ОБНОВЛЕНИЯ")
+            self.io.text(Fore.RED + "7. 🚪 ВЫХОД")
+            self.io.text(Fore.CYAN + "="*60 + Style.RESET_ALL)
+            
+            choice = (await self.menu_choice("\nВыберите опцию [1-7]: ", numbered(1, 7))).strip()
             
             if choice == "1":
-                self.story_mode_menu()
+                await self.story_mode_menu()
             elif choice == "2":
-                self.sandbox_mode_menu()
+                await self.sandbox_mode_menu()
             elif choice == "3":
-                self.load_game_menu()
+                await self.load_game_menu()
             elif choice == "4":
-                self.settings_menu()
+                await self.settings_menu()
             elif choice == "5":
-                self.show_stats()
+                await self.show_stats()
             elif choice == "6":
                 self.check_updates()
             elif choice == "7":
-                self.exit_game()
+                await self.exit_game()
             else:
-                print("❌ Неверный выбор!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный выбор!")
+                await self.io.pause("Нажмите Enter...")
     
-    def story_mode_menu(self):
+    @resumable
+    async def story_mode_menu(self):
         while True:
             self.clear_screen()
-            print("📖 СЮЖЕТНЫЙ РЕЖИМ")
-            print("="*30)
-            print("1. 🎮 НОВАЯ ИГРА")
-            print("2. 💾 ЗАГРУЗИТЬ СЮЖЕТ")
-            print("3. 🔙 НАЗАД")
-            print()
+            self.io.text("📖 СЮЖЕТНЫЙ РЕЖИМ")
+            self.io.text("="*30)
+            self.io.text("1. 🎮 НОВАЯ ИГРА")
+            self.io.text("2. 💾 ЗАГРУЗИТЬ СЮЖЕТ")
+            self.io.text("3. 🔙 НАЗАД")
+            self.io.text()
             
-            choice = input("Выберите опцию [1-3]: ").strip()
+            choice = (await self.menu_choice("Выберите опцию [1-3]: ", numbered(1, 3))).strip()
             
             if choice == "1":
-                self.start_new_game("story")
+                await self.start_new_game("story")
             elif choice == "2":
-                self.load_specific_game("story")
+                await self.load_specific_game("story")
             elif choice == "3":
                 return
             else:
-                print("❌ Неверный выбор!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный выбор!")
+                await self.io.pause("Нажмите Enter...")
     
-    def sandbox_mode_menu(self):
+    @resumable
+    async def sandbox_mode_menu(self):
         while True:
             self.clear_screen()
-            print("🎯 СВОБОДНЫЙ РЕЖИМ")
-            print("="*30)
-            print("1. 🎮 НОВАЯ ИГРА")
-            print("2. 💾 ЗАГРУЗИТЬ СВОБОДНЫЙ РЕЖИМ")
-            print("3. 🔙 НАЗАД")
-            print()
+            self.io.text("🎯 СВОБОДНЫЙ РЕЖИМ")
+            self.io.text("="*30)
+            self.io.text("1. 🎮 НОВАЯ ИГРА")
+            self.io.text("2. 💾 ЗАГРУЗИТЬ СВОБОДНЫЙ РЕЖИМ")
+            self.io.text("3. 🔙 НАЗАД")
+            self.io.text()
             
-            choice = input("Выберите опцию [1-3]: ").strip()
+            choice = (await self.menu_choice("Выберите опцию [1-3]: ", numbered(1, 3))).strip()
             
             if choice == "1":
-                self.start_new_game("sandbox")
+                await self.start_new_game("sandbox")
             elif choice == "2":
-                self.load_specific_game("sandbox")
+                await self.load_specific_game("sandbox")
             elif choice == "3":
                 return
             else:
-                print("❌ Неверный выбор!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный выбор!")
+                await self.io.pause("Нажмите Enter...")
     
-    def start_new_game(self, mode):
+    async def start_new_game(self, mode):
         self.clear_screen()
-        print("🎮 СОЗДАНИЕ ПЕРСОНАЖА")
-        print("="*30)
+        self.io.text("🎮 СОЗДАНИЕ ПЕРСОНАЖА")
+        self.io.text("="*30)
         
-        name = input("\nВведите имя вашего хакера: ").strip()
+        name = (await self.io.prompt("\nВведите имя вашего хакера: ")).strip()
         if not name:
             name = "Neo"
             
         self.player = Player(name)
         self.game_mode = mode
+        await self.data_call(self.data.attach_journal, self.player.__dict__, mode)
         
-        print(f"\n👤 Приветствую, {self.player.name}!")
+        self.io.text(f"\n👤 Приветствую, {self.player.name}!")
         
         if mode == "story":
-            print("📖 Запуск СЮЖЕТНОГО РЕЖИМА...")
-            time.sleep(2)
-            self.start_story_mode()
+            self.io.text("📖 Запуск СЮЖЕТНОГО РЕЖИМА...")
+            await self.clock.sleep(2)
+            await self.start_story_mode()
         else:
-            print("🎯 Запуск СВОБОДНОГО РЕЖИМА...")
-            time.sleep(2)
-            self.start_sandbox_mode()
+            self.io.text("🎯 Запуск СВОБОДНОГО РЕЖИМА...")
+            await self.clock.sleep(2)
+            await self.start_sandbox_mode()
     
-    def start_story_mode(self):
+    async def start_story_mode(self):
         self.clear_screen()
-        self.type_text("\nГод 2049. Цифровой мир стал новой реальностью...")
-        time.sleep(1)
-        self.type_text("Ты находишь наследие своего дяди - легендарного хакера...")
-        time.sleep(1)
-        self.type_text("Его последние слова: 'Не доверяй системе, ищи правду в коде'...")
-        time.sleep(1)
+        await self.type_text("\nГод 2049. Цифровой мир стал новой реальностью...")
+        await self.clock.sleep(1)
+        await self.type_text("Ты находишь наследие своего дяди - легендарного хакера...")
+        await self.clock.sleep(1)
+        await self.type_text("Его последние слова: 'Не доверяй системе, ищи правду в коде'...")
+        await self.clock.sleep(1)
         self.show_guide()
-        self.type_text("\nАнонимный Гид: 'Приветствую в цифровом подполье. Я буду твоим проводником.'")
-        time.sleep(2)
+        await self.type_text("\nАнонимный Гид: 'Приветствую в цифровом подполье. Я буду твоим проводником.'")
+        await self.clock.sleep(2)
         
-        input("\n🎯 Нажмите Enter чтобы начать свое путешествие...")
-        self.play_story_mode()
+        await self.io.pause("\n🎯 Нажмите Enter чтобы начать свое путешествие...")
+        await self.play_story_mode()
     
-    def start_sandbox_mode(self):
+    async def start_sandbox_mode(self):
         self.clear_screen()
-        self.type_text("\n🎯 СВОБОДНЫЙ РЕЖИМ АКТИВИРОВАН")
-        self.type_text("Здесь нет сюжета - только ты и бесконечные возможности цифрового мира.")
-        self.type_text("Создавай свою историю, взламывай цели, развивай навыки!")
-        time.sleep(2)
+        await self.type_text("\n🎯 СВОБОДНЫЙ РЕЖИМ АКТИВИРОВАН")
+        await self.type_text("Здесь нет сюжета - только ты и бесконечные возможности цифрового мира.")
+        await self.type_text("Создавай свою историю, взламывай цели, развивай навыки!")
+        await self.clock.sleep(2)
         self.player.bitcoins = 5000
         self.player.level = 5
         for skill in self.player.skills:
             self.player.skills[skill] = 3
             
-        print(f"\n💰 Стартовый бонус: 5000 BTC")
-        print(f"🎯 Уровень повышен до 5")
-        print(f"⚡ Все навыки установлены на 3")
-        input("\n🎮 Нажмите Enter чтобы начать...")
-        self.sandbox_loop()
-        
-    def play_story_mode(self):
+        self.io.text(f"\n💰 Стартовый бонус: 5000 BTC")
+        self.io.text(f"🎯 Уровень повышен до 5")
+        self.io.text(f"⚡ Все навыки установлены на 3")
+        await self.io.pause("\n🎮 Нажмите Enter чтобы начать...")
+        await self.sandbox_loop()
+        
+    @resumable
+    async def play_story_mode(self, scene=None):
         if not chapters:
-            print("❌ Нет доступных глав для сюжетного режима! Проверьте папку `story/`.")
-            input("Нажмите Enter чтобы вернуться в меню...")
+            self.io.text("❌ Нет доступных глав для сюжетного режима! Проверьте папку `story/`.")
+            await self.io.pause("Нажмите Enter чтобы вернуться в меню...")
             return
 
-        for i, chapter in enumerate(chapters, 1):
-            if i == self.player.story_progress:
-                self.play_chapter(chapter, i)
+        for i in range(self.player.story_progress, len(chapters) + 1):
+            # Первое обращение к главе - импорт, компиляция графа, а то и пересборка пака:
+            # в потоке данных, чтобы не останавливать цикл событий
+            chapter = await self.data_call(chapters.graph, i, self.data.report)
+            if not chapter:
                 self.player.story_progress += 1
-                self.player.personal_stats["chapters_completed"] += 1
-                if self.data.config.get("autosave", True):
-                    if self.data.save_game(self.player.__dict__, 0, "story"):
-                        print("💾 Сюжет автоматически сохранен!")
-                    else:
-                        print("❌ Ошибка автосохранения!")
-                    time.sleep(1)
+                continue
+            self.current_chapter = i
+            await self.play_chapter(chapter, i, scene)
+            scene = None
+            self.player.story_progress += 1
+            self.player.personal_stats["chapters_completed"] += 1
+            if self.data.config.get("autosave", True):
+                if await self.data_call(self.data.autosave, self.player.__dict__, "story"):
+                    self.io.text("💾 Сюжет автоматически сохранен!")
+                else:
+                    self.io.text("❌ Ошибка автосохранения!")
+                await self.clock.sleep(1)
                     
         self.print_ascii("victory")
-        print("🎊 СЮЖЕТНЫЙ РЕЖИМ ЗАВЕРШЕН!")
-        print("Теперь доступен СВОБОДНЫЙ РЕЖИМ с полным функционалом!")
-        input("\nНажмите Enter чтобы продолжить...")
-        self.sandbox_loop()
+        self.io.text("🎊 СЮЖЕТНЫЙ РЕЖИМ ЗАВЕРШЕН!")
+        self.io.text("Теперь доступен СВОБОДНЫЙ РЕЖИМ с полным функционалом!")
+        await self.io.pause("\nНажмите Enter чтобы продолжить...")
+        await self.sandbox_loop()
         
-    def sandbox_loop(self):
+    @resumable
+    async def sandbox_loop(self):
         self.game_mode = "sandbox"
         
         while True:
-            if random.random() < 0.15:
-                self.random_event()
+            if not self.resuming and self.rng.random() < 0.15:
+                await self.random_event()
                 
             self.clear_screen()
-            print("🎯 СВОБОДНЫЙ РЕЖИМ")
-            print("="*50)
-            print(f"👤 {self.player.name} | 💰 {self.player.bitcoins} BTC | 🎯 Ур. {self.player.level}")
-            print("="*50)
-            print()
-            print("1. 🌐 ВЗЛОМ СЕРВЕРОВ")
-            print("2. 🛒 МАГАЗИН")
-            print("3. 📊 ПРОФИЛЬ")
-            print("4. 🏆 ДОСТИЖЕНИЯ")
-            print("5. 💾 СОХРАНИТЬ СВОБОДНЫЙ РЕЖИМ")
-            print("6. 🎲 СЛУЧАЙНОЕ СОБЫТИЕ")
-            print("7. 👹 БИТВЫ С БОССАМИ")
-            print("8. 🔨 КРАФТ ПРЕДМЕТОВ")
-            print("9. 📋 ЕЖЕДНЕВНЫЕ ЗАДАНИЯ")
-            print("10. 🎭 ФРАКЦИИ")
-            print("11. 🏠 ГЛАВНОЕ МЕНЮ")
-            print()
-            
-            choice = input("Выберите действие [1-11]: ").strip()
+            self.io.text("🎯 СВОБОДНЫЙ РЕЖИМ")
+            self.io.text("="*50)
+            self.io.text(f"👤 {self.player.name} | 💰 {self.player.bitcoins} BTC | 🎯 Ур. {self.player.level}")
+            self.io.text("="*50)
+            self.io.text()
+            self.io.text("1. 🌐 ВЗЛОМ СЕРВЕРОВ")
+            self.io.text("2. 🛒 МАГАЗИН")
+            self.io.text("3. 📊 ПРОФИЛЬ")
+            self.io.text("4. 🏆 ДОСТИЖЕНИЯ")
+            self.io.text("5. 💾 СОХРАНИТЬ СВОБОДНЫЙ РЕЖИМ")
+            self.io.text("6. 🎲 СЛУЧАЙНОЕ СОБЫТИЕ")
+            self.io.text("7. 👹 БИТВЫ С БОССАМИ")
+            self.io.text("8. 🔨 КРАФТ ПРЕДМЕТОВ")
+            self.io.text("9. 📋 ЕЖЕДНЕВНЫЕ ЗАДАНИЯ")
+            self.io.text("10. 🎭 ФРАКЦИИ")
+            self.io.text("11. 🏠 ГЛАВНОЕ МЕНЮ")
+            self.io.text()
+            
+            choice = (await self.menu_choice("Выберите действие [1-11]: ", numbered(1, 11))).strip()
             
             if choice == "1":
-                self.hacking_menu()
+                await self.hacking_menu()
             elif choice == "2":
-                self.shop_menu()
+                await self.shop_menu()
             elif choice == "3":
-                self.profile_menu()
+                await self.profile_menu()
             elif choice == "4":
-                self.achievements_menu()
+                await self.achievements_menu()
             elif choice == "5":
-                self.save_specific_game("sandbox")
+                await self.save_specific_game("sandbox")
             elif choice == "6":
-                self.random_event()
+                await self.random_event()
             elif choice == "7":
-                self.boss_battles()
+                await self.boss_battles()
             elif choice == "8":
-                self.crafting_menu()
+                await self.crafting_menu()
             elif choice == "9":
-                self.daily_missions()
+                await self.daily_missions()
             elif choice == "10":
-                self.factions_menu()
+                await self.factions_menu()
             elif choice == "11":
                 if self.data.config.get("autosave", True):
-                    self.data.save_game(self.player.__dict__, 0, "sandbox")
+                    await self.data_call(self.data.autosave, self.player.__dict__, "sandbox")
                 return
             else:
-                print("❌ Неверный выбор!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный выбор!")
+                await self.io.pause("Нажмите Enter...")
     
-    def play_chapter(self, chapter, chapter_num):
+    async def play_chapter(self, chapter, chapter_num, scene=None):
+        # scene - сцена, с которой продолжить главу после гибернации
+        strings = chapter.strings
+        scene_id = chapter.start
+        if scene is not None and chapter.scene_id(scene) >= 0:
+            scene_id = chapter.scene_id(scene)
         self.current_scene = "start"
         
-        while self.current_scene not in ["chapter_end", "next_chapter", "game_end"]:
-            if self.current_scene not in chapter["scenes"]:
-                print(f"Ошибка: сцена '{self.current_scene}' не найдена")
-                self.current_scene = "chapter_end"
-                break
-                
-            scene = chapter["scenes"][self.current_scene]
+        while scene_id >= 0:
+            self.current_scene = chapter.name(scene_id)
             
             self.clear_screen()
-            print(f"📖 {chapter['title']}")
-            print("="*50)
-            if chapter.get("guide_appearance", False) and self.current_scene == "start":
+            self.io.text(f"📖 {strings[chapter.title]}")
+            self.io.text("="*50)
+            if chapter.guide_appearance and scene_id == chapter.start:
                 self.show_guide()
-                self.type_text("\nАнонимный Гид: 'Эта миссия изменит все. Будь осторожен.'\n")
+                await self.type_text("\nАнонимный Гид: 'Эта миссия изменит все. Будь осторожен.'\n")
             
-            self.type_text(f"\n{scene['text']}\n")
+            await self.type_text(f"\n{chapter.text(scene_id)}\n")
             
-            if "choices" in scene and scene["choices"]:
-                for i, choice in enumerate(scene["choices"], 1):
-                    print(f"{i}. {choice['text']}")
+            first = chapter.choice_start[scene_id]
+            last = chapter.choice_end[scene_id]
+            if last > first:
+                for i in range(first, last):
+                    self.io.text(f"{i - first + 1}. {strings[chapter.choice_text[i]]}")
                     
-                print()
+                self.io.text()
                 try:
-                    choice_num = int(input("Ваш выбор: "))
-                    if 1 <= choice_num <= len(scene["choices"]):
-                        selected = scene["choices"][choice_num - 1]
-                        result = self.apply_effects(selected.get("effect", {}))
+                    choice_num = int(await self.menu_choice("Ваш выбор: ", numbered(1, last - first)))
+                    if 1 <= choice_num <= last - first:
+                        selected = first + choice_num - 1
+                        result = await self.apply_effects(chapter.effect(selected))
                         if result:
-                            print(result)
-                        self.current_scene = selected["next"]
+                            self.io.text(result)
+                        scene_id = chapter.choice_next[selected]
+                        if scene_id == MISSING_SCENE:
+                            self.current_scene = chapter.missing[selected]
                     else:
-                        print("❌ Неверный выбор!")
-                        input()
+                        self.io.text("❌ Неверный выбор!")
+                        await self.io.pause()
                 except ValueError:
-                    print("❌ Введите число!")
-                    input()
+                    self.io.text("❌ Введите число!")
+                    await self.io.pause()
             else:
-                input("\nНажмите Enter чтобы продолжить...")
-                self.current_scene = "chapter_end"
+                await self.io.pause("\nНажмите Enter чтобы продолжить...")
+                scene_id = CHAPTER_END
                 
-        if self.current_scene == "game_end":
-            self.game_complete()
+        if scene_id == MISSING_SCENE:
+            self.io.text(f"Ошибка: сцена '{self.current_scene}' не найдена")
+            scene_id = CHAPTER_END
+        self.current_scene = chapter.name(scene_id)
+        
+        if scene_id == GAME_END:
+            await self.game_complete()
                 
-    def apply_effects(self, effects):
+    async def apply_effects(self, effects):
         results = []
         
         if "bitcoins" in effects:
@@ -580,98 +1090,89 @@ class GameEngine:
         if "achievement" in effects and effects["achievement"]:
             results.append(self.player.add_achievement(effects["achievement"]))
             
-        time.sleep(1)
+        await self.record_change("story")
+        await self.clock.sleep(1)
         return "\n".join(results)
         
-    def hacking_menu(self):
-        targets = [
-            {"name": "🏢 MegaCorp Inc", "reward": 500, "difficulty": 1, "req_level": 1},
-            {"name": "🏛️  Police Database", "reward": 1000, "difficulty": 2, "req_level": 2},
-            {"name": "💊 Black Market", "reward": 2000, "difficulty": 3, "req_level": 3},
-            {"name": "🔐 Shadow Network", "reward": 5000, "difficulty": 5, "req_level": 5},
-            {"name": "🌍 Global Bank", "reward": 10000, "difficulty": 8, "req_level": 8},
-            {"name": "🐉 КиберДракон", "reward": 20000, "difficulty": 10, "req_level": 10},
-            {"name": "🤖 ИИ Авалон", "reward": 50000, "difficulty": 15, "req_level": 15},
-            {"name": "⚛️  Квантовая Сеть", "reward": 100000, "difficulty": 20, "req_level": 20},
-            {"name": "🌀 Портал Мультиверса", "reward": 150000, "difficulty": 25, "req_level": 25},
-            {"name": "👁️ Око Провидения", "reward": 200000, "difficulty": 30, "req_level": 30},
-            {"name": "🔮 Кристалл Судьбы", "reward": 300000, "difficulty": 35, "req_level": 35},
-            {"name": "⚡ Сердце Реальности", "reward": 500000, "difficulty": 40, "req_level": 40}
-        ]
+    @resumable
+    async def hacking_menu(self):
+        targets = economy.HACK_TARGETS
         
         while True:
             self.clear_screen()
-            print("🎯 ВЫБОР ЦЕЛИ ДЛЯ ВЗЛОМА")
-            print("="*40)
-            print(f"💰 Баланс: {self.player.bitcoins} BTC")
-            print("="*40)
-            print()
+            self.io.text("🎯 ВЫБОР ЦЕЛИ ДЛЯ ВЗЛОМА")
+            self.io.text("="*40)
+            self.io.text(f"💰 Баланс: {self.player.bitcoins} BTC")
+            self.io.text("="*40)
+            self.io.text()
             
             for i, target in enumerate(targets, 1):
                 status = "🟢" if self.player.level >= target["req_level"] else "🔴"
-                print(f"{i}. {status} {target['name']}")
-                print(f"   Награда: {target['reward']} BTC | Уровень: {target['req_level']}+")
-                print()
+                self.io.text(f"{i}. {status} {target['name']}")
+                self.io.text(f"   Награда: {target['reward']} BTC | Уровень: {target['req_level']}+")
+                self.io.text()
                 
-            print(f"{len(targets)+1}. 🔙 НАЗАД")
-            print()
+            self.io.text(f"{len(targets)+1}. 🔙 НАЗАД")
+            self.io.text()
             
             try:
-                choice = int(input("Выберите цель: "))
+                choice = int(await self.menu_choice("Выберите цель: ", numbered(1, len(targets) + 1)))
                 if 1 <= choice <= len(targets):
                     target = targets[choice-1]
                     
                     if self.player.level < target["req_level"]:
-                        print(f"❌ Требуется уровень {target['req_level']}!")
-                        input("Нажмите Enter...")
+                        self.io.text(f"❌ Требуется уровень {target['req_level']}!")
+                        await self.io.pause("Нажмите Enter...")
                         continue
                         
-                    self.hacking_animation(target["name"])
+                    await self.hacking_animation(target["name"])
                     
-                    success_chance = min(0.95, (self.player.skills["hacking"] * 0.25) / target["difficulty"])
-                    if random.random() < success_chance:
+                    hacking = self.player.skills["hacking"]
+                    success_chance = economy.success_chance(hacking, target["difficulty"])
+                    if self.rng.random() < success_chance:
                         reward = target["reward"]
-                        if self.player.skills["hacking"] > target["difficulty"]:
-                            bonus = reward // 2
+                        bonus = economy.mastery_bonus(reward, hacking, target["difficulty"])
+                        if bonus:
                             reward += bonus
-                            print(f"🎁 Бонус за мастерство: +{bonus} BTC")
+                            self.io.text(f"🎁 Бонус за мастерство: +{bonus} BTC")
                             
                         self.player.bitcoins += reward
-                        exp_gain = reward // 2
+                        exp_gain = economy.hack_exp(reward)
                         old_level = self.player.add_exp(exp_gain)
                         self.player.add_hack()
                         
-                        print("✅ ВЗЛОМ УСПЕШЕН!")
-                        print(f"💰 +{reward} BTC")
-                        print(f"⭐ +{exp_gain} опыта")
+                        self.io.text("✅ ВЗЛОМ УСПЕШЕН!")
+                        self.io.text(f"💰 +{reward} BTC")
+                        self.io.text(f"⭐ +{exp_gain} опыта")
                         
                         if old_level:
-                            print(self.player.level_up())
-                        if random.random() < 0.4:
-                            items = ["🔑 Ключ шифрования", "💾 Эксплойт", "🛡️ Файрвол", "📡 Сниффер", "⚡ Ускоритель"]
-                            item = random.choice(items)
+                            self.io.text(self.player.level_up())
+                        if self.rng.random() < economy.DROP_CHANCE:
+                            item = self.rng.choice(economy.HACK_ITEMS)
                             self.player.inventory.append(item)
                             self.player.add_item()
-                            print(f"🎒 Найден: {item}")
-                        if reward >= 50000:
-                            print(self.player.add_achievement("💎 Мастер взлома"))
+                            self.io.text(f"🎒 Найден: {item}")
+                        if reward >= economy.MASTER_REWARD:
+                            self.io.text(self.player.add_achievement("💎 Мастер взлома"))
                             
                     else:
-                        penalty = min(500, self.player.bitcoins // 4)
+                        penalty = economy.failure_penalty(self.player.bitcoins)
                         self.player.bitcoins = max(0, self.player.bitcoins - penalty)
-                        print("❌ ВЗЛОМ ПРОВАЛЕН!")
-                        print(f"💥 Штраф: {penalty} BTC")
+                        self.io.text("❌ ВЗЛОМ ПРОВАЛЕН!")
+                        self.io.text(f"💥 Штраф: {penalty} BTC")
                         
-                    input("\nНажмите Enter...")
+                    await self.record_change("hack")
+                    await self.io.pause("\nНажмите Enter...")
                     
                 elif choice == len(targets)+1:
                     return
                 else:
-                    print("❌ Неверный выбор!")
+                    self.io.text("❌ Неверный выбор!")
             except ValueError:
-                print("❌ Введите число!")
+                self.io.text("❌ Введите число!")
                 
-    def shop_menu(self):
+    @resumable
+    async def shop_menu(self):
         items = [
             {"name": "🔍 Продвинутый сканер", "price": 2000, "skill": "hacking", "bonus": 2, "description": "Увеличивает шанс успешного взлома"},
             {"name": "🛡️  Анонимайзер", "price": 1500, "skill": "stealth", "bonus": 2, "description": "Снижает вероятность обнаружения"},
@@ -689,23 +1190,23 @@ class GameEngine:
         
         while True:
             self.clear_screen()
-            print("🛒 МАГАЗИН ИНСТРУМЕНТОВ")
-            print("="*40)
-            print(f"💰 Ваш баланс: {self.player.bitcoins} BTC")
-            print("="*40)
-            print()
+            self.io.text("🛒 МАГАЗИН ИНСТРУМЕНТОВ")
+            self.io.text("="*40)
+            self.io.text(f"💰 Ваш баланс: {self.player.bitcoins} BTC")
+            self.io.text("="*40)
+            self.io.text()
             
             for i, item in enumerate(items, 1):
-                print(f"{i}. {item['name']} - {item['price']} BTC")
-                print(f"   {item['description']}")
-                print(f"   Бонус: +{item['bonus']} к {item['skill']}")
-                print()
+                self.io.text(f"{i}. {item['name']} - {item['price']} BTC")
+                self.io.text(f"   {item['description']}")
+                self.io.text(f"   Бонус: +{item['bonus']} к {item['skill']}")
+                self.io.text()
                 
-            print(f"{len(items)+1}. 🔙 НАЗАД")
-            print()
+            self.io.text(f"{len(items)+1}. 🔙 НАЗАД")
+            self.io.text()
             
             try:
-                choice = int(input("Выберите товар: "))
+                choice = int(await self.menu_choice("Выберите товар: ", numbered(1, len(items) + 1)))
                 if 1 <= choice <= len(items):
                     item = items[choice-1]
                     
@@ -715,79 +1216,80 @@ class GameEngine:
                         self.player.inventory.append(item["name"])
                         self.player.add_item()
                         
-                        print(f"✅ Куплено: {item['name']}")
-                        print(f"⚡ {item['skill']} повышен до {self.player.skills[item['skill']]}")
+                        self.io.text(f"✅ Куплено: {item['name']}")
+                        self.io.text(f"⚡ {item['skill']} повышен до {self.player.skills[item['skill']]}")
                         
                         if item["price"] >= 5000:
-                            print(self.player.add_achievement("🛒 Крупный покупатель"))
+                            self.io.text(self.player.add_achievement("🛒 Крупный покупатель"))
                             
+                        await self.record_change("purchase")
                     else:
-                        print("❌ Недостаточно BTC!")
+                        self.io.text("❌ Недостаточно BTC!")
                         
-                    input("\nНажмите Enter...")
+                    await self.io.pause("\nНажмите Enter...")
                     
                 elif choice == len(items)+1:
                     return
                 else:
-                    print("❌ Неверный выбор!")
+                    self.io.text("❌ Неверный выбор!")
             except ValueError:
-                print("❌ Введите число!")
+                self.io.text("❌ Введите число!")
                 
-    def profile_menu(self):
+    async def profile_menu(self):
         self.clear_screen()
-        print("📊 ПРОФИЛЬ ХАКЕРА")
-        print("="*60)
-        print(f"👤 Имя: {self.player.name}")
-        print(f"🎯 Уровень: {self.player.level}")
-        print(f"💰 BTC: {self.player.bitcoins:,}")
-        print(f"⭐ Опыт: {self.player.exp}/{(self.player.level + 1) * 1000}")
-        print(f"📖 Прогресс: Глава {self.player.story_progress}/40")
-        print(f"📊 Репутация: {self.player.reputation:+,}")
-        print(f"🎮 Режим: {'📖 СЮЖЕТНЫЙ' if self.game_mode == 'story' else '🎯 СВОБОДНЫЙ'}")
-        print()
-        
-        print("🛠️  НАВЫКИ:")
+        self.io.text("📊 ПРОФИЛЬ ХАКЕРА")
+        self.io.text("="*60)
+        self.io.text(f"👤 Имя: {self.player.name}")
+        self.io.text(f"🎯 Уровень: {self.player.level}")
+        self.io.text(f"💰 BTC: {self.player.bitcoins:,}")
+        self.io.text(f"⭐ Опыт: {self.player.exp}/{(self.player.level + 1) * 1000}")
+        self.io.text(f"📖 Прогресс: Глава {self.player.story_progress}/40")
+        self.io.text(f"📊 Репутация: {self.player.reputation:+,}")
+        self.io.text(f"🎮 Режим: {'📖 СЮЖЕТНЫЙ' if self.game_mode == 'story' else '🎯 СВОБОДНЫЙ'}")
+        self.io.text()
+        
+        self.io.text("🛠️  НАВЫКИ:")
         for skill, level in self.player.skills.items():
             bar = "█" * min(20, level)
-            print(f"  {skill}: {bar} ({level})")
-        print()
+            self.io.text(f"  {skill}: {bar} ({level})")
+        self.io.text()
         
-        print("🎭 ФРАКЦИИ:")
+        self.io.text("🎭 ФРАКЦИИ:")
         for faction, rep in self.player.factions.items():
             rank = self.player.get_faction_rank(faction)
-            print(f"  {faction}: {rep:+d} - {rank}")
-        print()
+            self.io.text(f"  {faction}: {rep:+d} - {rank}")
+        self.io.text()
         
-        print("🎒 ИНВЕНТАРЬ:")
+        self.io.text("🎒 ИНВЕНТАРЬ:")
         if self.player.inventory:
             unique_items = {}
             for item in self.player.inventory:
                 unique_items[item] = unique_items.get(item, 0) + 1
             for item, count in list(unique_items.items())[:10]:
-                print(f"  • {item} x{count}")
+                self.io.text(f"  • {item} x{count}")
             if len(unique_items) > 10:
-                print(f"  ... и еще {len(unique_items)-10} предметов")
+                self.io.text(f"  ... и еще {len(unique_items)-10} предметов")
         else:
-            print("  Пусто")
-        print()
+            self.io.text("  Пусто")
+        self.io.text()
         
         stats = self.player.personal_stats
-        print("📈 СТАТИСТИКА:")
-        print(f"  🕐 Время игры: {int(stats['play_time'] // 60)} минут")
-        print(f"  🎯 Глав завершено: {stats['chapters_completed']}/40")
-        print(f"  💰 Всего заработано: {stats['total_bitcoins_earned']:,} BTC")
-        print(f"  🌐 Взломов выполнено: {stats['hacks_completed']}")
-        print(f"  🎒 Предметов собрано: {stats['items_collected']}")
-        print(f"  🏆 Достижений: {stats['achievements_unlocked']}/20")
-        print(f"  👹 Боссов побеждено: {stats.get('bosses_defeated', 0)}")
-        print(f"  🎲 События завершены: {stats.get('events_completed', 0)}")
-        print(f"  🔨 Предметов создано: {stats.get('items_crafted', 0)}")
-        print(f"  📋 Ежедневных заданий: {stats.get('daily_missions', 0)}")
-        print(f"  📅 Дата начала: {stats['start_date'][:10]}")
-        print()
+        self.io.text("📈 СТАТИСТИКА:")
+        self.io.text(f"  🕐 Время игры: {int(stats['play_time'] // 60)} минут")
+        self.io.text(f"  🎯 Глав завершено: {stats['chapters_completed']}/40")
+        self.io.text(f"  💰 Всего заработано: {stats['total_bitcoins_earned']:,} BTC")
+        self.io.text(f"  🌐 Взломов выполнено: {stats['hacks_completed']}")
+        self.io.text(f"  🎒 Предметов собрано: {stats['items_collected']}")
+        self.io.text(f"  🏆 Достижений: {stats['achievements_unlocked']}/20")
+        self.io.text(f"  👹 Боссов побеждено: {stats.get('bosses_defeated', 0)}")
+        self.io.text(f"  🎲 События завершены: {stats.get('events_completed', 0)}")
+        self.io.text(f"  🔨 Предметов создано: {stats.get('items_crafted', 0)}")
+        self.io.text(f"  📋 Ежедневных заданий: {stats.get('daily_missions', 0)}")
+        self.io.text(f"  📅 Дата начала: {stats['start_date'][:10]}")
+        self.io.text()
         
         total_power = sum(self.player.skills.values()) + self.player.level + (self.player.bitcoins // 10000)
-        print(f"⚡ ОБЩАЯ МОЩЬ: {total_power:,}")
+        self.io.text(f"⚡ ОБЩАЯ МОЩЬ: {total_power:,}")
         
         if total_power > 1000:
             rank = "👑 ЛЕГЕНДА"
@@ -800,12 +1302,12 @@ class GameEngine:
         else:
             rank = "🌱 НОВИЧОК"
         
-        print(f"🏅 РАНГ: {rank}")
-        print()
+        self.io.text(f"🏅 РАНГ: {rank}")
+        self.io.text()
         
-        input("Нажмите Enter для возврата...")
+        await self.io.pause("Нажмите Enter для возврата...")
         
-    def random_event(self):
+    async def random_event(self):
         events = [
             {
                 "title": "🚨 ПОЛИЦЕЙСКИЙ РЕЙД",
@@ -881,27 +1383,27 @@ class GameEngine:
             }
         ]
         
-        event = random.choice(events)
+        event = self.rng.choice(events)
         self.clear_screen()
-        print("🎲 СЛУЧАЙНОЕ СОБЫТИЕ!")
-        print("="*60)
-        print(f"\n{event['title']}")
-        print(f"\n{event['text']}\n")
+        self.io.text("🎲 СЛУЧАЙНОЕ СОБЫТИЕ!")
+        self.io.text("="*60)
+        self.io.text(f"\n{event['title']}")
+        self.io.text(f"\n{event['text']}\n")
         
         for i, choice in enumerate(event['choices'], 1):
             cost_text = f" (стоимость: {choice['cost']} BTC)" if 'cost' in choice else ""
             skill_text = f" [требуется {choice['skill'].upper()}]" if 'skill' in choice else ""
-            print(f"{i}. {choice['text']}{cost_text}{skill_text}")
+            self.io.text(f"{i}. {choice['text']}{cost_text}{skill_text}")
         
-        print()
+        self.io.text()
         try:
-            choice_num = int(input("Ваш выбор: "))
+            choice_num = int(await self.io.choice("Ваш выбор: ", numbered(1, len(event['choices']))))
             if 1 <= choice_num <= len(event['choices']):
                 selected = event['choices'][choice_num - 1]
                 
                 if 'cost' in selected and self.player.bitcoins < selected['cost']:
-                    print(f"\n❌ Недостаточно BTC! Нужно {selected['cost']}")
-                    input("\nНажмите Enter...")
+                    self.io.text(f"\n❌ Недостаточно BTC! Нужно {selected['cost']}")
+                    await self.io.pause("\nНажмите Enter...")
                     return
                     
                 if 'cost' in selected:
@@ -910,82 +1412,85 @@ class GameEngine:
                 if 'skill' in selected:
                     skill_level = self.player.skills[selected['skill']]
                     success_chance = min(0.95, skill_level * 0.15)
-                    success = random.random() < success_chance
+                    success = self.rng.random() < success_chance
                     
                     if success:
-                        print("\n✅ УСПЕХ!")
-                        self.apply_event_reward(selected.get('success_reward', {}))
+                        self.io.text("\n✅ УСПЕХ!")
+                        await self.apply_event_reward(selected.get('success_reward', {}))
                     else:
-                        print("\n❌ ПРОВАЛ!")
-                        self.apply_event_reward(selected.get('fail_penalty', {}))
+                        self.io.text("\n❌ ПРОВАЛ!")
+                        await self.apply_event_reward(selected.get('fail_penalty', {}))
                 elif 'random' in selected:
-                    if random.random() < 0.5:
-                        reward = selected['cost'] * random.randint(2, 5)
-                        print(f"\n🎉 ВЫИГРЫШ! +{reward} BTC")
+                    if self.rng.random() < 0.5:
+                        reward = selected['cost'] * self.rng.randint(2, 5)
+                        self.io.text(f"\n🎉 ВЫИГРЫШ! +{reward} BTC")
                         self.player.bitcoins += reward
                     else:
-                        print(f"\n💥 ПРОИГРЫШ! -{selected['cost']} BTC")
+                        self.io.text(f"\n💥 ПРОИГРЫШ! -{selected['cost']} BTC")
                 else:
-                    self.apply_event_reward(selected.get('reward', {}))
+                    await self.apply_event_reward(selected.get('reward', {}))
                     
                 self.player.personal_stats["events_completed"] += 1
                 
                 if self.player.personal_stats["events_completed"] >= 50:
-                    print(self.player.add_achievement("🎲 Магнит событий"))
+                    self.io.text(self.player.add_achievement("🎲 Магнит событий"))
                     
+                await self.record_change("event")
         except ValueError:
-            print("\n❌ Неверный ввод!")
+            self.io.text("\n❌ Неверный ввод!")
             
-        input("\nНажмите Enter...")
+        await self.io.pause("\nНажмите Enter...")
         
-    def apply_event_reward(self, reward):
+    async def apply_event_reward(self, reward):
         if 'bitcoins' in reward:
             if reward['bitcoins'] > 0:
                 self.player.bitcoins += reward['bitcoins']
-                print(f"💰 +{reward['bitcoins']} BTC")
+                self.io.text(f"💰 +{reward['bitcoins']} BTC")
             else:
                 self.player.bitcoins = max(0, self.player.bitcoins + reward['bitcoins'])
-                print(f"💸 {reward['bitcoins']} BTC")
+                self.io.text(f"💸 {reward['bitcoins']} BTC")
                 
         if 'exp' in reward:
             if reward['exp'] > 0:
                 old_level = self.player.add_exp(reward['exp'])
-                print(f"⭐ +{reward['exp']} опыта")
+                self.io.text(f"⭐ +{reward['exp']} опыта")
                 if old_level:
-                    print(self.player.level_up())
+                    self.io.text(self.player.level_up())
             else:
                 self.player.exp = max(0, self.player.exp + reward['exp'])
-                print(f"⭐ {reward['exp']} опыта")
+                self.io.text(f"⭐ {reward['exp']} опыта")
                 
         if 'skill' in reward and 'value' in reward:
-            print(self.player.add_skill(reward['skill'], reward['value']))
+            self.io.text(self.player.add_skill(reward['skill'], reward['value']))
             
         if 'item' in reward:
             self.player.inventory.append(reward['item'])
             self.player.add_item()
-            print(f"🎒 Получен: {reward['item']}")
+            self.io.text(f"🎒 Получен: {reward['item']}")
             
         if 'reputation' in reward:
             self.player.reputation += reward['reputation']
-            print(f"📊 Репутация: {self.player.reputation:+d}")
+            self.io.text(f"📊 Репутация: {self.player.reputation:+d}")
             
         if 'faction' in reward:
             faction, amount = reward['faction']
-            print(self.player.change_faction_rep(faction, amount))
+            self.io.text(self.player.change_faction_rep(faction, amount))
             
         if 'faction2' in reward:
             faction, amount = reward['faction2']
-            print(self.player.change_faction_rep(faction, amount))
+            self.io.text(self.player.change_faction_rep(faction, amount))
             
         if 'level' in reward:
             self.player.level += 1
-            print(f"🎉 Уровень повышен до {self.player.level}!")
+            self.io.text(f"🎉 Уровень повышен до {self.player.level}!")
+            
+        await self.record_change("event")
     
-    def achievements_menu(self):
+    async def achievements_menu(self):
         self.clear_screen()
-        print("🏆 ДОСТИЖЕНИЯ")
-        print("="*40)
-        print()
+        self.io.text("🏆 ДОСТИЖЕНИЯ")
+        self.io.text("="*40)
+        self.io.text()
         
         all_achievements = [
             "💎 Мастер взлома", "🛒 Крупный покупатель", "🚀 Быстрый старт",
@@ -999,154 +1504,177 @@ class GameEngine:
         
         for achievement in all_achievements:
             if achievement in self.player.achievements:
-                print(f"✅ {achievement}")
+                self.io.text(f"✅ {achievement}")
             else:
-                print(f"❌ {achievement} [ЗАБЛОКИРОВАНО]")
-        print()
+                self.io.text(f"❌ {achievement} [ЗАБЛОКИРОВАНО]")
+        self.io.text()
         
-        input("Нажмите Enter для возврата...")
+        await self.io.pause("Нажмите Enter для возврата...")
     
-    def boss_battles(self):
-        bosses = [
-            {"name": "🤖 Киберстраж", "hp": 100, "damage": 10, "reward": 20000, "level": 5, "skill_drop": ("stealth", 3)},
-            {"name": "👨‍💼 Корпоративный Титан", "hp": 200, "damage": 15, "reward": 50000, "level": 10, "skill_drop": ("social", 4)},
-            {"name": "🧠 Нейромант", "hp": 300, "damage": 20, "reward": 100000, "level": 15, "skill_drop": ("programming", 5)},
-            {"name": "👁️ Всевидящее Око", "hp": 500, "damage": 30, "reward": 200000, "level": 25, "skill_drop": ("investigation", 6)},
-            {"name": "💀 Цифровой Жнец", "hp": 800, "damage": 40, "reward": 350000, "level": 35, "skill_drop": ("hacking", 7)},
-            {"name": "🐉 Квантовый Дракон", "hp": 1200, "damage": 50, "reward": 500000, "level": 50, "skill_drop": ("hacking", 10)},
-            {"name": "👹 Повелитель Хаоса", "hp": 2000, "damage": 70, "reward": 1000000, "level": 75, "skill_drop": ("programming", 15)},
-            {"name": "♾️ Абсолютная Сингулярность", "hp": 5000, "damage": 100, "reward": 5000000, "level": 100, "skill_drop": ("hacking", 20)}
-        ]
+    @resumable
+    async def boss_battles(self):
+        bosses = combat.BOSSES
         
         while True:
             self.clear_screen()
-            print("👹 БИТВЫ С БОССАМИ")
-            print("="*60)
-            print(f"💪 Ваш уровень: {self.player.level}")
-            print(f"💰 BTC: {self.player.bitcoins}")
-            print("="*60)
-            print()
+            self.io.text("👹 БИТВЫ С БОССАМИ")
+            self.io.text("="*60)
+            self.io.text(f"💪 Ваш уровень: {self.player.level}")
+            self.io.text(f"💰 BTC: {self.player.bitcoins}")
+            self.io.text("="*60)
+            self.io.text()
             
+            odds = await self.boss_odds([i for i, boss in enumerate(bosses) if self.player.level >= boss["level"]])
             for i, boss in enumerate(bosses, 1):
                 status = "🟢" if self.player.level >= boss["level"] else "🔴"
-                print(f"{i}. {status} {boss['name']} [Ур. {boss['level']}+]")
-                print(f"   💀 HP: {boss['hp']} | 🗡️ Урон: {boss['damage']} | 💰 Награда: {boss['reward']} BTC")
-                print()
+                self.io.text(f"{i}. {status} {boss['name']} [Ур. {boss['level']}+]")
+                self.io.text(f"   💀 HP: {boss['hp']} | 🗡️ Урон: {boss['damage']} | 💰 Награда: {boss['reward']} BTC")
+                if odds.get(i - 1):
+                    boss_odds = odds[i - 1]
+                    self.io.text(f"   🎲 Победа: {boss_odds['win']:.1%} | Ничья: {boss_odds['draw']:.1%} | Поражение: {boss_odds['loss']:.1%}")
+                elif i - 1 in odds:
+                    self.io.text("   🎲 Шансы: …")
+                self.io.text()
             
-            print(f"{len(bosses)+1}. 🔙 НАЗАД")
-            print()
+            self.io.text(f"{len(bosses)+1}. 🔙 НАЗАД")
+            self.io.text()
             
             try:
-                choice = int(input("Выберите босса: "))
+                choice = int(await self.menu_choice("Выберите босса: ", numbered(1, len(bosses) + 1)))
                 if 1 <= choice <= len(bosses):
                     boss = bosses[choice-1]
                     
                     if self.player.level < boss["level"]:
-                        print(f"\n❌ Требуется уровень {boss['level']}+!")
-                        input("Нажмите Enter...")
+                        self.io.text(f"\n❌ Требуется уровень {boss['level']}+!")
+                        await self.io.pause("Нажмите Enter...")
                         continue
                     
-                    self.fight_boss(boss)
+                    await self.fight_boss(boss)
                     
                 elif choice == len(bosses)+1:
                     return
             except ValueError:
-                print("❌ Неверный ввод!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный ввод!")
+                await self.io.pause("Нажмите Enter...")
     
-    def fight_boss(self, boss):
+    async def boss_odds(self, indexes):
+        # Точные шансы при лучшей игре считает boss_odds.py в отдельном процессе: расчёт
+        # занимает до десятых долей секунды на босса и требует numpy, который игре не нужен.
+        # Меню его не ждёт: пока расчёт идёт, вместо шансов None (в меню - «…»),
+        # готовые появятся при следующем показе
+        keys = [(i, self.player.skills["hacking"], self.player.skills["programming"], self.player.level) for i in indexes]
+        if not odds_solver_available():
+            return {}
+        missing = [key for key in keys if key not in BOSS_ODDS and key not in BOSS_ODDS_PENDING]
+        if missing:
+            import asyncio
+            BOSS_ODDS_PENDING.update(missing)
+            future = asyncio.get_running_loop().run_in_executor(None, solve_boss_odds, missing)
+            future.add_done_callback(functools.partial(store_boss_odds, missing))
+        odds = {}
+        for key in keys:
+            if key in BOSS_ODDS:
+                BOSS_ODDS.move_to_end(key)
+                odds[key[0]] = BOSS_ODDS[key]
+            elif key in BOSS_ODDS_PENDING:
+                odds[key[0]] = None
+        return odds
+
+    async def fight_boss(self, boss):
         self.clear_screen()
-        print(f"⚔️ БИТВА С {boss['name']}!")
-        print("="*60)
+        self.io.text(f"⚔️ БИТВА С {boss['name']}!")
+        self.io.text("="*60)
         
-        player_hp = 100 + (self.player.level * 10)
+        player_hp = combat.player_max_hp(self.player.level)
         boss_hp = boss['hp']
         turn = 1
         
         while player_hp > 0 and boss_hp > 0:
-            print(f"\n--- ХОД {turn} ---")
-            print(f"🛡️ Ваше HP: {player_hp}")
-            print(f"💀 HP босса: {boss_hp}")
-            print()
-            print("1. ⚔️ Атака хакингом")
-            print("2. 🛡️ Защита файрволом")
-            print("3. ⚡ Мощная атака (кулдаун 3 хода)")
-            print("4. 🏃 Сбежать")
-            print()
+            self.io.text(f"\n--- ХОД {turn} ---")
+            self.io.text(f"🛡️ Ваше HP: {player_hp}")
+            self.io.text(f"💀 HP босса: {boss_hp}")
+            self.io.text()
+            self.io.text("1. ⚔️ Атака хакингом")
+            self.io.text("2. 🛡️ Защита файрволом")
+            self.io.text("3. ⚡ Мощная атака (кулдаун 3 хода)")
+            self.io.text("4. 🏃 Сбежать")
+            self.io.text()
             
             try:
-                action = int(input("Действие: "))
+                action = int(await self.io.choice("Действие: ", numbered(1, 4)))
                 
-                if action == 1:
-                    damage = random.randint(10, 20) + (self.player.skills["hacking"] * 3)
+                if action == combat.ATTACK:
+                    damage = combat.attack_damage(self.rng.randint(*combat.ATTACK_ROLL), self.player.skills["hacking"])
                     boss_hp -= damage
-                    print(f"\n⚔️ Вы наносите {damage} урона!")
+                    self.io.text(f"\n⚔️ Вы наносите {damage} урона!")
                     
-                elif action == 2:
-                    print("\n🛡️ Вы ставите защиту!")
-                    boss_damage = boss['damage'] // 2
+                elif action == combat.DEFEND:
+                    self.io.text("\n🛡️ Вы ставите защиту!")
+                    boss_damage = combat.defended_damage(boss)
                     player_hp -= boss_damage
-                    print(f"💥 Босс наносит {boss_damage} урона (заблокировано 50%)")
+                    self.io.text(f"💥 Босс наносит {boss_damage} урона (заблокировано 50%)")
                     turn += 1
                     continue
                     
-                elif action == 3:
-                    damage = random.randint(30, 50) + (self.player.skills["programming"] * 5)
+                elif action == combat.POWER:
+                    damage = combat.power_damage(self.rng.randint(*combat.POWER_ROLL), self.player.skills["programming"])
                     boss_hp -= damage
-                    print(f"\n⚡ КРИТИЧЕСКИЙ УДАР! {damage} урона!")
+                    self.io.text(f"\n⚡ КРИТИЧЕСКИЙ УДАР! {damage} урона!")
                     
-                elif action == 4:
-                    print("\n🏃 Вы сбежали от битвы!")
-                    input("Нажмите Enter...")
+                elif action == combat.FLEE:
+                    self.io.text("\n🏃 Вы сбежали от битвы!")
+                    await self.io.pause("Нажмите Enter...")
                     return
                 else:
-                    print("\n❌ Неверное действие!")
+                    self.io.text("\n❌ Неверное действие!")
                     
             except ValueError:
-                print("\n❌ Неверный ввод!")
+                self.io.text("\n❌ Неверный ввод!")
             
             if boss_hp > 0:
-                boss_damage = boss['damage'] + random.randint(-5, 5)
+                boss_damage = boss['damage'] + self.rng.randint(-combat.BOSS_SPREAD, combat.BOSS_SPREAD)
                 player_hp -= boss_damage
-                print(f"💥 {boss['name']} наносит {boss_damage} урона!")
+                self.io.text(f"💥 {boss['name']} наносит {boss_damage} урона!")
             
-            time.sleep(1)
+            await self.clock.sleep(1)
             turn += 1
             
-            if turn > 30:
-                print("\n⏰ Битва слишком затянулась! Ничья!")
-                input("Нажмите Enter...")
+            if turn > combat.TURN_LIMIT:
+                self.io.text("\n⏰ Битва слишком затянулась! Ничья!")
+                await self.io.pause("Нажмите Enter...")
                 return
         
         if player_hp <= 0:
-            print("\n💀 ВЫ ПРОИГРАЛИ!")
-            penalty = min(50000, self.player.bitcoins // 4)
+            self.io.text("\n💀 ВЫ ПРОИГРАЛИ!")
+            penalty = combat.loss_penalty(self.player.bitcoins)
             self.player.bitcoins = max(0, self.player.bitcoins - penalty)
-            print(f"💸 Потеря: {penalty} BTC")
+            self.io.text(f"💸 Потеря: {penalty} BTC")
         else:
-            print(f"\n🎉 ПОБЕДА НАД {boss['name']}!")
+            self.io.text(f"\n🎉 ПОБЕДА НАД {boss['name']}!")
             self.player.bitcoins += boss['reward']
-            print(f"💰 +{boss['reward']} BTC")
+            self.io.text(f"💰 +{boss['reward']} BTC")
             
             skill, value = boss['skill_drop']
             self.player.skills[skill] += value
-            print(f"⚡ {skill.upper()} +{value}")
+            self.io.text(f"⚡ {skill.upper()} +{value}")
             
-            exp_reward = boss['level'] * 500
+            exp_reward = combat.boss_exp(boss)
             old_level = self.player.add_exp(exp_reward)
-            print(f"⭐ +{exp_reward} опыта")
+            self.io.text(f"⭐ +{exp_reward} опыта")
             if old_level:
-                print(self.player.level_up())
+                self.io.text(self.player.level_up())
             
             self.player.boss_defeats += 1
             self.player.personal_stats["bosses_defeated"] += 1
             
             if self.player.boss_defeats >= 5:
-                print(self.player.add_achievement("👹 Убийца боссов"))
+                self.io.text(self.player.add_achievement("👹 Убийца боссов"))
         
-        input("\nНажмите Enter...")
+        await self.record_change("boss")
+        await self.io.pause("\nНажмите Enter...")
     
-    def crafting_menu(self):
+    @resumable
+    async def crafting_menu(self):
         recipes = [
             {"name": "🔧 Продвинутый эксплойт", "materials": {"🔑 Ключ шифрования": 2, "💾 Эксплойт": 1}, "result": {"item": "🔧 Продвинутый эксплойт", "skill": "hacking", "bonus": 5}, "cost": 5000},
             {"name": "🛡️ Супер файрвол", "materials": {"🛡️ Файрвол": 3, "⚡ Ускоритель": 1}, "result": {"item": "🛡️ Супер файрвол", "skill": "stealth", "bonus": 4}, "cost": 8000},
@@ -1159,31 +1687,31 @@ class GameEngine:
         
         while True:
             self.clear_screen()
-            print("🔨 КРАФТ ПРЕДМЕТОВ")
-            print("="*60)
-            print(f"💰 BTC: {self.player.bitcoins}")
-            print()
+            self.io.text("🔨 КРАФТ ПРЕДМЕТОВ")
+            self.io.text("="*60)
+            self.io.text(f"💰 BTC: {self.player.bitcoins}")
+            self.io.text()
             
             for i, recipe in enumerate(recipes, 1):
-                print(f"{i}. {recipe['name']} (стоимость: {recipe['cost']} BTC)")
-                print("   Материалы:")
+                self.io.text(f"{i}. {recipe['name']} (стоимость: {recipe['cost']} BTC)")
+                self.io.text("   Материалы:")
                 for material, count in recipe['materials'].items():
                     have = self.player.inventory.count(material)
                     status = "✅" if have >= count else "❌"
-                    print(f"   {status} {material} x{count} (у вас: {have})")
-                print()
+                    self.io.text(f"   {status} {material} x{count} (у вас: {have})")
+                self.io.text()
             
-            print(f"{len(recipes)+1}. 🔙 НАЗАД")
-            print()
+            self.io.text(f"{len(recipes)+1}. 🔙 НАЗАД")
+            self.io.text()
             
             try:
-                choice = int(input("Выберите рецепт: "))
+                choice = int(await self.menu_choice("Выберите рецепт: ", numbered(1, len(recipes) + 1)))
                 if 1 <= choice <= len(recipes):
                     recipe = recipes[choice-1]
                     
                     if self.player.bitcoins < recipe['cost']:
-                        print(f"\n❌ Недостаточно BTC! Нужно {recipe['cost']}")
-                        input("Нажмите Enter...")
+                        self.io.text(f"\n❌ Недостаточно BTC! Нужно {recipe['cost']}")
+                        await self.io.pause("Нажмите Enter...")
                         continue
                     
                     can_craft = True
@@ -1193,8 +1721,8 @@ class GameEngine:
                             break
                     
                     if not can_craft:
-                        print("\n❌ Недостаточно материалов!")
-                        input("Нажмите Enter...")
+                        self.io.text("\n❌ Недостаточно материалов!")
+                        await self.io.pause("Нажмите Enter...")
                         continue
                     
                     for material, count in recipe['materials'].items():
@@ -1208,29 +1736,30 @@ class GameEngine:
                     self.player.crafted_items.append(result['item'])
                     self.player.personal_stats["items_crafted"] += 1
                     
-                    print(f"\n✅ Создан: {result['item']}")
+                    self.io.text(f"\n✅ Создан: {result['item']}")
                     
                     if 'skill' in result:
                         self.player.skills[result['skill']] += result['bonus']
-                        print(f"⚡ {result['skill'].upper()} +{result['bonus']}")
+                        self.io.text(f"⚡ {result['skill'].upper()} +{result['bonus']}")
                     
                     if 'all_skills' in result:
                         for skill in self.player.skills:
                             self.player.skills[skill] += result['all_skills']
-                        print(f"⚡ ВСЕ НАВЫКИ +{result['all_skills']}")
+                        self.io.text(f"⚡ ВСЕ НАВЫКИ +{result['all_skills']}")
                     
                     if len(self.player.crafted_items) >= 10:
-                        print(self.player.add_achievement("🔨 Мастер крафта"))
+                        self.io.text(self.player.add_achievement("🔨 Мастер крафта"))
                     
-                    input("\nНажмите Enter...")
+                    await self.record_change("craft")
+                    await self.io.pause("\nНажмите Enter...")
                     
                 elif choice == len(recipes)+1:
                     return
             except ValueError:
-                print("❌ Неверный ввод!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный ввод!")
+                await self.io.pause("Нажмите Enter...")
     
-    def daily_missions(self):
+    async def daily_missions(self):
         missions = [
             {"name": "💻 Взломать 3 сервера", "reward": {"bitcoins": 15000, "exp": 3000}, "type": "hack", "target": 3},
             {"name": "🛒 Купить 2 предмета", "reward": {"bitcoins": 10000, "exp": 2000}, "type": "buy", "target": 2},
@@ -1240,377 +1769,417 @@ class GameEngine:
         ]
         
         self.clear_screen()
-        print("📋 ЕЖЕДНЕВНЫЕ ЗАДАНИЯ")
-        print("="*60)
-        print()
+        self.io.text("📋 ЕЖЕДНЕВНЫЕ ЗАДАНИЯ")
+        self.io.text("="*60)
+        self.io.text()
         
-        selected_missions = random.sample(missions, 3)
+        selected_missions = self.rng.sample(missions, 3)
         
         for i, mission in enumerate(selected_missions, 1):
-            print(f"{i}. {mission['name']}")
-            print(f"   💰 Награда: {mission['reward']['bitcoins']} BTC")
-            print(f"   ⭐ Опыт: {mission['reward']['exp']}")
-            print()
+            self.io.text(f"{i}. {mission['name']}")
+            self.io.text(f"   💰 Награда: {mission['reward']['bitcoins']} BTC")
+            self.io.text(f"   ⭐ Опыт: {mission['reward']['exp']}")
+            self.io.text()
         
-        print("Ежедневные задания автоматически отслеживаются!")
-        print("Выполняйте действия и получайте награды.")
-        print()
-        print(f"Выполнено сегодня: {self.player.daily_missions_completed} заданий")
+        self.io.text("Ежедневные задания автоматически отслеживаются!")
+        self.io.text("Выполняйте действия и получайте награды.")
+        self.io.text()
+        self.io.text(f"Выполнено сегодня: {self.player.daily_missions_completed} заданий")
         
         if self.player.daily_missions_completed >= 100:
-            print(self.player.add_achievement("📋 Ежедневник"))
+            self.io.text(self.player.add_achievement("📋 Ежедневник"))
         
-        input("\nНажмите Enter...")
+        await self.io.pause("\nНажмите Enter...")
     
-    def factions_menu(self):
+    async def factions_menu(self):
         self.clear_screen()
-        print("🎭 ФРАКЦИИ")
-        print("="*60)
-        print()
+        self.io.text("🎭 ФРАКЦИИ")
+        self.io.text("="*60)
+        self.io.text()
         
         for faction, rep in self.player.factions.items():
             rank = self.player.get_faction_rank(faction)
             bar_length = min(50, abs(rep) // 20)
             bar = "█" * bar_length
             
-            print(f"{faction.upper()}")
-            print(f"  Репутация: {rep:+d}")
-            print(f"  Ранг: {rank}")
-            print(f"  [{bar}]")
-            print()
-        
-        print("Влияние фракций:")
-        print("• HACKERS - дают доступ к эксклюзивным инструментам")
-        print("• CORPORATIONS - высокооплачиваемые контракты")
-        print("• ANARCHISTS - уникальные миссии саботажа")
-        print("• GOVERNMENT - законная защита и поддержка")
-        print("• UNDERGROUND - черный рынок и секретная информация")
-        print()
+            self.io.text(f"{faction.upper()}")
+            self.io.text(f"  Репутация: {rep:+d}")
+            self.io.text(f"  Ранг: {rank}")
+            self.io.text(f"  [{bar}]")
+            self.io.text()
+        
+        self.io.text("Влияние фракций:")
+        self.io.text("• HACKERS - дают доступ к эксклюзивным инструментам")
+        self.io.text("• CORPORATIONS - высокооплачиваемые контракты")
+        self.io.text("• ANARCHISTS - уникальные миссии саботажа")
+        self.io.text("• GOVERNMENT - законная защита и поддержка")
+        self.io.text("• UNDERGROUND - черный рынок и секретная информация")
+        self.io.text()
         
         if all(rep >= 1000 for rep in self.player.factions.values()):
-            print(self.player.add_achievement("🎭 Дипломат фракций"))
+            self.io.text(self.player.add_achievement("🎭 Дипломат фракций"))
         
-        input("Нажмите Enter...")
+        await self.io.pause("Нажмите Enter...")
     
-    def save_specific_game(self, mode):
+    async def save_specific_game(self, mode):
         self.clear_screen()
-        print(f"💾 СОХРАНЕНИЕ {'СЮЖЕТА' if mode == 'story' else 'СВОБОДНОГО РЕЖИМА'}")
-        print("="*30)
-        print()
-        autosave_file = os.path.join(self.data.save_dir, f"autosave_{mode}.dat")
-        if os.path.exists(autosave_file):
-            with open(autosave_file, 'rb') as f:
-                save_data = pickle.load(f)
-            print("0. [АВТОСОХРАНЕНИЕ] - последняя сессия")
+        self.io.text(f"💾 СОХРАНЕНИЕ {'СЮЖЕТА' if mode == 'story' else 'СВОБОДНОГО РЕЖИМА'}")
+        self.io.text("="*30)
+        self.io.text()
+        summaries = await self.data_call(self.data.get_slot_summaries, mode)
+        slot_count = await self.data_call(self.data.slot_count, mode)
+        if 0 in summaries:
+            self.io.text("0. [АВТОСОХРАНЕНИЕ] - последняя сессия")
         else:
-            print("0. [АВТОСОХРАНЕНИЕ] - нет данных")
-        for i in range(1, 4):
-            save_file = os.path.join(self.data.save_dir, f"save{i}_{mode}.dat")
-            if os.path.exists(save_file):
-                with open(save_file, 'rb') as f:
-                    save_data = pickle.load(f)
-                print(f"{i}. [СОХРАНЕНИЕ {i}] {save_data['player']['name']} - {save_data['timestamp'][:10]}")
+            self.io.text("0. [АВТОСОХРАНЕНИЕ] - нет данных")
+        for i in range(1, slot_count + 1):
+            summary = summaries.get(i)
+            if summary:
+                self.io.text(f"{i}. [СОХРАНЕНИЕ {i}] {summary['name']} - {summary['timestamp'][:10]}")
             else:
-                print(f"{i}. [СОХРАНЕНИЕ {i}] - свободно")
+                self.io.text(f"{i}. [СОХРАНЕНИЕ {i}] - свободно")
                 
-        print("5. 🔙 НАЗАД")
-        print()
+        self.io.text(f"{slot_count + 2}. 🔙 НАЗАД")
+        self.io.text()
         
         try:
-            choice = int(input("Выберите слот: "))
-            if 0 <= choice <= 3:
-                if self.data.save_game(self.player.__dict__, choice, mode):
+            choice = int(await self.io.choice("Выберите слот: ", numbered(0, slot_count) + [str(slot_count + 2)]))
+            if 0 <= choice <= slot_count:
+                if await self.data_call(self.data.save_game, self.player.__dict__, choice, mode):
                     slot_name = "автосохранение" if choice == 0 else f"слот {choice}"
                     mode_name = "сюжет" if mode == "story" else "свободный режим"
-                    print(f"✅ {mode_name} сохранен в {slot_name}!")
+                    self.io.text(f"✅ {mode_name} сохранен в {slot_name}!")
                 else:
-                    print("❌ Ошибка сохранения!")
-            elif choice == 5:
+                    self.io.text("❌ Ошибка сохранения!")
+            elif choice == slot_count + 2:
                 return
             else:
-                print("❌ Неверный выбор!")
+                self.io.text("❌ Неверный выбор!")
         except ValueError:
-            print("❌ Введите число!")
+            self.io.text("❌ Введите число!")
             
-        input("\nНажмите Enter...")
+        await self.io.pause("\nНажмите Enter...")
         
-    def load_specific_game(self, mode):
-        saves = self.data.get_saves(mode)
+    async def load_specific_game(self, mode):
+        saves = await self.data_call(self.data.get_saves, mode)
         if not saves:
-            print(f"❌ Нет сохранений для {'сюжетного режима' if mode == 'story' else 'свободного режима'}!")
-            input("Нажмите Enter...")
+            self.io.text(f"❌ Нет сохранений для {'сюжетного режима' if mode == 'story' else 'свободного режима'}!")
+            await self.io.pause("Нажмите Enter...")
             return
             
         self.clear_screen()
-        print(f"💾 ЗАГРУЗКА {'СЮЖЕТА' if mode == 'story' else 'СВОБОДНОГО РЕЖИМА'}")
-        print("="*30)
-        print()
-        autosave_file = os.path.join(self.data.save_dir, f"autosave_{mode}.dat")
-        if os.path.exists(autosave_file):
-            with open(autosave_file, 'rb') as f:
-                save_data = pickle.load(f)
-            print("0. [АВТОСОХРАНЕНИЕ]")
-            print(f"   Имя: {save_data['player']['name']} | Ур. {save_data['player']['level']}")
-            print(f"   Прогресс: Глава {save_data['player']['story_progress']} | {save_data['timestamp'][:10]}")
-            print()
-        for i in range(1, 4):
-            save_file = os.path.join(self.data.save_dir, f"save{i}_{mode}.dat")
-            if os.path.exists(save_file):
-                with open(save_file, 'rb') as f:
-                    save_data = pickle.load(f)
-                print(f"{i}. [СОХРАНЕНИЕ {i}]")
-                print(f"   Имя: {save_data['player']['name']} | Ур. {save_data['player']['level']}")
-                print(f"   Прогресс: Глава {save_data['player']['story_progress']} | {save_data['timestamp'][:10]}")
-                print()
+        self.io.text(f"💾 ЗАГРУЗКА {'СЮЖЕТА' if mode == 'story' else 'СВОБОДНОГО РЕЖИМА'}")
+        self.io.text("="*30)
+        self.io.text()
+        summaries = await self.data_call(self.data.get_slot_summaries, mode)
+        slot_count = await self.data_call(self.data.slot_count, mode)
+        summary = summaries.get(0)
+        if summary:
+            self.io.text("0. [АВТОСОХРАНЕНИЕ]")
+            self.io.text(f"   Имя: {summary['name']} | Ур. {summary['level']}")
+            self.io.text(f"   Прогресс: Глава {summary['story_progress']} | {summary['timestamp'][:10]}")
+            self.io.text()
+        for i in range(1, slot_count + 1):
+            summary = summaries.get(i)
+            if summary:
+                self.io.text(f"{i}. [СОХРАНЕНИЕ {i}]")
+                self.io.text(f"   Имя: {summary['name']} | Ур. {summary['level']}")
+                self.io.text(f"   Прогресс: Глава {summary['story_progress']} | {summary['timestamp'][:10]}")
+                self.io.text()
                 
-        print("5. 🔙 НАЗАД")
-        print()
+        self.io.text(f"{slot_count + 2}. 🔙 НАЗАД")
+        self.io.text()
         
         try:
-            choice = int(input("Выберите слот: "))
-            if 0 <= choice <= 3:
-                save_data = self.data.load_game(choice, mode)
+            choice = int(await self.io.choice("Выберите слот: ", numbered(0, slot_count) + [str(slot_count + 2)]))
+            if 0 <= choice <= slot_count:
+                save_data = await self.data_call(self.data.load_game, choice, mode)
                 if save_data:
                     self.player = Player("")
                     self.player.__dict__.update(save_data['player'])
                     self.game_mode = mode
-                    print(f"✅ {'Сюжетный режим' if mode == 'story' else 'Свободный режим'} загружен!")
-                    input("Нажмите Enter...")
+                    await self.data_call(self.data.attach_journal, self.player.__dict__, mode)
+                    self.io.text(f"✅ {'Сюжетный режим' if mode == 'story' else 'Свободный режим'} загружен!")
+                    await self.io.pause("Нажмите Enter...")
                     
                     if mode == "story":
-                        self.play_story_mode()
+                        await self.play_story_mode()
                     else:
-                        self.sandbox_loop()
+                        await self.sandbox_loop()
                 else:
-                    print("❌ Ошибка загрузки!")
-                    input("Нажмите Enter...")
-            elif choice == 5:
+                    self.io.text("❌ Ошибка загрузки!")
+                    await self.io.pause("Нажмите Enter...")
+            elif choice == slot_count + 2:
                 return
             else:
-                print("❌ Неверный выбор!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный выбор!")
+                await self.io.pause("Нажмите Enter...")
         except ValueError:
-            print("❌ Введите число!")
-            input("Нажмите Enter...")
+            self.io.text("❌ Введите число!")
+            await self.io.pause("Нажмите Enter...")
     
-    def load_game_menu(self):
+    async def load_game_menu(self):
         self.clear_screen()
-        print("💾 ЗАГРУЗКА ИГРЫ")
-        print("="*30)
-        print()
-        story_saves = self.data.get_saves("story")
-        sandbox_saves = self.data.get_saves("sandbox")
+        self.io.text("💾 ЗАГРУЗКА ИГРЫ")
+        self.io.text("="*30)
+        self.io.text()
+        story_saves = await self.data_call(self.data.get_saves, "story")
+        sandbox_saves = await self.data_call(self.data.get_saves, "sandbox")
         
-        print("📖 СЮЖЕТНЫЙ РЕЖИМ:")
+        self.io.text("📖 СЮЖЕТНЫЙ РЕЖИМ:")
         if story_saves:
-            print("   ✅ Есть сохранения")
+            self.io.text("   ✅ Есть сохранения")
         else:
-            print("   ❌ Нет сохранений")
+            self.io.text("   ❌ Нет сохранений")
             
-        print("🎯 СВОБОДНЫЙ РЕЖИМ:")
+        self.io.text("🎯 СВОБОДНЫЙ РЕЖИМ:")
         if sandbox_saves:
-            print("   ✅ Есть сохранения")
+            self.io.text("   ✅ Есть сохранения")
         else:
-            print("   ❌ Нет сохранений")
-        print()
+            self.io.text("   ❌ Нет сохранений")
+        self.io.text()
         
-        print("1. 📖 Загрузить сюжетный режим")
-        print("2. 🎯 Загрузить свободный режим")
-        print("3. 🔙 Назад")
-        print()
+        self.io.text("1. 📖 Загрузить сюжетный режим")
+        self.io.text("2. 🎯 Загрузить свободный режим")
+        self.io.text("3. 🔙 Назад")
+        self.io.text()
         
-        choice = input("Выберите опцию [1-3]: ").strip()
+        choice = (await self.io.choice("Выберите опцию [1-3]: ", numbered(1, 3))).strip()
         
         if choice == "1":
-            self.load_specific_game("story")
+            await self.load_specific_game("story")
         elif choice == "2":
-            self.load_specific_game("sandbox")
+            await self.load_specific_game("sandbox")
         elif choice == "3":
             return
         else:
-            print("❌ Неверный выбор!")
-            input("Нажмите Enter...")
+            self.io.text("❌ Неверный выбор!")
+            await self.io.pause("Нажмите Enter...")
             
-    def check_for_updates(self):
+    async def check_for_updates(self):
         self.clear_screen()
-        print("🔄 ПРОВЕРКА ОБНОВЛЕНИЙ")
-        print("="*30)
-        print()
+        self.io.text("🔄 ПРОВЕРКА ОБНОВЛЕНИЙ")
+        self.io.text("="*30)
+        self.io.text()
         if os.path.exists("updater.py"):
-            print("✅ Апдейтер найден")
-            print("🚀 Запуск проверки обновлений...")
-            time.sleep(2)
+            self.io.text("✅ Апдейтер найден")
+            self.io.text("🚀 Запуск проверки обновлений...")
+            await self.clock.sleep(2)
             os.system("python3 updater.py")
         else:
-            print("❌ Апдейтер не найден")
-            print("📥 Скачайте последнюю версию с GitHub")
-            print("🌐 https://github.com/yourusername/terminal-shadows")
+            self.io.text("❌ Апдейтер не найден")
+            self.io.text("📥 Скачайте последнюю версию с GitHub")
+            self.io.text("🌐 https://github.com/yourusername/terminal-shadows")
             
-        input("\nНажмите Enter для возврата...")
+        await self.io.pause("\nНажмите Enter для возврата...")
             
-    def settings_menu(self):
+    @resumable
+    async def settings_menu(self):
         while True:
             self.clear_screen()
-            print("⚙️  НАСТРОЙКИ")
-            print("="*30)
-            print(f"Язык: {self.data.config['language']}")
-            print(f"Сложность: {self.data.config['difficulty']}")
-            print(f"Автосохранение: {'Вкл' if self.data.config['autosave'] else 'Выкл'}")
-            print(f"Анимации: {'Вкл' if self.data.config['animations'] else 'Выкл'}")
-            print()
-            print("1. Сменить язык")
-            print("2. Изменить сложность")
-            print("3. Автосохранение")
-            print("4. Анимации")
-            print("5. 🗑️  СБРОС СОХРАНЕНИЙ")
-            print("6. 🔙 НАЗАД")
-            print()
-            
-            choice = input("Выберите опцию [1-6]: ").strip()
+            self.io.text("⚙️  НАСТРОЙКИ")
+            self.io.text("="*30)
+            self.io.text(f"Язык: {self.data.config['language']}")
+            self.io.text(f"Сложность: {self.data.config['difficulty']}")
+            self.io.text(f"Автосохранение: {'Вкл' if self.data.config['autosave'] else 'Выкл'}")
+            self.io.text(f"Анимации: {'Вкл' if self.data.config['animations'] else 'Выкл'}")
+            self.io.text(f"Формат сохранений: {self.data.config.get('save_codec', save_codecs.DEFAULT_CODEC)}")
+            self.io.text(f"Хранилище сохранений: {self.data.config.get('save_backend', 'files')}")
+            self.io.text()
+            self.io.text("1. Сменить язык")
+            self.io.text("2. Изменить сложность")
+            self.io.text("3. Автосохранение")
+            self.io.text("4. Анимации")
+            self.io.text("5. 🗑️  СБРОС СОХРАНЕНИЙ")
+            self.io.text("6. 💾 Формат сохранений")
+            self.io.text("7. 🗄️  Хранилище сохранений")
+            self.io.text("8. 🔙 НАЗАД")
+            self.io.text()
+            
+            choice = (await self.menu_choice("Выберите опцию [1-8]: ", numbered(1, 8))).strip()
             
             if choice == "1":
                 self.data.config['language'] = "ru" if self.data.config['language'] == "en" else "en"
                 self.data.save_config()
-                print("✅ Язык изменен!")
-                input()
+                self.io.text("✅ Язык изменен!")
+                await self.io.pause()
             elif choice == "2":
                 difficulties = ["легкая", "нормальная", "сложная"]
                 current = self.data.config['difficulty']
                 next_diff = difficulties[(difficulties.index(current) + 1) % len(difficulties)]
                 self.data.config['difficulty'] = next_diff
                 self.data.save_config()
-                print(f"✅ Сложность изменена на {next_diff}!")
-                input()
+                self.io.text(f"✅ Сложность изменена на {next_diff}!")
+                await self.io.pause()
             elif choice == "3":
                 self.data.config['autosave'] = not self.data.config['autosave']
                 self.data.save_config()
-                print(f"✅ Автосохранение: {'включено' if self.data.config['autosave'] else 'выключено'}!")
-                input()
+                self.io.text(f"✅ Автосохранение: {'включено' if self.data.config['autosave'] else 'выключено'}!")
+                await self.io.pause()
             elif choice == "4":
                 self.data.config['animations'] = not self.data.config['animations']
                 self.data.save_config()
-                print(f"✅ Анимации: {'включены' if self.data.config['animations'] else 'выключены'}!")
-                input()
+                self.io.text(f"✅ Анимации: {'включены' if self.data.config['animations'] else 'выключены'}!")
+                await self.io.pause()
             elif choice == "5":
-                if input("❌ Удалить ВСЕ сохранения? (y/N): ").lower() == 'y':
-                    for mode in ["story", "sandbox"]:
-                        autosave_file = os.path.join(self.data.save_dir, f"autosave_{mode}.dat")
-                        if os.path.exists(autosave_file):
-                            os.remove(autosave_file)
-                        for i in range(1, 4):
-                            save_file = os.path.join(self.data.save_dir, f"save{i}_{mode}.dat")
-                            if os.path.exists(save_file):
-                                os.remove(save_file)
-                    print("✅ Все сохранения удалены!")
-                    input()
+                if (await self.io.choice("❌ Удалить ВСЕ сохранения? (y/N): ", ["y", "n"])).lower() == 'y':
+                    await self.data_call(self.data.delete_saves)
+                    self.io.text("✅ Все сохранения удалены!")
+                    await self.io.pause()
             elif choice == "6":
+                codecs = list(save_codecs.CODECS)
+                current = self.data.config.get('save_codec', save_codecs.DEFAULT_CODEC)
+                next_codec = codecs[(codecs.index(current) + 1) % len(codecs)] if current in codecs else save_codecs.DEFAULT_CODEC
+                self.data.config['save_codec'] = next_codec
+                self.data.save_config()
+                self.io.text(f"✅ Формат сохранений: {next_codec}!")
+                await self.io.pause()
+            elif choice == "7":
+                backends = list(save_store.BACKENDS)
+                current = self.data.config.get('save_backend', 'files')
+                backend = backends[(backends.index(current) + 1) % len(backends)] if current in backends else "files"
+                try:
+                    moved = await self.data_call(self.data.switch_backend, backend)
+                    self.io.text(f"✅ Хранилище сохранений: {backend} (перенесено слотов: {moved})!")
+                except Exception as e:
+                    self.io.text(f"❌ Ошибка переноса сохранений: {e}")
+                await self.io.pause()
+            elif choice == "8":
                 return
             else:
-                print("❌ Неверный выбор!")
-                input("Нажмите Enter...")
+                self.io.text("❌ Неверный выбор!")
+                await self.io.pause("Нажмите Enter...")
                 
-    def show_stats(self):
+    async def show_stats(self):
         self.clear_screen()
-        print("📊 ГЛОБАЛЬНАЯ СТАТИСТИКА")
-        print("="*60)
-        print()
-        print(f"🎮 Всего глав: {len(chapters)}")
-        print("🎯 Целей для взлома: 12")
-        print("🛒 Товаров в магазине: 12")
-        print("⚡ Навыков для прокачки: 5")
-        print("🏆 Достижений: 20")
-        print("👹 Боссов: 8")
-        print("🎲 Случайных событий: 8+")
-        print("🔨 Рецептов крафта: 7")
-        print("🎭 Фракций: 5")
-        print("💾 Режимы: СЮЖЕТНЫЙ и СВОБОДНЫЙ")
-        print()
-        print("🚀 Особенности версии 4.0 ULTIMATE:")
-        print("  • 40 глав эпического сюжета")
-        print("  • Новые главы: Параллельные миры, Цифровые боги")
-        print("  • Последний хакер, За пределами кода, Эпилог")
-        print("  • Множество концовок и путей развития")
-        print("  • Свободный режим с бесконечными возможностями")
-        print()
-        print("🎮 НОВЫЕ МЕХАНИКИ:")
-        print("  • 🎲 Случайные события с выборами")
-        print("  • 👹 Эпические битвы с боссами")
-        print("  • 🔨 Система крафта предметов")
-        print("  • 📋 Ежедневные задания")
-        print("  • 🎭 Репутация с 5 фракциями")
-        print("  • ⚡ Расширенная система навыков")
-        print("  • 💎 20 достижений для разблокировки")
-        print()
-        print("🌟 ЭКСКЛЮЗИВ:")
-        print("  • Раздельная система сохранений")
-        print("  • Автосохранения после каждой главы")
-        print("  • Персональная статистика для каждого игрока")
-        print("  • Новые цели для взлома высокого уровня")
-        print("  • Улучшенный магазин с божественными предметами")
-        print("  • Динамические случайные события")
-        print("  • Прокачка до 100 уровня!")
-        print()
-        input("Нажмите Enter для возврата...")
-        
-    def game_complete(self):
+        self.io.text("📊 ГЛОБАЛЬНАЯ СТАТИСТИКА")
+        self.io.text("="*60)
+        self.io.text()
+        self.io.text(f"🎮 Всего глав: {len(chapters)}")
+        self.io.text("🎯 Целей для взлома: 12")
+        self.io.text("🛒 Товаров в магазине: 12")
+        self.io.text("⚡ Навыков для прокачки: 5")
+        self.io.text("🏆 Достижений: 20")
+        self.io.text("👹 Боссов: 8")
+        self.io.text("🎲 Случайных событий: 8+")
+        self.io.text("🔨 Рецептов крафта: 7")
+        self.io.text("🎭 Фракций: 5")
+        self.io.text("💾 Режимы: СЮЖЕТНЫЙ и СВОБОДНЫЙ")
+        self.io.text()
+        self.io.text("🚀 Особенности версии 4.0 ULTIMATE:")
+        self.io.text("  • 40 глав эпического сюжета")
+        self.io.text("  • Новые главы: Параллельные миры, Цифровые боги")
+        self.io.text("  • Последний хакер, За пределами кода, Эпилог")
+        self.io.text("  • Множество концовок и путей развития")
+        self.io.text("  • Свободный режим с бесконечными возможностями")
+        self.io.text()
+        self.io.text("🎮 НОВЫЕ МЕХАНИКИ:")
+        self.io.text("  • 🎲 Случайные события с выборами")
+        self.io.text("  • 👹 Эпические битвы с боссами")
+        self.io.text("  • 🔨 Система крафта предметов")
+        self.io.text("  • 📋 Ежедневные задания")
+        self.io.text("  • 🎭 Репутация с 5 фракциями")
+        self.io.text("  • ⚡ Расширенная система навыков")
+        self.io.text("  • 💎 20 достижений для разблокировки")
+        self.io.text()
+        self.io.text("🌟 ЭКСКЛЮЗИВ:")
+        self.io.text("  • Раздельная система сохранений")
+        self.io.text("  • Автосохранения после каждой главы")
+        self.io.text("  • Персональная статистика для каждого игрока")
+        self.io.text("  • Новые цели для взлома высокого уровня")
+        self.io.text("  • Улучшенный магазин с божественными предметами")
+        self.io.text("  • Динамические случайные события")
+        self.io.text("  • Прокачка до 100 уровня!")
+        self.io.text()
+        await self.io.pause("Нажмите Enter для возврата...")
+        
+    async def game_complete(self):
         self.clear_screen()
-        print("🎊 ПОЗДРАВЛЯЕМ!")
-        print("="*30)
-        print()
-        print("🏁 ВЫ ЗАВЕРШИЛИ СЮЖЕТНЫЙ РЕЖИМ TERMINAL SHADOWS!")
-        print()
-        print("📊 ВАШИ РЕЗУЛЬТАТЫ:")
-        print(f"  👤 Имя: {self.player.name}")
-        print(f"  🎯 Финальный уровень: {self.player.level}")
-        print(f"  💰 Накоплено BTC: {self.player.bitcoins}")
-        print(f"  🏆 Достижений: {len(self.player.achievements)}/10")
-        print(f"  📖 Пройдено глав: 30/30")
-        print()
+        self.io.text("🎊 ПОЗДРАВЛЯЕМ!")
+        self.io.text("="*30)
+        self.io.text()
+        self.io.text("🏁 ВЫ ЗАВЕРШИЛИ СЮЖЕТНЫЙ РЕЖИМ TERMINAL SHADOWS!")
+        self.io.text()
+        self.io.text("📊 ВАШИ РЕЗУЛЬТАТЫ:")
+        self.io.text(f"  👤 Имя: {self.player.name}")
+        self.io.text(f"  🎯 Финальный уровень: {self.player.level}")
+        self.io.text(f"  💰 Накоплено BTC: {self.player.bitcoins}")
+        self.io.text(f"  🏆 Достижений: {len(self.player.achievements)}/10")
+        self.io.text(f"  📖 Пройдено глав: 30/30")
+        self.io.text()
         
         stats = self.player.personal_stats
-        print("📈 ВАША ФИНАЛЬНАЯ СТАТИСТИКА:")
-        print(f"  🕐 Всего времени в игре: {int(stats['play_time'] // 60)} минут")
-        print(f"  💰 Всего заработано BTC: {stats['total_bitcoins_earned']}")
-        print(f"  🌐 Выполнено взломов: {stats['hacks_completed']}")
-        print(f"  🎒 Собрано предметов: {stats['items_collected']}")
-        print()
-        
-        print("🌟 Спасибо за игру!")
-        print("Теперь доступен СВОБОДНЫЙ РЕЖИМ с полным функционалом!")
-        print()
-        input("Нажмите Enter чтобы продолжить...")
-        self.sandbox_loop()
-            
-    def exit_game(self):
-        play_time = time.time() - self.start_time
+        self.io.text("📈 ВАША ФИНАЛЬНАЯ СТАТИСТИКА:")
+        self.io.text(f"  🕐 Всего времени в игре: {int(stats['play_time'] // 60)} минут")
+        self.io.text(f"  💰 Всего заработано BTC: {stats['total_bitcoins_earned']}")
+        self.io.text(f"  🌐 Выполнено взломов: {stats['hacks_completed']}")
+        self.io.text(f"  🎒 Собрано предметов: {stats['items_collected']}")
+        self.io.text()
+        
+        self.io.text("🌟 Спасибо за игру!")
+        self.io.text("Теперь доступен СВОБОДНЫЙ РЕЖИМ с полным функционалом!")
+        self.io.text()
+        await self.io.pause("Нажмите Enter чтобы продолжить...")
+        await self.sandbox_loop()
+            
+    async def exit_game(self):
+        play_time = self.clock.time() - self.start_time
         if self.player:
             self.player.update_play_time(play_time)
             if self.data.config.get("autosave", True) and self.game_mode:
-                self.data.save_game(self.player.__dict__, 0, self.game_mode)
+                await self.data_call(self.data.autosave, self.player.__dict__, self.game_mode, compact=True)
+        await self.data_call(self.data.close)
         
         self.clear_screen()
-        print(Fore.CYAN + Style.BRIGHT + "="*60)
-        print(Fore.GREEN + "👋 До новых встреч в цифровом подполье!")
-        print(Fore.YELLOW + Style.BRIGHT + "TERMINAL SHADOWS: DIGITAL GHOST v4.0 - ULTIMATE EDITION")
+        self.io.text(Fore.CYAN + Style.BRIGHT + "="*60)
+        self.io.text(Fore.GREEN + "👋 До новых встреч в цифровом подполье!")
+        self.io.text(Fore.YELLOW + Style.BRIGHT + "TERMINAL SHADOWS: DIGITAL GHOST v4.0 - ULTIMATE EDITION")
         if self.player:
             total_minutes = int(self.player.personal_stats['play_time'] // 60)
-            print(Fore.MAGENTA + f"🕐 Всего сыграно: {total_minutes} минут")
-            print(Fore.CYAN + f"🎯 Уровень: {self.player.level}")
-            print(Fore.YELLOW + f"💰 BTC: {self.player.bitcoins:,}")
-            print(Fore.GREEN + f"🏆 Достижений: {len(self.player.achievements)}/20")
-        print(Fore.CYAN + Style.BRIGHT + "="*60)
-        print(Fore.WHITE + "\n'В коде мы находим свободу. В тенях мы становимся светом.'")
-        print(Style.RESET_ALL)
-        time.sleep(3)
+            self.io.text(Fore.MAGENTA + f"🕐 Всего сыграно: {total_minutes} минут")
+            self.io.text(Fore.CYAN + f"🎯 Уровень: {self.player.level}")
+            self.io.text(Fore.YELLOW + f"💰 BTC: {self.player.bitcoins:,}")
+            self.io.text(Fore.GREEN + f"🏆 Достижений: {len(self.player.achievements)}/20")
+        self.io.text(Fore.CYAN + Style.BRIGHT + "="*60)
+        self.io.text(Fore.WHITE + "\n'В коде мы находим свободу. В тенях мы становимся светом.'")
+        self.io.text(Style.RESET_ALL)
+        await self.clock.sleep(3)
         sys.exit(0)
 
+def profile_startup(output="-", budget=None):
+    with profiler.phase("GameEngine.__init__"):
+        game = GameEngine()
+    # Бандл открывается (и при первом запуске собирается) в своей фазе story_bundle,
+    # со своим бюджетом - разовая сборка не попадает в chapter:1
+    chapters.open_bundle()
+    # Фазы глав замеряют загрузку и компиляцию, а не поиск в уже заполненном кэше
+    for i in range(1, len(chapters) + 1):
+        with profiler.phase(f"chapter:{chapters.numbers[i - 1]}"):
+            chapters.build(i)
+    game.data.save_config()
+    return startup_profiler.finish(profiler, output, budget)
+
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="TERMINAL SHADOWS: DIGITAL GHOST")
+    parser.add_argument("--profile-startup", action="store_true", help="замерить фазы запуска и вывести JSON")
+    parser.add_argument("--profile-output", default="-", help="файл для JSON отчета (по умолчанию stdout)")
+    parser.add_argument("--profile-budget", help="JSON с бюджетом времени/памяти по фазам")
+    parser.add_argument("--clock", default="real", help="паузы в игре: real, virtual или множитель (0.1 - в 10 раз быстрее)")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        sys.exit(profile_startup(args.profile_output, args.profile_budget))
+
+    # asyncio нужен только для запуска цикла: при импорте main он не грузится
+    import asyncio
+
     try:
-        game = GameEngine()
-        game.show_main_menu()
+        game = GameEngine(make_clock(args.clock))
+        asyncio.run(game.show_main_menu())
     except KeyboardInterrupt:
         print("\n👋 Выход...")
-        game.exit_game()
+        asyncio.run(game.exit_game())
     except Exception as e:
         print(f"\n❌ Критическая ошибка: {e}")
         import traceback
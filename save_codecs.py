@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import json
+import time
+import pickle
+import struct
+
+SAVE_MAGIC = b'TSSV'
+SAVE_FORMAT_VERSION = 2
+
+# Заголовок сохранения: сигнатура, версия формата, id кодека
+HEADER = struct.Struct('<4sBB')
+# С версии 2 за заголовком идёт сводка фиксированного размера для меню слотов:
+# имя, уровень, глава, время сохранения, режим
+SUMMARY = struct.Struct('<64sII32s16s')
+
+
+class SaveCodec:
+    name = ""
+    codec_id = 0
+
+    def encode(self, save_data):
+        raise NotImplementedError
+
+    def decode(self, data):
+        raise NotImplementedError
+
+
+class PickleCodec(SaveCodec):
+    name = "pickle"
+    codec_id = 1
+
+    def encode(self, save_data):
+        return pickle.dumps(save_data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+
+class JsonCodec(SaveCodec):
+    name = "json"
+    codec_id = 2
+
+    def encode(self, save_data):
+        return json.dumps(save_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def decode(self, data):
+        return json.loads(data.decode('utf-8'))
+
+
+CODECS = {codec.name: codec for codec in (PickleCodec(), JsonCodec())}
+CODECS_BY_ID = {codec.codec_id: codec for codec in CODECS.values()}
+# json не зависит от версии Python и при загрузке не выполняет код, в отличие от pickle;
+# pickle остаётся в настройках как более быстрый вариант (scripts/bench_save_codecs.py)
+DEFAULT_CODEC = "json"
+
+
+def upgrade_legacy(save_data):
+    # Версия 0: «голый» pickle без заголовка, как писали версии до 4.0
+    save_data.setdefault('version', '4.0')
+    save_data.setdefault('game_mode', 'story')
+    save_data.setdefault('timestamp', '')
+    return save_data
+
+
+def add_summary(save_data):
+    # Версия 2 отличается только сводкой в заголовке, данные не меняются
+    return save_data
+
+# MIGRATIONS[n] переводит данные формата n в формат n + 1
+MIGRATIONS = {
+    0: upgrade_legacy,
+    1: add_summary
+}
+
+
+def get_codec(name):
+    return CODECS.get(name) or CODECS[DEFAULT_CODEC]
+
+
+def pack_text(text, size):
+    raw = str(text).encode('utf-8')[:size]
+    return raw.decode('utf-8', 'ignore').encode('utf-8')
+
+
+def make_summary(save_data):
+    player = save_data.get('player', {})
+    return {
+        'name': player.get('name', ''),
+        'level': player.get('level', 1),
+        'story_progress': player.get('story_progress', 1),
+        'timestamp': save_data.get('timestamp', ''),
+        'game_mode': save_data.get('game_mode', '')
+    }
+
+
+def pack_summary(save_data):
+    summary = make_summary(save_data)
+    return SUMMARY.pack(
+        pack_text(summary['name'], 64),
+        max(0, min(0xffffffff, int(summary['level']))),
+        max(0, min(0xffffffff, int(summary['story_progress']))),
+        pack_text(summary['timestamp'], 32),
+        pack_text(summary['game_mode'], 16)
+    )
+
+
+def unpack_summary(data, offset=HEADER.size):
+    name, level, story_progress, timestamp, game_mode = SUMMARY.unpack_from(data, offset)
+    return {
+        'name': name.rstrip(b'\0').decode('utf-8', 'ignore'),
+        'level': level,
+        'story_progress': story_progress,
+        'timestamp': timestamp.rstrip(b'\0').decode('utf-8', 'ignore'),
+        'game_mode': game_mode.rstrip(b'\0').decode('utf-8', 'ignore')
+    }
+
+
+def encode(save_data, codec_name=DEFAULT_CODEC):
+    codec = get_codec(codec_name)
+    header = HEADER.pack(SAVE_MAGIC, SAVE_FORMAT_VERSION, codec.codec_id)
+    return header + pack_summary(save_data) + codec.encode(save_data)
+
+
+def decode(data):
+    if data[:len(SAVE_MAGIC)] == SAVE_MAGIC:
+        magic, version, codec_id = HEADER.unpack_from(data, 0)
+        if version > SAVE_FORMAT_VERSION:
+            raise ValueError(f"save format {version} is newer than supported {SAVE_FORMAT_VERSION}")
+        if codec_id not in CODECS_BY_ID:
+            raise ValueError(f"unknown save codec {codec_id}")
+        offset = HEADER.size + (SUMMARY.size if version >= 2 else 0)
+        save_data = CODECS_BY_ID[codec_id].decode(data[offset:])
+    else:
+        version = 0
+        save_data = pickle.loads(data)
+
+    while version < SAVE_FORMAT_VERSION:
+        save_data = MIGRATIONS[version](save_data)
+        version += 1
+    return save_data
+
+
+def read_summary(path):
+    # Одно короткое чтение заголовка; старые форматы декодируются целиком
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size + SUMMARY.size)
+        if head[:len(SAVE_MAGIC)] == SAVE_MAGIC and len(head) == HEADER.size + SUMMARY.size:
+            magic, version, codec_id = HEADER.unpack_from(head, 0)
+            if version >= 2:
+                return unpack_summary(head)
+        f.seek(0)
+        return make_summary(decode(f.read()))
+
+
+def benchmark(save_data, rounds=200):
+    results = []
+    for name, codec in CODECS.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            data = encode(save_data, name)
+        encode_time = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            decoded = decode(data)
+        decode_time = (time.perf_counter() - start) / rounds
+
+        results.append({
+            "codec": name,
+            "size": len(data),
+            "encode_ms": round(encode_time * 1000, 4),
+            "decode_ms": round(decode_time * 1000, 4),
+            "roundtrip": decoded == save_data
+        })
+    return results
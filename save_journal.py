@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+import os
+import copy
+import time
+import zlib
+import struct
+import threading
+from contextlib import nullcontext
+
+import save_codecs
+from autosave import write_atomic
+from save_store import file_lock
+
+# Запись журнала: длина и crc32 полезной нагрузки, затем сама запись в json-кодеке.
+# Оборванная при падении запись в хвосте отбрасывается при чтении.
+FRAME = struct.Struct('<II')
+CODEC = save_codecs.CODECS["json"]
+
+
+def diff_state(base, state):
+    changes = {}
+    appended = {}
+    updated = {}
+    for key, value in state.items():
+        if key in base and base[key] == value:
+            continue
+        old = base.get(key)
+        if isinstance(value, list) and isinstance(old, list) and len(value) >= len(old) and value[:len(old)] == old:
+            appended[key] = copy.deepcopy(value[len(old):])
+        elif isinstance(value, dict) and isinstance(old, dict) and all(k in value for k in old):
+            updated[key] = {k: copy.deepcopy(v) for k, v in value.items() if k not in old or old[k] != v}
+        else:
+            changes[key] = copy.deepcopy(value)
+    if not (changes or appended or updated):
+        return None
+    return {"set": changes, "append": appended, "update": updated}
+
+
+def apply_diff(state, diff):
+    for key, value in diff.get("set", {}).items():
+        state[key] = copy.deepcopy(value)
+    for key, items in diff.get("append", {}).items():
+        state.setdefault(key, []).extend(copy.deepcopy(items))
+    for key, values in diff.get("update", {}).items():
+        state.setdefault(key, {}).update(copy.deepcopy(values))
+    return state
+
+
+def summary_of(state):
+    return {
+        "name": state.get("name", ""),
+        "level": state.get("level", 1),
+        "story_progress": state.get("story_progress", 1)
+    }
+
+
+class SaveJournal:
+    def __init__(self, path, fsync="interval", fsync_interval=5.0, lock_path=None):
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.last_fsync = 0.0
+        self.lock = threading.Lock()
+        # Блокировка папки игрока (.lock, как у FileSaveStore): журнал одного игрока
+        # могут дописывать и сворачивать несколько сессий и процессов
+        self.lock_path = lock_path
+        self.file = None
+        self.base = None
+        with self.player_lock():
+            records, valid_size = self.scan()
+            if os.path.exists(self.path) and os.path.getsize(self.path) > valid_size:
+                # Обрезаем оборванный хвост, иначе новые записи окажутся за мусором
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid_size)
+        self.count = len(records)
+        self.last_seq = records[-1]["seq"] if records else 0
+
+    def player_lock(self, exclusive=True):
+        return file_lock(self.lock_path, exclusive) if self.lock_path else nullcontext()
+
+    def records(self):
+        with self.player_lock(exclusive=False):
+            return self.scan()[0]
+
+    def scan(self):
+        if not os.path.exists(self.path):
+            return [], 0
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        records = []
+        pos = 0
+        while pos + FRAME.size <= len(data):
+            length, crc = FRAME.unpack_from(data, pos)
+            payload = data[pos + FRAME.size:pos + FRAME.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            try:
+                records.append(CODEC.decode(payload))
+            except Exception:
+                break
+            pos += FRAME.size + length
+        return records, pos
+
+    def next_seq(self):
+        # Номер растёт и между запусками: снимок помнит последний применённый номер
+        self.last_seq = max(self.last_seq + 1, time.time_ns())
+        return self.last_seq
+
+    def append(self, record):
+        with self.lock:
+            record["seq"] = self.next_seq()
+            record["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            payload = CODEC.encode(record)
+            with self.player_lock():
+                self.reopen_if_replaced()
+                self.file.write(FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+                self.file.flush()
+                if self.should_fsync():
+                    os.fsync(self.file.fileno())
+            self.count += 1
+            return record["seq"]
+
+    def reopen_if_replaced(self):
+        # Другая сессия могла свернуть журнал (os.replace) или удалить его:
+        # запись в старый дескриптор ушла бы в уже отвязанный файл
+        if self.file is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self.file.fileno()).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self.file.close()
+        self.file = open(self.path, 'ab')
+
+    def should_fsync(self):
+        if self.fsync == "always":
+            return True
+        if self.fsync == "never":
+            return False
+        now = time.monotonic()
+        if now - self.last_fsync >= self.fsync_interval:
+            self.last_fsync = now
+            return True
+        return False
+
+    def attach(self, state):
+        # Новая игра или загрузка слота: журнал начинается с полного состояния игрока
+        self.base = copy.deepcopy(state)
+        return self.append({"kind": "base", "player": self.base, "summary": summary_of(state)})
+
+    def record(self, source, state):
+        if self.base is None:
+            return self.attach(state)
+        diff = diff_state(self.base, state)
+        if diff is None:
+            return None
+        apply_diff(self.base, diff)
+        diff.update({"kind": "diff", "source": source, "summary": summary_of(state)})
+        return self.append(diff)
+
+    def truncate_upto(self, seq):
+        # Вызывается после записи снимка: всё до seq включительно уже в снимке
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+            # Под блокировкой игрока: записи, дописанные другими сессиями после seq, не теряются
+            with self.player_lock():
+                keep = [r for r in self.scan()[0] if r["seq"] > seq]
+                if keep:
+                    data = b''
+                    for record in keep:
+                        payload = CODEC.encode(record)
+                        data += FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+                    write_atomic(self.path, data, self.fsync != "never")
+                elif os.path.exists(self.path):
+                    os.remove(self.path)
+            self.count = len(keep)
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+
+def replay(save_data, records):
+    snapshot_seq = save_data.get("journal_seq", 0)
+    player = save_data.get("player", {})
+    for record in records:
+        if record["seq"] <= snapshot_seq:
+            continue
+        if record.get("kind") == "base":
+            player = copy.deepcopy(record["player"])
+        else:
+            apply_diff(player, record)
+        save_data["timestamp"] = record.get("time", save_data.get("timestamp", ""))
+        save_data["journal_seq"] = record["seq"]
+    save_data["player"] = player
+    return save_data
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import zlib
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import save_codecs
+from autosave import write_atomic
+
+SAVE_FILE = re.compile(r'(?:autosave|save(\d+))_(\w+)\.dat$')
+JOURNAL_FILE = re.compile(r'autosave_\w+\.journal$')
+MANIFEST_FILE = re.compile(r'\w+_\d+\.json$')
+
+
+def player_hash(owner):
+    return hashlib.sha1(owner.encode('utf-8')).hexdigest()
+
+
+def shard_dir(root, owner):
+    # Два уровня по 256 папок: в каждой директории остаётся немного записей
+    # при любом числе игроков
+    digest = player_hash(owner)
+    return os.path.join(root, digest[:2], digest[2:4], digest)
+
+
+@contextmanager
+def file_lock(path, exclusive=True):
+    # Рекомендательная блокировка fcntl: две сессии одного игрока не пишут
+    # и не читают сохранения одновременно
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def migrate_flat_files(root, target, pattern):
+    # Переносит файлы старой плоской раскладки из root в папку игрока одним проходом
+    moved = 0
+    names = [f for f in os.listdir(root) if pattern.match(f)]
+    if not names:
+        return 0
+    os.makedirs(target, exist_ok=True)
+    with file_lock(os.path.join(root, ".migrate.lock")):
+        for f in names:
+            src = os.path.join(root, f)
+            dst = os.path.join(target, f)
+            if os.path.exists(src) and not os.path.exists(dst):
+                os.replace(src, dst)
+                moved += 1
+    return moved
+
+
+def migrate_flat_saves(save_dir, owner):
+    return migrate_flat_files(save_dir, shard_dir(save_dir, owner), re.compile(f"{SAVE_FILE.pattern}|{JOURNAL_FILE.pattern}"))
+
+
+class FileSaveStore:
+    # Раскладка по игрокам: saves/<ab>/<cd>/<хэш игрока>/autosave_<режим>.dat и save<N>_<режим>.dat
+    name = "files"
+    unlimited = False
+
+    def __init__(self, root, owner=""):
+        self.root = root
+        self.owner = owner
+        self.save_dir = shard_dir(root, owner)
+        self.lock_path = os.path.join(self.save_dir, ".lock")
+        os.makedirs(self.save_dir, exist_ok=True)
+
+    def path(self, slot, game_mode):
+        if slot == 0:
+            return os.path.join(self.save_dir, f"autosave_{game_mode}.dat")
+        return os.path.join(self.save_dir, f"save{slot}_{game_mode}.dat")
+
+    def write(self, slot, game_mode, save_data, codec_name, fsync=True):
+        self.write_batch([(slot, game_mode, save_data, codec_name)], fsync)
+
+    def write_batch(self, items, fsync=True):
+        encoded = [(self.path(slot, game_mode), save_codecs.encode(save_data, codec_name))
+                   for slot, game_mode, save_data, codec_name in items]
+        with file_lock(self.lock_path):
+            for path, data in encoded:
+                write_atomic(path, data, fsync)
+
+    def read(self, slot, game_mode):
+        path = self.path(slot, game_mode)
+        with file_lock(self.lock_path, exclusive=False):
+            if not os.path.exists(path):
+                return None
+            with open(path, 'rb') as f:
+                data = f.read()
+        return save_codecs.decode(data)
+
+    def exists(self, slot, game_mode):
+        return os.path.exists(self.path(slot, game_mode))
+
+    def summary(self, slot, game_mode):
+        path = self.path(slot, game_mode)
+        with file_lock(self.lock_path, exclusive=False):
+            if not os.path.exists(path):
+                return None
+            return save_codecs.read_summary(path)
+
+    def slots(self, game_mode):
+        return [slot for slot in range(0, 4) if self.exists(slot, game_mode)]
+
+    def delete(self, slot, game_mode):
+        path = self.path(slot, game_mode)
+        with file_lock(self.lock_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def delete_all(self):
+        with file_lock(self.lock_path):
+            for f in os.listdir(self.save_dir):
+                if SAVE_FILE.match(f):
+                    os.remove(os.path.join(self.save_dir, f))
+
+    def recent(self, limit=10, game_mode=None, player=None):
+        found = []
+        for f in os.listdir(self.save_dir):
+            m = SAVE_FILE.match(f)
+            if not m or (game_mode and m.group(2) != game_mode):
+                continue
+            slot = int(m.group(1) or 0)
+            try:
+                summary = self.summary(slot, m.group(2))
+            except Exception:
+                continue
+            if player and summary['name'] != player:
+                continue
+            summary.update({'slot': slot, 'game_mode': m.group(2)})
+            found.append(summary)
+        found.sort(key=lambda s: s['timestamp'], reverse=True)
+        return found[:limit]
+
+    def close(self):
+        pass
+
+
+class SqliteSaveStore:
+    # Одна база на всю папку данных: сколько угодно слотов на владельца и режим,
+    # индексы по имени игрока, режиму и времени сохранения
+    name = "sqlite"
+    unlimited = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS saves (
+            owner TEXT NOT NULL,
+            game_mode TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            story_progress INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (owner, game_mode, slot)
+        );
+        CREATE INDEX IF NOT EXISTS saves_player ON saves (player_name);
+        CREATE INDEX IF NOT EXISTS saves_mode ON saves (game_mode, timestamp);
+        CREATE INDEX IF NOT EXISTS saves_timestamp ON saves (timestamp);
+    """
+
+    def __init__(self, db_path, owner="", migrate=False):
+        self.db_path = db_path
+        self.owner = owner
+        self.lock = threading.Lock()
+        # sqlite3 грузится только для бэкенда sqlite
+        import sqlite3
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        if owner and migrate:
+            # Сохранения, сделанные до появления владельцев, были только у локального игрока
+            self.conn.execute("UPDATE OR IGNORE saves SET owner = ? WHERE owner = ''", (owner,))
+        self.conn.commit()
+
+    def write(self, slot, game_mode, save_data, codec_name, fsync=True):
+        self.write_batch([(slot, game_mode, save_data, codec_name)], fsync)
+
+    def write_batch(self, items, fsync=True):
+        rows = []
+        for slot, game_mode, save_data, codec_name in items:
+            summary = save_codecs.make_summary(save_data)
+            rows.append((self.owner, game_mode, slot, summary['name'], summary['level'], summary['story_progress'],
+                         summary['timestamp'], save_codecs.encode(save_data, codec_name)))
+        with self.lock:
+            self.conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'OFF'}")
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO saves (owner, game_mode, slot, player_name, level, story_progress, timestamp, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+
+    def query(self, sql, args=()):
+        with self.lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    def read(self, slot, game_mode):
+        rows = self.query("SELECT data FROM saves WHERE owner = ? AND game_mode = ? AND slot = ?", (self.owner, game_mode, slot))
+        return save_codecs.decode(bytes(rows[0][0])) if rows else None
+
+    def exists(self, slot, game_mode):
+        return bool(self.query("SELECT 1 FROM saves WHERE owner = ? AND game_mode = ? AND slot = ?", (self.owner, game_mode, slot)))
+
+    def summary_row(self, row):
+        slot, game_mode, name, level, story_progress, timestamp = row
+        return {
+            'slot': slot,
+            'game_mode': game_mode,
+            'name': name,
+            'level': level,
+            'story_progress': story_progress,
+            'timestamp': timestamp
+        }
+
+    def summary(self, slot, game_mode):
+        rows = self.query(
+            "SELECT slot, game_mode, player_name, level, story_progress, timestamp FROM saves "
+            "WHERE owner = ? AND game_mode = ? AND slot = ?", (self.owner, game_mode, slot)
+        )
+        return self.summary_row(rows[0]) if rows else None
+
+    def slots(self, game_mode):
+        rows = self.query("SELECT slot FROM saves WHERE owner = ? AND game_mode = ? ORDER BY slot", (self.owner, game_mode))
+        return [row[0] for row in rows]
+
+    def delete(self, slot, game_mode):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM saves WHERE owner = ? AND game_mode = ? AND slot = ?", (self.owner, game_mode, slot))
+
+    def delete_all(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM saves WHERE owner = ?", (self.owner,))
+
+    def recent(self, limit=10, game_mode=None, player=None):
+        sql = "SELECT slot, game_mode, player_name, level, story_progress, timestamp FROM saves WHERE owner = ?"
+        args = [self.owner]
+        if game_mode:
+            sql += " AND game_mode = ?"
+            args.append(game_mode)
+        if player:
+            sql += " AND player_name = ?"
+            args.append(player)
+        sql += " ORDER BY timestamp DESC LIMIT ?"
+        args.append(limit)
+        return [self.summary_row(row) for row in self.query(sql, args)]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# Части игрока, которые хранятся отдельными чанками; всё остальное - чанк "core"
+CHUNK_FIELDS = {
+    "inventory": ("inventory", "crafted_items"),
+    "stats": ("personal_stats",),
+    "achievements": ("achievements", "completed_missions")
+}
+MANIFEST_VERSION = 1
+
+
+def split_player(player):
+    chunks = {name: {} for name in CHUNK_FIELDS}
+    core = {}
+    owners = {field: name for name, fields in CHUNK_FIELDS.items() for field in fields}
+    for key, value in player.items():
+        if key in owners:
+            chunks[owners[key]][key] = value
+        else:
+            core[key] = value
+    chunks["core"] = core
+    return chunks
+
+
+def retain(refs, digests):
+    for digest in digests:
+        refs[digest] = refs.get(digest, 0) + 1
+
+
+class ChunkSaveStore:
+    # Сохранение = манифест со ссылками на чанки. Чанки адресуются sha256 содержимого,
+    # сжаты zlib и пишутся один раз, сколько бы слотов, режимов и игроков их ни делили.
+    # Общего индекса счётчиков нет: манифесты лежат по папкам игроков, а gc() заново
+    # считает ссылки по всем манифестам и удаляет чанки, на которые никто не ссылается.
+    # Запись берёт блокировку своего игрока и разделяемую gc_lock, сборка мусора -
+    # исключительную gc_lock: сохранения разных игроков друг друга не ждут.
+    # Пересчёт проходит по всем сохранениям, поэтому игра его не запускает: это
+    # обслуживание, scripts/gc_save_chunks.py (по cron или вручную)
+    name = "chunks"
+    unlimited = True
+
+    def __init__(self, root, owner="", migrate=False):
+        self.root = root
+        self.owner = owner
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifests_root = os.path.join(root, "manifests")
+        self.gc_lock_path = os.path.join(root, ".gc.lock")
+        self.lock = threading.RLock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        if owner is None:
+            # Хранилище только для сборки мусора: своей папки манифестов нет
+            self.manifests_dir = None
+            return
+        self.manifests_dir = shard_dir(self.manifests_root, owner)
+        self.lock_path = os.path.join(self.manifests_dir, ".lock")
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        if migrate:
+            # Плоские манифесты в корне были только у локального игрока
+            migrate_flat_files(self.manifests_root, self.manifests_dir, MANIFEST_FILE)
+
+    @classmethod
+    def collector(cls, root):
+        # Для scripts/gc_save_chunks.py: без владельца и без переноса плоских манифестов,
+        # иначе чужие манифесты из корня уехали бы в папку пустого владельца
+        return cls(root, owner=None)
+
+    @contextmanager
+    def locked(self):
+        with self.lock, file_lock(self.gc_lock_path, exclusive=False), file_lock(self.lock_path):
+            yield
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def manifest_path(self, slot, game_mode):
+        return os.path.join(self.manifests_dir, f"{game_mode}_{slot}.json")
+
+    def put_chunk(self, value, codec, fsync):
+        payload = bytes([codec.codec_id]) + codec.encode(value)
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, zlib.compress(payload), fsync)
+        return digest
+
+    def get_chunk(self, digest):
+        with open(self.object_path(digest), 'rb') as f:
+            payload = zlib.decompress(f.read())
+        return save_codecs.CODECS_BY_ID[payload[0]].decode(payload[1:])
+
+    def read_manifest(self, slot, game_mode):
+        path = self.manifest_path(slot, game_mode)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write(self, slot, game_mode, save_data, codec_name, fsync=True):
+        self.write_batch([(slot, game_mode, save_data, codec_name)], fsync)
+
+    def write_batch(self, items, fsync=True):
+        with self.locked():
+            # Порядок записи: чанки, затем манифесты. При падении посередине остаются
+            # только лишние чанки - их уберёт scripts/gc_save_chunks.py
+            for slot, game_mode, save_data, codec_name in items:
+                codec = save_codecs.get_codec(codec_name)
+                chunks = split_player(save_data.get('player', {}))
+                manifest = {
+                    "version": MANIFEST_VERSION,
+                    "meta": {key: value for key, value in save_data.items() if key != 'player'},
+                    "summary": save_codecs.make_summary(save_data),
+                    "chunks": {name: self.put_chunk(value, codec, fsync) for name, value in chunks.items()}
+                }
+                data = json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                write_atomic(self.manifest_path(slot, game_mode), data, fsync)
+
+    def count_refs(self):
+        # Чанки общие для всех игроков, поэтому считаем по манифестам всех папок
+        refs = {}
+        for dirpath, dirnames, filenames in os.walk(self.manifests_root):
+            for f in filenames:
+                if not MANIFEST_FILE.match(f):
+                    continue
+                try:
+                    with open(os.path.join(dirpath, f), 'r', encoding='utf-8') as m:
+                        retain(refs, json.load(m)["chunks"].values())
+                except Exception:
+                    continue
+        return refs
+
+    def gc(self):
+        # Пересчёт ссылок по манифестам и удаление всего, на что никто не ссылается.
+        # Исключительная gc_lock ждёт идущие записи и не пускает новые до конца прохода
+        with self.lock, file_lock(self.gc_lock_path):
+            refs = self.count_refs()
+            dead = []
+            for prefix in os.listdir(self.objects_dir):
+                for name in os.listdir(os.path.join(self.objects_dir, prefix)):
+                    if prefix + name not in refs:
+                        dead.append(prefix + name)
+            for digest in dead:
+                try:
+                    os.remove(self.object_path(digest))
+                except OSError:
+                    pass
+            # Индекс счётчиков от прежних версий хранилища больше не читается
+            try:
+                os.remove(os.path.join(self.root, "index"))
+            except OSError:
+                pass
+            return len(dead), len(refs)
+
+    def read(self, slot, game_mode):
+        manifest = self.read_manifest(slot, game_mode)
+        if manifest is None:
+            return None
+        player = {}
+        for digest in manifest["chunks"].values():
+            player.update(self.get_chunk(digest))
+        save_data = dict(manifest["meta"])
+        save_data['player'] = player
+        return save_data
+
+    def exists(self, slot, game_mode):
+        return os.path.exists(self.manifest_path(slot, game_mode))
+
+    def summary(self, slot, game_mode):
+        manifest = self.read_manifest(slot, game_mode)
+        return dict(manifest["summary"], slot=slot) if manifest else None
+
+    def manifests(self):
+        for f in os.listdir(self.manifests_dir):
+            if MANIFEST_FILE.match(f):
+                game_mode, _, slot = f[:-5].rpartition("_")
+                yield int(slot), game_mode
+
+    def slots(self, game_mode):
+        return sorted(slot for slot, mode in self.manifests() if mode == game_mode)
+
+    def delete(self, slot, game_mode):
+        with self.locked():
+            if self.exists(slot, game_mode):
+                os.remove(self.manifest_path(slot, game_mode))
+
+    def delete_all(self):
+        with self.locked():
+            for slot, game_mode in list(self.manifests()):
+                os.remove(self.manifest_path(slot, game_mode))
+
+    def recent(self, limit=10, game_mode=None, player=None):
+        found = []
+        for slot, mode in self.manifests():
+            if game_mode and mode != game_mode:
+                continue
+            summary = self.summary(slot, mode)
+            if player and summary['name'] != player:
+                continue
+            found.append(summary)
+        found.sort(key=lambda s: s['timestamp'], reverse=True)
+        return found[:limit]
+
+    def close(self):
+        pass
+
+
+BACKENDS = ("files", "sqlite", "chunks")
+
+
+def open_store(backend, data_dir, save_dir, owner="", migrate=False):
+    # migrate - перенос сохранений без владельца; его делает только локальный игрок
+    if backend == "sqlite":
+        return SqliteSaveStore(os.path.join(data_dir, "saves.db"), owner, migrate)
+    if backend == "chunks":
+        return ChunkSaveStore(os.path.join(data_dir, "chunks"), owner, migrate)
+    return FileSaveStore(save_dir, owner)
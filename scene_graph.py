@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+from array import array
+
+# Переходы за пределы главы кодируются отрицательными индексами сцен
+CHAPTER_END = -1
+NEXT_CHAPTER = -2
+GAME_END = -3
+MISSING_SCENE = -4
+
+END_SCENES = {
+    "chapter_end": CHAPTER_END,
+    "next_chapter": NEXT_CHAPTER,
+    "game_end": GAME_END
+}
+END_NAMES = {code: name for name, code in END_SCENES.items()}
+
+
+class StringPool:
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def intern(self, text):
+        sid = self.ids.get(text)
+        if sid is None:
+            sid = len(self.strings)
+            self.strings.append(text)
+            self.ids[text] = sid
+        return sid
+
+    def __getitem__(self, sid):
+        return self.strings[sid]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class EffectPool:
+    def __init__(self):
+        self.effects = []
+        self.ids = {}
+
+    def intern(self, effect):
+        try:
+            key = tuple(sorted(effect.items()))
+            eid = self.ids.get(key)
+        except TypeError:
+            key = None
+            eid = None
+        if eid is None:
+            eid = len(self.effects)
+            self.effects.append(dict(effect))
+            if key is not None:
+                self.ids[key] = eid
+        return eid
+
+    def __getitem__(self, eid):
+        return self.effects[eid]
+
+
+class SceneGraph:
+    __slots__ = (
+        "title", "guide_appearance", "start", "strings", "effects", "ids", "source",
+        "scene_name", "scene_text", "text_length", "choice_start", "choice_end",
+        "choice_text", "choice_next", "choice_effect", "missing"
+    )
+
+    def __init__(self, title, guide_appearance, strings=None, effects=None, source=None):
+        # Пулы свои у каждого графа: выгруженная глава освобождает свои строки
+        self.strings = strings if strings is not None else StringPool()
+        self.effects = effects if effects is not None else EffectPool()
+        self.title = self.strings.intern(title)
+        self.guide_appearance = guide_appearance
+        self.start = MISSING_SCENE
+        # Имя сцены -> индекс
+        self.ids = {}
+        # Сцены бандла: scene_text/text_length - смещение и длина текста в бандле,
+        # текст декодируется только при показе; иначе scene_text - индекс в пуле
+        self.source = source
+        self.scene_name = array('I')
+        self.scene_text = array('Q')
+        self.text_length = array('I')
+        self.choice_start = array('I')
+        self.choice_end = array('I')
+        self.choice_text = array('I')
+        self.choice_next = array('i')
+        self.choice_effect = array('I')
+        # Индекс выбора -> имя несуществующей сцены, для сообщения об ошибке
+        self.missing = {}
+
+    def __len__(self):
+        return len(self.scene_name)
+
+    def scene_id(self, name):
+        if name in END_SCENES:
+            return END_SCENES[name]
+        return self.ids.get(name, MISSING_SCENE)
+
+    def name(self, sid):
+        if sid < 0:
+            return END_NAMES.get(sid, "")
+        return self.strings[self.scene_name[sid]]
+
+    def text(self, sid):
+        if self.source is None:
+            return self.strings[self.scene_text[sid]]
+        return self.source.text(self.scene_text[sid], self.text_length[sid])
+
+    def choices(self, sid):
+        return range(self.choice_start[sid], self.choice_end[sid])
+
+    def choice_label(self, cid):
+        return self.strings[self.choice_text[cid]]
+
+    def effect(self, cid):
+        return self.effects[self.choice_effect[cid]]
+
+
+def compile_chapter(chapter, strings=None, effects=None):
+    scenes = chapter["scenes"]
+    # Сцены из бандла отдают JSON без текста: текст остаётся в бандле
+    source = scenes if hasattr(scenes, "raw") else None
+    graph = SceneGraph(chapter.get("title", ""), bool(chapter.get("guide_appearance", False)), strings, effects, source)
+    strings, effects = graph.strings, graph.effects
+    names = list(scenes)
+    ids = graph.ids
+    ids.update((name, sid) for sid, name in enumerate(names))
+
+    for name in names:
+        graph.scene_name.append(strings.intern(name))
+        if source is None:
+            scene = scenes[name]
+            graph.scene_text.append(strings.intern(scene.get("text", "")))
+            graph.text_length.append(0)
+        else:
+            scene, (offset, length) = source.raw(name)
+            graph.scene_text.append(offset)
+            graph.text_length.append(length)
+        graph.choice_start.append(len(graph.choice_text))
+        for choice in scene.get("choices") or []:
+            nxt = choice.get("next")
+            if nxt in END_SCENES:
+                target = END_SCENES[nxt]
+            elif nxt in ids:
+                target = ids[nxt]
+            else:
+                target = MISSING_SCENE
+                graph.missing[len(graph.choice_text)] = nxt
+            graph.choice_text.append(strings.intern(choice.get("text", "")))
+            graph.choice_next.append(target)
+            graph.choice_effect.append(effects.intern(choice.get("effect", {})))
+        graph.choice_end.append(len(graph.choice_text))
+
+    graph.start = ids.get("start", MISSING_SCENE)
+    return graph
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from main import Player
+import save_codecs
+
+ITEMS = [
+    "🔑 Ключ шифрования", "💾 Эксплойт", "🛡️ Файрвол", "📡 Сниффер", "⚡ Ускоритель",
+    "🔍 Продвинутый сканер", "🛡️  Анонимайзер", "💻 Компилятор эксплойтов", "🧠 Нейроинтерфейс",
+    "⚡ Квантовый дешифратор", "🔧 Продвинутый эксплойт", "🧠 Нейросеть", "🌀 Портальный ключ"
+]
+
+
+def late_game_player(inventory_size, missions):
+    rng = random.Random(42)
+    player = Player("Neo")
+    player.level = 87
+    player.exp = 61234
+    player.bitcoins = 48213377
+    player.story_progress = 41
+    player.reputation = 12500
+    for skill in player.skills:
+        player.skills[skill] = rng.randint(40, 120)
+    for faction in player.factions:
+        player.factions[faction] = rng.randint(-800, 1500)
+    player.inventory = [rng.choice(ITEMS) for _ in range(inventory_size)]
+    player.inventory += [f"Данные цели {i}" for i in range(1, 41)]
+    player.completed_missions = [f"mission_{rng.randint(1, 5000)}" for _ in range(missions)]
+    player.achievements = [f"🏆 Достижение {i}" for i in range(20)]
+    player.crafted_items = [rng.choice(ITEMS) for _ in range(300)]
+    player.boss_defeats = 64
+    player.personal_stats["play_time"] = 987654.25
+    return player
+
+
+def main():
+    sizes = [(200, 100), (2000, 1000), (20000, 10000)]
+    for inventory_size, missions in sizes:
+        player = late_game_player(inventory_size, missions)
+        save_data = {
+            'player': player.__dict__,
+            'timestamp': '2026-01-01T00:00:00',
+            'version': '4.0',
+            'game_mode': 'sandbox'
+        }
+        rounds = max(5, 20000 // inventory_size)
+        print(f"\ninventory={inventory_size} completed_missions={missions} rounds={rounds}")
+        print(f"{'codec':<8} {'size':>10} {'encode ms':>11} {'decode ms':>11}  roundtrip")
+        for r in save_codecs.benchmark(save_data, rounds):
+            print(f"{r['codec']:<8} {r['size']:>10} {r['encode_ms']:>11.3f} {r['decode_ms']:>11.3f}  {r['roundtrip']}")
+
+if __name__ == '__main__':
+    main()
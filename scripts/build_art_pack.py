@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import assets
+
+
+def main():
+    art_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'ascii_arts')
+    path = sys.argv[1] if len(sys.argv) > 1 else assets.default_pack_path()
+    count = assets.build_pack(art_dir, path)
+    size = os.path.getsize(path)
+    print(f'Art pack built: {path} ({count} arts, {size} bytes)')
+
+if __name__ == '__main__':
+    main()
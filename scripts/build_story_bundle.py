@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import story_bundle
+
+
+def main():
+    story_dir = os.path.join(os.path.dirname(__file__), '..', 'story')
+    path = sys.argv[1] if len(sys.argv) > 1 else story_bundle.default_bundle_path()
+    count = story_bundle.build_bundle(story_dir, path)
+    size = os.path.getsize(path)
+    print(f'Story bundle built: {path} ({count} chapters, {size} bytes)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import save_store
+
+
+def main():
+    default_root = os.path.join(os.path.expanduser("~/.terminal_shadows_ultimate"), "chunks")
+    root = sys.argv[1] if len(sys.argv) > 1 else default_root
+    if not os.path.isdir(root):
+        print(f'No chunk store at {root}')
+        return
+    store = save_store.ChunkSaveStore.collector(root)
+    removed, live = store.gc()
+    print(f'Chunk store GC: {root} ({removed} chunks removed, {live} live)')
+
+if __name__ == '__main__':
+    main()
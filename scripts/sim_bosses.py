@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ Для симулятора нужен numpy: pip install numpy")
+    sys.exit(1)
+
+import combat
+from sim_hacking import parse_ints
+
+RUNNING, WIN, LOSS, DRAW, FLED = 0, 1, 2, 3, 4
+OUTCOMES = {"win": WIN, "loss": LOSS, "draw": DRAW, "flee": FLED}
+
+# Навыки по умолчанию - как в свободном режиме: 3 на 5 уровне и +1 за уровень
+SKILL_OFFSET = 2
+HP_BINS = 10
+
+
+def auto_skill(level):
+    return max(1, level - SKILL_OFFSET)
+
+
+# Стратегии игрока: по состоянию дорожек (HP, ход) и их параметрам - номер действия
+def policy_attack(lanes, player_hp, boss_hp, turn):
+    return np.full(len(player_hp), combat.ATTACK)
+
+
+def policy_power(lanes, player_hp, boss_hp, turn):
+    return np.full(len(player_hp), combat.POWER)
+
+
+def policy_best(lanes, player_hp, boss_hp, turn):
+    # Атака с большим средним уроном (кулдаун мощной атаки в fight_boss не проверяется)
+    attack = combat.attack_damage(sum(combat.ATTACK_ROLL) / 2, lanes["hacking"])
+    power = combat.power_damage(sum(combat.POWER_ROLL) / 2, lanes["programming"])
+    return np.where(power > attack, combat.POWER, combat.ATTACK)
+
+
+def policy_cautious(lanes, player_hp, boss_hp, turn):
+    # Как best, но бежать, если следующий удар босса может добить
+    action = policy_best(lanes, player_hp, boss_hp, turn)
+    return np.where(player_hp <= lanes["boss_damage"] + combat.BOSS_SPREAD, combat.FLEE, action)
+
+
+POLICIES = {
+    "attack": policy_attack,
+    "power": policy_power,
+    "best": policy_best,
+    "cautious": policy_cautious
+}
+
+
+def build_cells(levels, hacking, programming):
+    # Клетка сетки: босс x уровень x навыки; "auto" - навык по уровню
+    cells = []
+    for b, boss in enumerate(combat.BOSSES):
+        for level in levels:
+            for h in (hacking if hacking is not None else [auto_skill(level)]):
+                for p in (programming if programming is not None else [auto_skill(level)]):
+                    cells.append((b, int(level), int(h), int(p)))
+    return np.array(cells, dtype=np.int64)
+
+
+def simulate(cells, fights, policy, rng):
+    # Одна дорожка - один бой; все бои идут одновременно, шаг цикла - один ход
+    lane_cells = np.repeat(np.arange(len(cells)), fights)
+    boss = cells[lane_cells, 0]
+    lanes = {
+        "level": cells[lane_cells, 1],
+        "hacking": cells[lane_cells, 2],
+        "programming": cells[lane_cells, 3],
+        "boss_damage": np.array([b["damage"] for b in combat.BOSSES])[boss]
+    }
+    player_hp = combat.player_max_hp(lanes["level"])
+    boss_hp = np.array([b["hp"] for b in combat.BOSSES])[boss]
+    turn = np.ones(len(boss), dtype=np.int64)
+    actions = np.zeros(len(boss), dtype=np.int64)
+    outcome = np.full(len(boss), RUNNING, dtype=np.int8)
+
+    running = np.arange(len(boss))
+    while len(running):
+        sub = {key: value[running] for key, value in lanes.items()}
+        php, bhp, t = player_hp[running], boss_hp[running], turn[running]
+        n = len(running)
+        action = POLICIES[policy](sub, php, bhp, t)
+        actions[running] += 1
+
+        fled = action == combat.FLEE
+        defend = action == combat.DEFEND
+        hit = (action == combat.ATTACK) | (action == combat.POWER)
+
+        # Защита: половина урона без разброса, ход засчитывается без проверки лимита
+        php = np.where(defend, php - sub["boss_damage"] // combat.DEFEND_DIVISOR, php)
+
+        damage = np.where(
+            action == combat.ATTACK,
+            combat.attack_damage(rng.integers(combat.ATTACK_ROLL[0], combat.ATTACK_ROLL[1] + 1, n), sub["hacking"]),
+            combat.power_damage(rng.integers(combat.POWER_ROLL[0], combat.POWER_ROLL[1] + 1, n), sub["programming"])
+        )
+        bhp = np.where(hit, bhp - damage, bhp)
+        spread = rng.integers(-combat.BOSS_SPREAD, combat.BOSS_SPREAD + 1, n)
+        php = np.where(hit & (bhp > 0), php - (sub["boss_damage"] + spread), php)
+        t = t + (hit | defend)
+
+        # Порядок как в fight_boss: лимит ходов проверяется раньше условия цикла
+        result = np.full(n, RUNNING, dtype=np.int8)
+        result[fled] = FLED
+        result[(result == RUNNING) & hit & (t > combat.TURN_LIMIT)] = DRAW
+        result[(result == RUNNING) & (php <= 0)] = LOSS
+        result[(result == RUNNING) & (bhp <= 0)] = WIN
+
+        player_hp[running], boss_hp[running], turn[running] = php, bhp, t
+        outcome[running] = result
+        running = running[result == RUNNING]
+
+    return {
+        "outcome": outcome.reshape(len(cells), fights),
+        "turns": actions.reshape(len(cells), fights),
+        "hp_left": player_hp.reshape(len(cells), fights),
+        "max_hp": combat.player_max_hp(cells[:, 1])
+    }
+
+
+def summarize(cells, sim):
+    outcome = sim["outcome"]
+    rates = {name: (outcome == code).mean(axis=1) for name, code in OUTCOMES.items()}
+    won = outcome == WIN
+    hp_left = np.where(won, sim["hp_left"], np.nan)
+    with warnings.catch_warnings():
+        # Клетки без побед дают NaN - это и есть ответ
+        warnings.simplefilter("ignore", RuntimeWarning)
+        percentiles = np.nanpercentile(hp_left, [10, 50, 90], axis=1)
+    share = np.clip(sim["hp_left"] / sim["max_hp"][:, None], 0, 1 - 1e-9)
+    bins = (share * HP_BINS).astype(np.int64)
+    histogram = np.stack([((bins == i) & won).sum(axis=1) for i in range(HP_BINS)], axis=1)
+    return {
+        "rates": rates,
+        "turns": sim["turns"].mean(axis=1),
+        "hp_p10": percentiles[0],
+        "hp_p50": percentiles[1],
+        "hp_p90": percentiles[2],
+        "hp_histogram": histogram
+    }
+
+
+def format_hp(value):
+    return f"{value:>6.0f}" if not np.isnan(value) else f"{'-':>6}"
+
+
+def print_report(cells, summary, policy, gate_win):
+    print(f"\n=== policy={policy} ===")
+    for b, boss in enumerate(combat.BOSSES):
+        rows = np.flatnonzero(cells[:, 0] == b)
+        print(f"\n{boss['name']} (HP {boss['hp']}, урон {boss['damage']}, ворота Ур. {boss['level']})")
+        print(f"  {'lvl':>4} {'hack':>4} {'prog':>4} {'win':>6} {'draw':>6} {'loss':>6} {'flee':>6} {'turns':>6} {'hp10':>6} {'hp50':>6} {'hp90':>6}")
+        for i in rows:
+            level, h, p = cells[i, 1:]
+            gate = " " if level >= boss["level"] else "*"
+            r = summary["rates"]
+            print(f" {gate}{level:>4} {h:>4} {p:>4} {r['win'][i]:>6.1%} {r['draw'][i]:>6.1%} {r['loss'][i]:>6.1%} "
+                  f"{r['flee'][i]:>6.1%} {summary['turns'][i]:>6.1f} "
+                  f"{format_hp(summary['hp_p10'][i])} {format_hp(summary['hp_p50'][i])} {format_hp(summary['hp_p90'][i])}")
+        good = rows[summary["rates"]["win"][rows] >= gate_win]
+        if len(good):
+            print(f"  Минимальный уровень с победой >= {gate_win:.0%}: {cells[good, 1].min()}")
+        else:
+            print(f"  Победы >= {gate_win:.0%} нет ни в одной клетке сетки")
+    print("\n* - уровень ниже ворот босса, в игре бой недоступен")
+
+
+def solve_exact(cells):
+    # Точный расчёт (boss_odds.py) для каждой клетки: шансы при оптимальной стратегии
+    import boss_odds
+    return [boss_odds.cached_odds(int(b), int(h), int(p), int(level)) for b, level, h, p in cells]
+
+
+def print_exact(cells, exact):
+    print("\n=== exact: оптимальная стратегия (boss_odds.py) ===")
+    for b, boss in enumerate(combat.BOSSES):
+        rows = np.flatnonzero(cells[:, 0] == b)
+        print(f"\n{boss['name']} (HP {boss['hp']}, урон {boss['damage']}, ворота Ур. {boss['level']})")
+        print(f"  {'lvl':>4} {'hack':>4} {'prog':>4} {'win':>8} {'draw':>8} {'loss':>8} {'first':>6}")
+        for i in rows:
+            level, h, p = cells[i, 1:]
+            gate = " " if level >= boss["level"] else "*"
+            odds = exact[i]
+            first = "power" if odds.action == combat.POWER else "attack"
+            print(f" {gate}{level:>4} {h:>4} {p:>4} {odds.win:>8.3%} {odds.draw:>8.3%} {odds.loss:>8.3%} {first:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная симуляция битв с боссами (формулы combat.py)")
+    parser.add_argument("--levels", default="1,5,10,15,20,25,30,35,40,50,60,75,90,100", help="уровни игрока")
+    parser.add_argument("--hacking", default="auto", help="значения навыка hacking или auto (уровень - 2)")
+    parser.add_argument("--programming", default="auto", help="значения навыка programming или auto")
+    parser.add_argument("--fights", type=int, default=20000, help="боёв на клетку сетки")
+    parser.add_argument("--policy", default="best", help=f"стратегии через запятую: {', '.join(POLICIES)}")
+    parser.add_argument("--gate-win", type=float, default=0.9, help="доля побед для подсказки уровня ворот")
+    parser.add_argument("--exact", action="store_true", help="добавить точные шансы оптимальной стратегии")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="записать результаты в JSON")
+    args = parser.parse_args()
+
+    policies = args.policy.split(",")
+    for policy in policies:
+        if policy not in POLICIES:
+            parser.error(f"неизвестная стратегия: {policy}")
+    hacking = None if args.hacking == "auto" else parse_ints(args.hacking)
+    programming = None if args.programming == "auto" else parse_ints(args.programming)
+    cells = build_cells(parse_ints(args.levels), hacking, programming)
+    rng = np.random.default_rng(args.seed)
+
+    report = {"cells": [{"boss": combat.BOSSES[b]["name"], "level": int(l), "hacking": int(h), "programming": int(p)}
+                        for b, l, h, p in cells], "fights": args.fights, "policies": {}}
+    for policy in policies:
+        summary = summarize(cells, simulate(cells, args.fights, policy, rng))
+        print_report(cells, summary, policy, args.gate_win)
+        report["policies"][policy] = {
+            "rates": {name: value.tolist() for name, value in summary["rates"].items()},
+            "turns": summary["turns"].tolist(),
+            "hp_percentiles": {
+                "p10": [None if np.isnan(v) else float(v) for v in summary["hp_p10"]],
+                "p50": [None if np.isnan(v) else float(v) for v in summary["hp_p50"]],
+                "p90": [None if np.isnan(v) else float(v) for v in summary["hp_p90"]]
+            },
+            "hp_histogram": summary["hp_histogram"].tolist()
+        }
+    if args.exact:
+        exact = solve_exact(cells)
+        print_exact(cells, exact)
+        report["exact"] = [odds.as_dict() for odds in exact]
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ Для симулятора нужен numpy: pip install numpy")
+    sys.exit(1)
+
+import economy
+
+DIFFICULTY = np.array([t["difficulty"] for t in economy.HACK_TARGETS], dtype=np.int64)
+REWARD = np.array([t["reward"] for t in economy.HACK_TARGETS], dtype=np.int64)
+REQ_LEVEL = np.array([t["req_level"] for t in economy.HACK_TARGETS], dtype=np.int64)
+
+# Старт свободного режима (start_sandbox_mode)
+SANDBOX_LEVEL = 5
+SANDBOX_SKILL = 3
+SANDBOX_BITCOINS = 5000
+
+# hacking_menu при повышении уровня вызывает level_up ещё раз после add_exp:
+# за один взлом игрок получает два уровня и +2 к навыкам
+LEVELS_PER_LEVEL_UP = 2
+
+# Сколько случайных чисел генерировать за один проход сетки
+CHUNK_CELLS = 4_000_000
+
+
+# Формулы economy.py над массивами: те же операции, min -> np.minimum
+def success_chance(hacking, difficulty):
+    return np.minimum(economy.SUCCESS_CAP, (hacking * economy.SKILL_WEIGHT) / difficulty)
+
+
+def mastery_bonus(reward, hacking, difficulty):
+    return np.where(hacking > difficulty, reward // 2, 0)
+
+
+def failure_penalty(bitcoins):
+    return np.minimum(economy.PENALTY_CAP, bitcoins // economy.PENALTY_SHARE)
+
+
+def parse_ints(spec):
+    # "1-5,8,10" -> [1, 2, 3, 4, 5, 8, 10]
+    values = []
+    for part in spec.split(","):
+        if "-" in part.strip("-"):
+            first, last = part.split("-")
+            values.extend(range(int(first), int(last) + 1))
+        else:
+            values.append(int(part))
+    return np.array(values, dtype=np.int64)
+
+
+def sweep(skills, balances, trials, rng):
+    # Сетка навык x баланс x цель, trials взломов в каждой клетке
+    hacking = skills[:, None, None]
+    bitcoins = balances[None, :, None]
+    chance = success_chance(hacking, DIFFICULTY)
+    gain = REWARD + mastery_bonus(REWARD, hacking, DIFFICULTY)
+    penalty = failure_penalty(bitcoins)
+
+    shape = (len(skills), len(balances), len(DIFFICULTY))
+    btc_sum = np.zeros(shape)
+    btc_sq = np.zeros(shape)
+    exp_sum = np.zeros(shape)
+    successes = np.zeros(shape)
+    drops = np.zeros(shape)
+    chunk = max(1, CHUNK_CELLS // int(np.prod(shape)))
+    done = 0
+    while done < trials:
+        n = min(chunk, trials - done)
+        success = rng.random(shape + (n,)) < chance[..., None]
+        drop = success & (rng.random(shape + (n,)) < economy.DROP_CHANCE)
+        delta = np.where(success, gain[..., None], -penalty[..., None])
+        btc_sum += delta.sum(axis=-1)
+        btc_sq += (delta.astype(np.float64) ** 2).sum(axis=-1)
+        exp_sum += np.where(success, economy.hack_exp(gain)[..., None], 0).sum(axis=-1)
+        successes += success.sum(axis=-1)
+        drops += drop.sum(axis=-1)
+        done += n
+
+    mean = btc_sum / trials
+    return {
+        "btc_per_attempt": mean,
+        "btc_stderr": np.sqrt(np.maximum(btc_sq / trials - mean ** 2, 0) / trials),
+        "exp_per_attempt": exp_sum / trials,
+        "success_rate": successes / trials,
+        "drop_rate": drops / trials
+    }
+
+
+def choose_targets(policy, level, hacking, bitcoins):
+    # Номер цели для каждой дорожки; закрытые по уровню цели не выбираются
+    unlocked = REQ_LEVEL[None, :] <= level[:, None]
+    index = np.arange(len(REQ_LEVEL))[None, :]
+    if policy == "best":
+        chance = success_chance(hacking[:, None], DIFFICULTY)
+        gain = REWARD + mastery_bonus(REWARD, hacking[:, None], DIFFICULTY)
+        value = chance * gain - (1 - chance) * failure_penalty(bitcoins)[:, None]
+        return np.where(unlocked, value, -np.inf).argmax(axis=1)
+    if policy != "top":
+        unlocked &= index < int(policy)
+    return np.where(unlocked, index, -1).max(axis=1).clip(0)
+
+
+def grind(lanes, policy, start_level, start_hacking, start_bitcoins, max_level, max_attempts, rng):
+    # Каждая дорожка - отдельный игрок, который только взламывает; шаг цикла - одна попытка у всех
+    level = np.full(lanes, start_level, dtype=np.int64)
+    hacking = np.full(lanes, start_hacking, dtype=np.int64)
+    bitcoins = np.full(lanes, start_bitcoins, dtype=np.int64)
+    exp = np.zeros(lanes, dtype=np.int64)
+    items = np.zeros(lanes, dtype=np.int64)
+    tries = np.zeros(lanes, dtype=np.int64)
+    top = max_level + LEVELS_PER_LEVEL_UP
+    reached = np.full((lanes, top + 1), -1, dtype=np.int64)
+    reached[:, :start_level + 1] = 0
+    lane = np.arange(lanes)
+
+    attempt = 0
+    for attempt in range(1, max_attempts + 1):
+        active = level < max_level
+        if not active.any():
+            break
+        tries += active
+        target = choose_targets(policy, level, hacking, bitcoins)
+        difficulty = DIFFICULTY[target]
+        success = active & (rng.random(lanes) < success_chance(hacking, difficulty))
+        failure = active & ~success
+        gain = REWARD[target] + mastery_bonus(REWARD[target], hacking, difficulty)
+        bitcoins = np.where(success, bitcoins + gain, bitcoins)
+        bitcoins = np.where(failure, np.maximum(0, bitcoins - failure_penalty(bitcoins)), bitcoins)
+        exp = np.where(success, exp + economy.hack_exp(gain), exp)
+        items += success & (rng.random(lanes) < economy.DROP_CHANCE)
+
+        up = success & (exp >= economy.exp_to_level(level))
+        if up.any():
+            for step in range(1, LEVELS_PER_LEVEL_UP + 1):
+                reached[lane[up], np.minimum(level[up] + step, top)] = attempt
+            level = np.where(up, level + LEVELS_PER_LEVEL_UP, level)
+            hacking = np.where(up, hacking + LEVELS_PER_LEVEL_UP, hacking)
+            exp = np.where(up, 0, exp)
+
+    curve = []
+    for lvl in range(start_level + 1, max_level + 1):
+        hit = reached[:, lvl]
+        hit = hit[hit >= 0]
+        row = {"level": lvl, "reached": len(hit) / lanes}
+        if len(hit):
+            row.update({
+                "mean": float(hit.mean()),
+                "median": float(np.median(hit)),
+                "p90": float(np.percentile(hit, 90))
+            })
+        curve.append(row)
+    return {
+        "attempts": attempt,
+        "curve": curve,
+        "final_bitcoins": float(bitcoins.mean()),
+        "items_per_attempt": float(items.sum() / max(1, tries.sum()))
+    }
+
+
+def print_sweep(result, skills, balances):
+    names = [f"T{i}" for i in range(1, len(DIFFICULTY) + 1)]
+    header = f"{'hacking':>7} " + " ".join(f"{name:>9}" for name in names)
+    for b, balance in enumerate(balances):
+        print(f"\nExpected BTC per attempt, balance={balance}")
+        print(header)
+        for s, skill in enumerate(skills):
+            row = result["btc_per_attempt"][s, b]
+            print(f"{skill:>7} " + " ".join(f"{value:>9.0f}" for value in row))
+    for key, title in (("success_rate", "Success rate"), ("drop_rate", "Item drops per attempt")):
+        print(f"\n{title}")
+        print(header)
+        for s, skill in enumerate(skills):
+            row = result[key][s, 0]
+            print(f"{skill:>7} " + " ".join(f"{value:>9.3f}" for value in row))
+    print("\nT: " + ", ".join(f"T{i}={t['name'].split(' ', 1)[1].strip()}" for i, t in enumerate(economy.HACK_TARGETS, 1)))
+
+
+def print_curve(result, policy):
+    print(f"\nTime to level, policy={policy}, attempts simulated={result['attempts']}")
+    print(f"{'level':>5} {'reached':>8} {'mean':>9} {'median':>9} {'p90':>9}")
+    for row in result["curve"]:
+        if "mean" in row:
+            print(f"{row['level']:>5} {row['reached']:>8.1%} {row['mean']:>9.1f} {row['median']:>9.0f} {row['p90']:>9.0f}")
+        else:
+            print(f"{row['level']:>5} {row['reached']:>8.1%} {'-':>9} {'-':>9} {'-':>9}")
+    print(f"Items per attempt: {result['items_per_attempt']:.3f}, mean final BTC: {result['final_bitcoins']:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Монте-Карло экономики взлома (формулы economy.py)")
+    parser.add_argument("--skills", default="1,2,3,5,8,10,15,20,25,30,35,40,50", help="уровни навыка hacking")
+    parser.add_argument("--balances", default="0,1000,5000,100000", help="балансы BTC")
+    parser.add_argument("--trials", type=int, default=20000, help="взломов на клетку сетки")
+    parser.add_argument("--lanes", type=int, default=10000, help="игроков в кривой уровней")
+    parser.add_argument("--policy", default="best", help="выбор цели: best, top или номер последней разрешённой цели")
+    parser.add_argument("--start-level", type=int, default=SANDBOX_LEVEL)
+    parser.add_argument("--start-hacking", type=int, default=SANDBOX_SKILL)
+    parser.add_argument("--start-bitcoins", type=int, default=SANDBOX_BITCOINS)
+    parser.add_argument("--max-level", type=int, default=40)
+    parser.add_argument("--max-attempts", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="записать все результаты в JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    skills = parse_ints(args.skills)
+    balances = parse_ints(args.balances)
+    swept = sweep(skills, balances, args.trials, rng)
+    print_sweep(swept, skills, balances)
+    curve = grind(args.lanes, args.policy, args.start_level, args.start_hacking, args.start_bitcoins,
+                  args.max_level, args.max_attempts, rng)
+    print_curve(curve, args.policy)
+
+    if args.output:
+        report = {
+            "skills": skills.tolist(),
+            "balances": balances.tolist(),
+            "targets": [t["name"] for t in economy.HACK_TARGETS],
+            "trials": args.trials,
+            "sweep": {key: value.tolist() for key, value in swept.items()},
+            "time_to_level": curve
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scene_graph import compile_chapter, MISSING_SCENE
+from validate_chapters import load_chapter
+
+STORY_DIR = os.path.join(os.path.dirname(__file__), '..', 'story')
+# Показатели, которые эффекты выборов прибавляют; навыки добавляются как skill:<имя>
+STATS = ("bitcoins", "exp", "reputation", "items")
+NAMES = {"bitcoins": "BTC", "exp": "EXP", "reputation": "REP", "items": "ITEMS"}
+
+
+def choice_gains(effect):
+    # Что выбор прибавляет к показателям - как apply_effects
+    gains = {stat: effect[stat] for stat in ("bitcoins", "exp", "reputation") if stat in effect}
+    if "item" in effect:
+        gains["items"] = 1
+    if "skill" in effect:
+        key = f"skill:{effect['skill']}"
+        gains[key] = gains.get(key, 0) + effect.get("value", 1)
+    return gains
+
+
+class Summary:
+    # Итог всех путей от сцены до конца главы
+    def __init__(self):
+        self.low = {}
+        self.high = {}
+        # Выбор, на котором достигается минимум/максимум показателя - для восстановления пути
+        self.low_choice = {}
+        self.high_choice = {}
+        # Уровни, которые может выставить последний эффект level на пути; None - пути без level
+        self.levels = frozenset()
+        self.achievements = frozenset()
+        self.guaranteed = frozenset()
+        self.items = frozenset()
+        self.paths = 0
+        self.ends = False
+
+
+class StoryPaths:
+    def __init__(self, chapters):
+        # chapters: {номер: (граф сцен, заголовок)}
+        self.chapters = chapters
+        self.memo = {}
+        self.active = set()
+        self.issues = []
+
+    def summary(self, num, sid):
+        # Мемоизация по (глава, сцена): каждая сцена считается один раз, сколько бы путей через неё ни шло
+        key = (num, sid)
+        if key not in self.memo:
+            self.active.add(key)
+            self.memo[key] = self.combine(num, sid)
+            self.active.discard(key)
+        return self.memo[key]
+
+    def combine(self, num, sid):
+        graph, _ = self.chapters[num]
+        result = Summary()
+        options = []
+        for cid in graph.choices(sid):
+            effect = graph.effect(cid)
+            target = graph.choice_next[cid]
+            if target == MISSING_SCENE:
+                self.issues.append((num, "dead_end", f"{graph.name(sid)}: выбор ведёт в несуществующую сцену '{graph.missing[cid]}'"))
+                sub = Summary()
+                sub.paths = 1
+            elif target < 0:
+                sub = Summary()
+                sub.paths = 1
+                sub.ends = True
+            elif (num, target) in self.active:
+                # Цикл: повтор петли не учитывается, переход отмечается как проблема
+                self.issues.append((num, "cycle", f"{graph.name(sid)} -> {graph.name(target)}: цикл в графе сцен"))
+                continue
+            else:
+                sub = self.summary(num, target)
+                if not sub.ends:
+                    self.issues.append((num, "dead_end", f"{graph.name(sid)} -> {graph.name(target)}: из сцены нельзя дойти до конца главы"))
+            options.append((cid, effect, sub))
+
+        if not options:
+            # Сцена без выборов заканчивает главу (play_chapter)
+            result.paths = 1
+            result.ends = graph.choice_end[sid] == graph.choice_start[sid]
+            result.levels = frozenset([None])
+            return result
+
+        stats = set()
+        for _, effect, sub in options:
+            stats.update(choice_gains(effect), sub.low)
+        guaranteed = None
+        levels = set()
+        for cid, effect, sub in options:
+            gains = choice_gains(effect)
+            for stat in stats:
+                low = gains.get(stat, 0) + sub.low.get(stat, 0)
+                high = gains.get(stat, 0) + sub.high.get(stat, 0)
+                if stat not in result.low or low < result.low[stat]:
+                    result.low[stat] = low
+                    result.low_choice[stat] = cid
+                if stat not in result.high or high > result.high[stat]:
+                    result.high[stat] = high
+                    result.high_choice[stat] = cid
+            # Эффект level выставляет уровень; дальше по пути его может перезаписать следующий
+            sub_levels = sub.levels or frozenset([None])
+            if "level" in effect:
+                levels.update(level if level is not None else effect["level"] for level in sub_levels)
+            else:
+                levels.update(sub_levels)
+            gained = set(sub.achievements)
+            if effect.get("achievement"):
+                gained.add(effect["achievement"])
+            result.achievements |= gained
+            on_path = set(sub.guaranteed) | ({effect["achievement"]} if effect.get("achievement") else set())
+            guaranteed = on_path if guaranteed is None else guaranteed & on_path
+            result.items |= sub.items | ({effect["item"]} if "item" in effect else set())
+            result.paths += sub.paths
+            result.ends = result.ends or sub.ends
+        result.levels = frozenset(levels)
+        result.guaranteed = frozenset(guaranteed)
+        return result
+
+    def chapter(self, num):
+        graph, _ = self.chapters[num]
+        if graph.start == MISSING_SCENE:
+            self.issues.append((num, "no_start", "нет сцены 'start'"))
+            return None
+        return self.summary(num, graph.start)
+
+    def defined_achievements(self, num):
+        graph, _ = self.chapters[num]
+        return {graph.effect(cid)["achievement"] for sid in range(len(graph)) for cid in graph.choices(sid)
+                if graph.effect(cid).get("achievement")}
+
+    def unreachable(self, num):
+        graph, _ = self.chapters[num]
+        seen = set()
+        stack = [graph.start] if graph.start >= 0 else []
+        while stack:
+            sid = stack.pop()
+            if sid in seen:
+                continue
+            seen.add(sid)
+            stack.extend(graph.choice_next[cid] for cid in graph.choices(sid) if graph.choice_next[cid] >= 0)
+        return [graph.name(sid) for sid in range(len(graph)) if sid not in seen]
+
+    def path(self, num, stat, high=True):
+        # Выборы пути, на котором показатель максимален (или минимален)
+        graph, _ = self.chapters[num]
+        sid = graph.start
+        steps = []
+        while sid >= 0:
+            summary = self.memo.get((num, sid))
+            choices = {} if summary is None else summary.high_choice if high else summary.low_choice
+            if stat not in choices:
+                cids = graph.choices(sid)
+                if not len(cids):
+                    break
+                cid = cids[0]
+            else:
+                cid = choices[stat]
+            steps.append(graph.choice_label(cid))
+            sid = graph.choice_next[cid]
+        return steps
+
+
+def final_levels(chapter_levels):
+    # Уровень после сюжета - значение последнего сработавшего эффекта level
+    possible = {None}
+    for levels in chapter_levels:
+        chosen = {level for level in levels if level is not None}
+        possible = chosen | (possible if None in levels or not levels else set())
+    return possible
+
+
+def load_chapters(numbers):
+    chapters = {}
+    errors = []
+    for num in numbers:
+        path = os.path.join(STORY_DIR, f'chapter{num}.py')
+        if not os.path.exists(path):
+            continue
+        chapter, err = load_chapter(path)
+        if err:
+            errors.append((num, err))
+            continue
+        chapters[num] = (compile_chapter(chapter), chapter.get("title", ""))
+    return chapters, errors
+
+
+def chapter_numbers(spec):
+    if spec is None:
+        files = [f for f in os.listdir(STORY_DIR) if re.match(r'chapter\d+\.py$', f)]
+        return sorted(int(re.search(r'\d+', f).group()) for f in files)
+    numbers = []
+    for part in spec.split(","):
+        first, _, last = part.partition("-")
+        numbers.extend(range(int(first), int(last or first) + 1))
+    return numbers
+
+
+def format_range(summary, stat):
+    low, high = summary.low.get(stat, 0), summary.high.get(stat, 0)
+    return f"{low}" if low == high else f"{low}..{high}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Диапазоны показателей по всем путям сюжета")
+    parser.add_argument("--chapters", help="номера глав, например 1-5,8 (по умолчанию все)")
+    parser.add_argument("--path", help="показать выборы лучшего и худшего пути по показателю, например bitcoins")
+    parser.add_argument("--output", help="записать отчёт в JSON")
+    args = parser.parse_args()
+
+    chapters, errors = load_chapters(chapter_numbers(args.chapters))
+    story = StoryPaths(chapters)
+    summaries = {num: story.chapter(num) for num in chapters}
+    unreachable = {num: story.unreachable(num) for num in chapters}
+
+    stats = list(STATS) + sorted({stat for s in summaries.values() if s for stat in s.low if stat not in STATS})
+    print(f"{'глава':>5} {'путей':>8} " + " ".join(f"{NAMES[stat]:>15}" for stat in STATS))
+    total_low = dict.fromkeys(stats, 0)
+    total_high = dict.fromkeys(stats, 0)
+    total_paths = 1
+    for num, summary in summaries.items():
+        if summary is None:
+            print(f"{num:>5} {'-':>8}")
+            continue
+        total_paths *= summary.paths
+        for stat in stats:
+            total_low[stat] += summary.low.get(stat, 0)
+            total_high[stat] += summary.high.get(stat, 0)
+        print(f"{num:>5} {summary.paths:>8} " + " ".join(f"{format_range(summary, stat):>15}" for stat in STATS))
+
+    solved = [s for s in summaries.values() if s]
+    print(f"\nВсего путей через сюжет: {total_paths}")
+    print("Сумма за сюжет (худший..лучший путь):")
+    for stat in stats:
+        print(f"  {NAMES.get(stat, stat):<20} {total_low[stat]}..{total_high[stat]}")
+    levels = final_levels([s.levels for s in solved])
+    set_levels = sorted(level for level in levels if level is not None)
+    if set_levels:
+        keep = " (или прежний уровень)" if None in levels else ""
+        print(f"  {'уровень из эффектов':<20} {set_levels[0]}..{set_levels[-1]}{keep}")
+
+    achievements = set().union(*(s.achievements for s in solved)) if solved else set()
+    guaranteed = set().union(*(s.guaranteed for s in solved)) if solved else set()
+    defined = set().union(*(story.defined_achievements(num) for num in chapters)) if chapters else set()
+    print("\nДостижения сюжета:")
+    for achievement in sorted(defined):
+        if achievement in guaranteed:
+            status = "на любом пути"
+        elif achievement in achievements:
+            status = "достижимо"
+        else:
+            status = "недостижимо"
+        print(f"  {achievement}: {status}")
+    if not defined:
+        print("  нет")
+    items = set().union(*(s.items for s in solved)) if solved else set()
+    print(f"Разных предметов можно получить: {len(items)}")
+
+    issues = sorted(set(story.issues))
+    hidden = [(num, f"недостижимая сцена '{name}'") for num, names in unreachable.items() for name in names]
+    if errors or issues or hidden:
+        print("\nПроблемы:")
+        for num, err in errors:
+            print(f"- chapter{num}.py: {err}")
+        for num, _, message in issues:
+            print(f"- chapter{num}.py: {message}")
+        for num, message in hidden:
+            print(f"- chapter{num}.py: {message}")
+    else:
+        print("\nНедостижимых сцен и тупиковых выборов нет.")
+
+    if args.path:
+        for high in (True, False):
+            print(f"\n{'Лучший' if high else 'Худший'} путь по {args.path}:")
+            for num in summaries:
+                if summaries[num]:
+                    print(f"  {num:>2}. " + " | ".join(story.path(num, args.path, high)))
+
+    if args.output:
+        report = {
+            "chapters": {
+                num: {
+                    "title": chapters[num][1],
+                    "paths": s.paths,
+                    "low": s.low,
+                    "high": s.high,
+                    "achievements": sorted(s.achievements),
+                    "unreachable": unreachable[num]
+                } for num, s in summaries.items() if s
+            },
+            "total": {"paths": total_paths, "low": total_low, "high": total_high},
+            "levels": [level for level in sorted(levels, key=lambda l: (l is not None, l or 0))],
+            "achievements": {
+                a: "guaranteed" if a in guaranteed else "obtainable" if a in achievements else "unobtainable"
+                for a in sorted(defined)
+            },
+            "issues": [{"chapter": num, "kind": kind, "message": message} for num, kind, message in issues]
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
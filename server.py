@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+import os
+import re
+import gc
+import sys
+import json
+import bisect
+import signal
+import socket
+import random
+import asyncio
+import hashlib
+import itertools
+import argparse
+import traceback
+
+import main
+from main import GameEngine, GameData
+from io_port import IOPort
+from terminal import Terminal, FRAME_RATE, typewriter_due
+from assets import AssetCache
+from game_clock import make_clock
+from terminal import CLEAR
+
+# Размер экрана по умолчанию: telnet-клиенты не обязаны сообщать свой
+SESSION_CAPS = {"tty": True, "ansi": True, "colors": 16, "unicode": True, "width": 80, "height": 24}
+PLAYER_NAME = re.compile(r'^[\w\-. ]{1,32}$')
+BANNER = ("TERMINAL SHADOWS: DIGITAL GHOST", "="*30)
+NAME_PROMPT = "Имя игрока: "
+NAME_ERROR = "❌ Имя: 1-32 буквы, цифры, пробел, . _ -"
+
+# Виртуальных точек на воркер в кольце: чем больше, тем ровнее делятся игроки
+RING_REPLICAS = 64
+# Сообщение о передаче соединения: имя игрока и уже прочитанные байты ввода
+HANDOFF_SIZE = 65536
+
+IAC, SB, SE, WILL, DONT = 255, 250, 240, 251, 254
+
+
+def strip_telnet(data):
+    # Убираем из ввода служебные последовательности telnet (IAC ...)
+    if IAC not in data:
+        return data
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if byte != IAC or i + 1 >= len(data):
+            out.append(byte)
+            i += 1
+            continue
+        command = data[i + 1]
+        if command == IAC:
+            out.append(IAC)
+            i += 2
+        elif WILL <= command <= DONT:
+            i += 3
+        elif command == SB:
+            end = data.find(bytes([IAC, SE]), i)
+            i = len(data) if end < 0 else end + 2
+        else:
+            i += 2
+    return bytes(out)
+
+
+def parse_name(raw):
+    name = strip_telnet(raw).decode('utf-8', 'replace').strip("\r\n\0 ")
+    return name if PLAYER_NAME.match(name) else None
+
+
+def player_key(name):
+    # Одно и то же имя всегда попадает в один воркер, а значит, в одну папку сохранений
+    return int.from_bytes(hashlib.sha1(name.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    # Консистентное хеширование: при изменении числа воркеров переезжает ~1/N игроков
+    def __init__(self, nodes, replicas=RING_REPLICAS):
+        points = []
+        for node in nodes:
+            for replica in range(replicas):
+                points.append((player_key(f"worker-{node}#{replica}"), node))
+        points.sort()
+        self.keys = [key for key, node in points]
+        self.nodes = [node for key, node in points]
+
+    def node(self, name):
+        i = bisect.bisect(self.keys, player_key(name)) % len(self.keys)
+        return self.nodes[i]
+
+
+class SessionStream:
+    # Текстовый поток поверх сокета для Terminal: \n -> \r\n, как ждёт telnet
+    encoding = "utf-8"
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, text):
+        self.writer.write(text.replace("\n", "\r\n").encode('utf-8'))
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return True
+
+
+class SessionPort(IOPort):
+    def __init__(self, reader, writer, clock, assets, diff_render=True):
+        self.reader = reader
+        self.writer = writer
+        self.assets = assets
+        self.terminal = Terminal(SessionStream(writer), caps=dict(SESSION_CAPS), clock=clock)
+        if diff_render:
+            self.terminal.enable_screen()
+        # Незавершённое чтение строки: его же ждёт печатная машинка, чтобы пропустить текст
+        self.pending = None
+        # С какого момента (время цикла событий) сессия ждёт ответа игрока
+        self.waiting_since = None
+
+    def frame(self):
+        self.terminal.clear()
+
+    def text(self, *values, sep=" ", end="\n"):
+        self.terminal.write(sep.join(str(value) for value in values) + end)
+
+    def art(self, name, color=""):
+        data = self.assets.get(name, color, self.text)
+        if data is not None:
+            self.terminal.write_bytes(data)
+
+    def read_task(self):
+        if self.pending is None:
+            self.pending = asyncio.ensure_future(self.reader.readline())
+        return self.pending
+
+    async def send(self):
+        self.terminal.flush()
+        await self.writer.drain()
+
+    def idle(self):
+        if self.waiting_since is None:
+            return 0.0
+        return asyncio.get_running_loop().time() - self.waiting_since
+
+    async def wait_input(self):
+        # Ждём строку, не забирая её: её прочитает следующий prompt
+        await asyncio.wait({self.read_task()})
+
+    async def prompt(self, message=""):
+        self.terminal.write(message)
+        await self.send()
+        # shield: при гибернации движок отменяется, а начатое чтение строки остаётся
+        self.waiting_since = asyncio.get_running_loop().time()
+        try:
+            raw = await asyncio.shield(self.read_task())
+        finally:
+            self.waiting_since = None
+        self.pending = None
+        if not raw:
+            raise EOFError
+        return strip_telnet(raw).decode('utf-8', 'replace').rstrip("\r\n\0")
+
+    async def text_block(self, text, delay=0.03):
+        # То же, что Terminal.typewrite: кадры по часам игры, но ожидание кадра
+        # соревнуется с вводом клиента. Любой ввод допечатывает текст и поглощается
+        if delay <= 0 or not text:
+            self.text(text)
+            await self.send()
+            return
+        clock = self.terminal.clock
+        frame = 1.0 / FRAME_RATE
+        start = clock.now()
+        pos = 0
+        frames = 0
+        while pos < len(text):
+            due = typewriter_due(text, clock.now() - start, delay)
+            if due > pos:
+                self.terminal.write(text[pos:due])
+                await self.send()
+                pos = due
+            if pos >= len(text):
+                break
+            frames = max(frames + 1, int((clock.now() - start) / frame) + 1)
+            tick = asyncio.ensure_future(clock.sleep(start + frames * frame - clock.now()))
+            done, _ = await asyncio.wait({self.read_task(), tick}, return_when=asyncio.FIRST_COMPLETED)
+            if tick not in done:
+                tick.cancel()
+            if self.pending in done:
+                self.pending = None
+                self.terminal.write(text[pos:])
+                break
+        self.terminal.write("\n")
+        await self.send()
+
+    def close(self):
+        if self.pending:
+            self.pending.cancel()
+            self.pending = None
+
+
+class GameServer:
+    def __init__(self, clock="real", diff_render=True, hibernate_after=0):
+        self.clock = clock
+        self.diff_render = diff_render
+        # Через сколько секунд ожидания в меню сессия уходит на диск (0 - никогда)
+        self.hibernate_after = hibernate_after
+        self.session_ids = itertools.count(1)
+        self.hibernated = 0
+        # Настройки и главы читаются один раз; каждая сессия получает копию настроек
+        self.config = GameData().config
+        self.assets = AssetCache("data/ascii_arts")
+        self.sessions = 0
+
+    def preload(self):
+        # Главы и их графы сцен загружаются до fork: воркеры делят страницы с родителем
+        for i in range(1, len(main.chapters) + 1):
+            main.chapters.graph(i)
+        self.assets.get_pack()
+
+    async def login(self, port):
+        port.frame()
+        for line in BANNER:
+            port.text(line)
+        while True:
+            name = parse_name((await port.prompt(NAME_PROMPT)).encode('utf-8'))
+            if name:
+                return name
+            port.text(NAME_ERROR)
+
+    async def play(self, coroutine):
+        # exit_game завершает игру через sys.exit; SystemExit из задачи asyncio
+        # остановил бы весь цикл событий, поэтому для сессии это обычный выход
+        try:
+            await coroutine
+        except SystemExit:
+            pass
+
+    async def run_until_idle(self, game, task, port):
+        # Ждём конца сессии. Если игрок дольше hibernate_after сидит в меню, снимаем
+        # состояние движка и останавливаем его; возвращается снимок или None
+        while True:
+            timeout = None
+            if self.hibernate_after:
+                timeout = max(0.1, self.hibernate_after - port.idle())
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                task.result()
+                return None
+            if game.pending_choice and port.idle() >= self.hibernate_after:
+                state = game.session_state()
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                return state
+
+    async def handle(self, reader, writer, owner=None):
+        clock = make_clock(self.clock)
+        port = SessionPort(reader, writer, clock, self.assets, self.diff_render)
+        session_id = f"{os.getpid()}_{next(self.session_ids)}"
+        data = task = None
+        asleep = False
+        self.sessions += 1
+        try:
+            if owner is None:
+                owner = await self.login(port)
+            while True:
+                data = GameData(owner=owner, config=self.config)
+                game = GameEngine(clock=clock, io=port, data=data, rng=random.Random())
+                if asleep:
+                    asleep = False
+                    self.hibernated -= 1
+                    state = await data.run(data.load_session, session_id)
+                    task = asyncio.ensure_future(self.play(game.resume(state)))
+                else:
+                    task = asyncio.ensure_future(self.play(game.show_main_menu()))
+                state = await self.run_until_idle(game, task, port)
+                if state is None:
+                    break
+                # Спящая сессия держит только сокет и экран: движок, игрок и данные уходят
+                await data.run(data.save_session, session_id, state)
+                session_file = data.session_path(session_id)
+                await data.run(data.close)
+                for message in data.take_messages():
+                    port.text(message)
+                data = game = task = state = None
+                asleep = True
+                self.hibernated += 1
+                await port.wait_input()
+        except (EOFError, ConnectionError):
+            pass
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self.sessions -= 1
+            if task and not task.done():
+                task.cancel()
+            port.close()
+            if data:
+                await data.run(data.close)
+            if asleep:
+                self.hibernated -= 1
+                try:
+                    os.remove(session_file)
+                except OSError:
+                    pass
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Terminal Shadows server: {addresses}")
+        async with server:
+            await server.serve_forever()
+
+    async def adopt(self, fd, message):
+        # Соединение, принятое акцептором: ввод, прочитанный им после имени, идёт первым
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(fileno=fd)
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes.fromhex(message["pending"]))
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport, _ = await loop.connect_accepted_socket(lambda: protocol, sock)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        await self.handle(reader, writer, message["owner"])
+
+    async def serve_worker(self, channel):
+        # Воркер получает сокеты игроков от акцептора; закрытие канала - сигнал остановки
+        loop = asyncio.get_running_loop()
+        channel.setblocking(False)
+        stopped = loop.create_future()
+        tasks = set()
+
+        def receive():
+            try:
+                message, fds, flags, address = socket.recv_fds(channel, HANDOFF_SIZE, 1)
+            except BlockingIOError:
+                return
+            except OSError:
+                message, fds = b"", []
+            if not message and not fds:
+                loop.remove_reader(channel.fileno())
+                if not stopped.done():
+                    stopped.set_result(None)
+                return
+            for fd in fds:
+                task = asyncio.ensure_future(self.adopt(fd, json.loads(message)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        loop.add_reader(channel.fileno(), receive)
+        await stopped
+        for task in list(tasks):
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class Acceptor:
+    # Родительский процесс: принимает соединения, спрашивает имя и передаёт сокет
+    # воркеру, выбранному по кольцу. Дальше с игроком работает только воркер
+    def __init__(self, channels):
+        self.channels = channels
+        for channel in channels:
+            channel.setblocking(False)
+        self.alive = set(range(len(channels)))
+        self.ring = HashRing(self.alive)
+
+    async def send(self, sock, text):
+        await asyncio.get_running_loop().sock_sendall(sock, text.replace("\n", "\r\n").encode('utf-8'))
+
+    async def login(self, sock):
+        loop = asyncio.get_running_loop()
+        buffer = b""
+        await self.send(sock, CLEAR + "\n".join(BANNER) + "\n" + NAME_PROMPT)
+        while True:
+            while b"\n" not in buffer:
+                data = await loop.sock_recv(sock, 1024)
+                if not data:
+                    return None, b""
+                buffer += data
+            line, _, buffer = buffer.partition(b"\n")
+            name = parse_name(line)
+            if name:
+                return name, buffer
+            await self.send(sock, NAME_ERROR + "\n" + NAME_PROMPT)
+
+    async def send_fds(self, channel, message, fd):
+        # Канал неблокирующий: при полной очереди ждём готовности на запись в цикле событий
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return socket.send_fds(channel, [message], [fd])
+            except BlockingIOError:
+                ready = loop.create_future()
+                loop.add_writer(channel.fileno(), lambda: ready.done() or ready.set_result(None))
+                try:
+                    await ready
+                finally:
+                    loop.remove_writer(channel.fileno())
+
+    def drop_worker(self, worker):
+        # Упавший воркер выходит из кольца: его игроки переезжают к соседям по кольцу
+        self.alive.discard(worker)
+        if self.alive:
+            self.ring = HashRing(self.alive)
+        print(f"Worker {worker} is gone, workers left: {len(self.alive)}")
+
+    async def handoff(self, sock):
+        try:
+            owner, pending = await self.login(sock)
+            if not owner:
+                return
+            message = json.dumps({"owner": owner, "pending": pending.hex()}).encode('utf-8')
+            # Воркер читает пакет в буфер HANDOFF_SIZE: длиннее - обрезался бы на полпути
+            if len(message) > HANDOFF_SIZE:
+                print(f"Handoff error: {len(message)} bytes of input before the game started")
+                return
+            while self.alive:
+                worker = self.ring.node(owner)
+                try:
+                    await self.send_fds(self.channels[worker], message, sock.fileno())
+                    return
+                except (BrokenPipeError, ConnectionRefusedError, ConnectionResetError):
+                    self.drop_worker(worker)
+            await self.send(sock, "❌ Сервер недоступен\n")
+        except OSError as e:
+            print(f"Handoff error: {e}")
+        finally:
+            sock.close()
+
+    async def serve(self, host, port):
+        loop = asyncio.get_running_loop()
+        listener = socket.create_server((host, port))
+        listener.setblocking(False)
+        print(f"Terminal Shadows server: {listener.getsockname()}, воркеров: {len(self.channels)}")
+        tasks = set()
+        with listener:
+            while True:
+                sock, address = await loop.sock_accept(listener)
+                sock.setblocking(False)
+                task = asyncio.ensure_future(self.handoff(sock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+
+def run_pool(game_server, host, port, workers):
+    # Всё общее (главы, графы сцен, настройки, пак графики) грузится до fork,
+    # а gc.freeze убирает эти объекты из сборки мусора: обход GC не трогает
+    # их страницы, и они остаются общими copy-on-write
+    game_server.preload()
+    gc.collect()
+    gc.freeze()
+
+    pids, channels = [], []
+    for _ in range(workers):
+        parent_end, child_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        pid = os.fork()
+        if pid == 0:
+            parent_end.close()
+            for channel in channels:
+                channel.close()
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                asyncio.run(game_server.serve_worker(child_end))
+            finally:
+                os._exit(0)
+        child_end.close()
+        pids.append(pid)
+        channels.append(parent_end)
+
+    try:
+        asyncio.run(Acceptor(channels).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for channel in channels:
+            channel.close()
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+
+def run():
+    parser = argparse.ArgumentParser(description="TERMINAL SHADOWS: сервер для подключения по telnet")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--clock", default="real", help="паузы в игре: real, virtual или множитель")
+    parser.add_argument("--no-diff-render", action="store_true", help="перерисовывать экран целиком")
+    parser.add_argument("--hibernate-after", type=float, default=300,
+                        help="секунд ожидания в меню до выгрузки сессии на диск (0 - не выгружать)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="число процессов-воркеров (0 - все сессии в одном процессе)")
+    args = parser.parse_args()
+    game_server = GameServer(args.clock, not args.no_diff_render, args.hibernate_after)
+    if args.workers > 0:
+        if not hasattr(os, "fork") or not hasattr(socket, "send_fds"):
+            print("❌ Пул воркеров требует fork и передачи сокетов (Linux, Python 3.9+)")
+            return 1
+        run_pool(game_server, args.host, args.port, args.workers)
+        return 0
+    try:
+        asyncio.run(game_server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(run())
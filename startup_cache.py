@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import os
+import sys
+import marshal
+
+CACHE_VERSION = 2
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class StartupCache:
+    # Снимок при запуске - только конфиг; главы грузятся лениво из бандла (story_bundle)
+    def __init__(self, path):
+        self.path = path
+        self.key = (CACHE_VERSION, marshal.version, tuple(sys.version_info[:2]))
+
+    def load(self, config_file):
+        try:
+            with open(self.path, 'rb') as f:
+                snapshot = marshal.loads(f.read())
+            if snapshot["key"] != self.key:
+                return None
+            config_stamp = file_stamp(config_file)
+            if config_stamp is None or tuple(snapshot["config_stamp"]) != config_stamp:
+                return None
+            if not isinstance(snapshot["config"], dict):
+                return None
+            return snapshot
+        except Exception:
+            return None
+
+    def update_config(self, config, config_file):
+        # После save_config снимок остаётся валидным - обновляем только конфиг
+        try:
+            with open(self.path, 'rb') as f:
+                snapshot = marshal.loads(f.read())
+            if snapshot["key"] != self.key:
+                return False
+        except Exception:
+            return False
+        config_stamp = file_stamp(config_file)
+        if config_stamp is None:
+            return False
+        snapshot["config_stamp"] = config_stamp
+        snapshot["config"] = dict(config)
+        return self.write(snapshot)
+
+    def store(self, config, config_file):
+        config_stamp = file_stamp(config_file)
+        if config_stamp is None:
+            return False
+        snapshot = {
+            "key": self.key,
+            "config_stamp": config_stamp,
+            "config": dict(config)
+        }
+        return self.write(snapshot)
+
+    def write(self, snapshot):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(marshal.dumps(snapshot))
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import sys
+import json
+import time
+import fnmatch
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        # Открытые фазы: пик вложенной фазы переносится в объемлющую, reset_peak его не теряет
+        self.stack = []
+        self.started = time.perf_counter()
+        # tracemalloc импортируется и запускается только при включённом профилировании
+        self.tracemalloc = None
+        if enabled:
+            import tracemalloc
+            self.tracemalloc = tracemalloc
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        tracemalloc = self.tracemalloc
+        if self.stack:
+            _, peak = tracemalloc.get_traced_memory()
+            self.stack[-1]["peak"] = max(self.stack[-1]["peak"], peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        mem_before, _ = tracemalloc.get_traced_memory()
+        frame = {"peak": mem_before}
+        self.stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            mem_after, peak = tracemalloc.get_traced_memory()
+            self.stack.pop()
+            peak = max(frame["peak"], peak)
+            if self.stack:
+                self.stack[-1]["peak"] = max(self.stack[-1]["peak"], peak)
+            self.phases.append({
+                "name": name,
+                "ms": round(elapsed * 1000, 3),
+                "alloc_kb": round((mem_after - mem_before) / 1024, 1),
+                "peak_kb": round(max(0, peak - mem_before) / 1024, 1)
+            })
+
+    def report(self):
+        current, peak = self.tracemalloc.get_traced_memory() if self.enabled else (0, 0)
+        return {
+            "python": sys.version.split()[0],
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "traced_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "phases": self.phases
+        }
+
+
+def load_budget(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check_budget(report, budget):
+    # Бюджет: {"total_ms": N, "phases": {"имя или шаблон": мс или {"ms": N, "alloc_kb": N}}}
+    exceeded = []
+    if "total_ms" in budget and report["total_ms"] > budget["total_ms"]:
+        exceeded.append({"phase": "total", "metric": "ms", "value": report["total_ms"], "limit": budget["total_ms"]})
+
+    for pattern, limits in budget.get("phases", {}).items():
+        if not isinstance(limits, dict):
+            limits = {"ms": limits}
+        for phase in report["phases"]:
+            if not fnmatch.fnmatchcase(phase["name"], pattern):
+                continue
+            for metric, limit in limits.items():
+                if metric in phase and phase[metric] > limit:
+                    exceeded.append({"phase": phase["name"], "metric": metric, "value": phase[metric], "limit": limit})
+    return exceeded
+
+
+def finish(profiler, output=None, budget_path=None):
+    report = profiler.report()
+    exceeded = []
+    if budget_path:
+        exceeded = check_budget(report, load_budget(budget_path))
+        report["budget"] = budget_path
+        report["exceeded"] = exceeded
+
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if output and output != "-":
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+    for item in exceeded:
+        print(f"Startup budget exceeded: {item['phase']} {item['metric']}={item['value']} > {item['limit']}", file=sys.stderr)
+    return 1 if exceeded else 0
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import mmap
+import struct
+import marshal
+import hashlib
+from collections.abc import Mapping
+
+BUNDLE_MAGIC = b'TSSB'
+BUNDLE_VERSION = 2
+
+# Заголовок: сигнатура, версия формата, sha256 исходников глав, число глав
+HEADER = struct.Struct('<4sH32sI')
+# Индекс глав: номер главы, смещение блока главы, длина блока
+CHAPTER_ENTRY = struct.Struct('<IQI')
+# Индекс сцен: длина имени сцены, смещение и длина JSON сцены без текста,
+# смещение и длина текста сцены (UTF-8) - текст читается только при показе
+SCENE_ENTRY = struct.Struct('<HQIQI')
+U32 = struct.Struct('<I')
+
+CHAPTER_FILE = re.compile(r'chapter(\d+)\.py$')
+
+
+def default_bundle_path():
+    return os.path.join(os.path.expanduser("~/.terminal_shadows_ultimate"), "story.bundle")
+
+
+def chapter_files(story_dir):
+    files = []
+    for f in os.listdir(story_dir):
+        m = CHAPTER_FILE.match(f)
+        if m:
+            files.append((int(m.group(1)), os.path.join(story_dir, f)))
+    files.sort()
+    return files
+
+
+def source_hash(story_dir):
+    digest = hashlib.sha256()
+    for num, path in chapter_files(story_dir):
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update(U32.pack(len(content)))
+        digest.update(content)
+    return digest.digest()
+
+
+def source_stamps(story_dir):
+    # Только stat: (имя, mtime_ns, размер) каждой главы - как file_stamp в startup_cache
+    stamps = []
+    for num, path in chapter_files(story_dir):
+        st = os.stat(path)
+        stamps.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
+    return stamps
+
+
+def stamps_path(path):
+    return f"{path}.stamps"
+
+
+def read_stamps(path):
+    try:
+        with open(stamps_path(path), 'rb') as f:
+            digest, stamps = marshal.load(f)
+        return digest, [tuple(stamp) for stamp in stamps]
+    except (OSError, EOFError, ValueError, TypeError):
+        return None, None
+
+
+def write_stamps(path, digest, stamps):
+    tmp_path = f"{stamps_path(path)}.tmp"
+    with open(tmp_path, 'wb') as f:
+        marshal.dump((digest, stamps), f)
+    os.replace(tmp_path, stamps_path(path))
+
+
+def load_chapter_source(path, num):
+    with open(path, 'r', encoding='utf-8') as f:
+        src = f.read()
+    ns = {}
+    exec(compile(src, path, 'exec'), ns)
+    return ns.get(f'CHAPTER_{num}')
+
+
+def encode_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encode_chapter(chapter, base):
+    meta = encode_json({k: v for k, v in chapter.items() if k != 'scenes'})
+    scenes = []
+    for name, scene in chapter.get('scenes', {}).items():
+        data = encode_json({k: v for k, v in scene.items() if k != 'text'})
+        scenes.append((name.encode('utf-8'), data, scene.get('text', '').encode('utf-8')))
+
+    index_size = sum(SCENE_ENTRY.size + len(name) for name, _, _ in scenes)
+    payload_offset = base + U32.size + len(meta) + U32.size + index_size
+
+    parts = [U32.pack(len(meta)), meta, U32.pack(len(scenes))]
+    payload = []
+    for name, data, text in scenes:
+        text_offset = payload_offset + len(data)
+        parts.append(SCENE_ENTRY.pack(len(name), payload_offset, len(data), text_offset, len(text)))
+        parts.append(name)
+        payload.append(data)
+        payload.append(text)
+        payload_offset = text_offset + len(text)
+    return b''.join(parts + payload)
+
+
+def build_bundle(story_dir, path=None, stamps=None):
+    path = path or default_bundle_path()
+    # Метки снимаются до чтения исходников: правка во время сборки даст новую метку
+    stamps = stamps if stamps is not None else source_stamps(story_dir)
+    files = chapter_files(story_dir)
+    digest = source_hash(story_dir)
+
+    chapters = []
+    for num, chapter_path in files:
+        chapter = load_chapter_source(chapter_path, num)
+        if chapter:
+            chapters.append((num, chapter))
+
+    offset = HEADER.size + CHAPTER_ENTRY.size * len(chapters)
+    index = []
+    blocks = []
+    for num, chapter in chapters:
+        block = encode_chapter(chapter, offset)
+        index.append(CHAPTER_ENTRY.pack(num, offset, len(block)))
+        blocks.append(block)
+        offset += len(block)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, digest, len(chapters)))
+        f.write(b''.join(index))
+        f.write(b''.join(blocks))
+    os.replace(tmp_path, path)
+    write_stamps(path, digest, stamps)
+    return len(chapters)
+
+
+def read_bundle_hash(path):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+        magic, version, digest, count = HEADER.unpack(header)
+    except (OSError, struct.error):
+        return None
+    if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+        return None
+    return digest
+
+
+def open_bundle(story_dir, path=None, report=print):
+    # report - куда сообщить об ошибке: в игре это GameData.report, то есть порт игрока
+    path = path or default_bundle_path()
+    try:
+        # Пока метки файлов глав совпадают с записанными при сборке, исходники не хешируются
+        stamps = source_stamps(story_dir)
+        bundle_hash = read_bundle_hash(path)
+        digest, known = read_stamps(path)
+        if bundle_hash is None or digest != bundle_hash or known != stamps:
+            digest = source_hash(story_dir)
+            if bundle_hash != digest:
+                build_bundle(story_dir, path, stamps)
+            else:
+                # Файлы тронуты, но содержимое то же - обновляются только метки
+                write_stamps(path, digest, stamps)
+        return StoryBundle(path)
+    except Exception as e:
+        report(f"Story bundle error: {e}")
+        return None
+
+
+class StoryBundle:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.source_hash, count = HEADER.unpack_from(self.mm, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            self.close()
+            raise ValueError(f"{path}: неизвестный формат")
+        self.index = {}
+        for i in range(count):
+            num, offset, length = CHAPTER_ENTRY.unpack_from(self.mm, HEADER.size + i * CHAPTER_ENTRY.size)
+            self.index[num] = offset
+
+    def __contains__(self, num):
+        return num in self.index
+
+    def chapter(self, num):
+        return BundleChapter(self.mm, self.index[num])
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+class BundleScenes(Mapping):
+    def __init__(self, mm, index):
+        self.mm = mm
+        self.index = index
+
+    def __getitem__(self, name):
+        scene, text = self.raw(name)
+        if text[1]:
+            scene['text'] = self.text(*text)
+        return scene
+
+    def raw(self, name):
+        # Сцена без текста и (смещение, длина) текста в бандле - для графа сцен
+        offset, length, text_offset, text_length = self.index[name]
+        return json.loads(self.mm[offset:offset + length].decode('utf-8')), (text_offset, text_length)
+
+    def text(self, offset, length):
+        return self.mm[offset:offset + length].decode('utf-8')
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class BundleChapter(Mapping):
+    def __init__(self, mm, offset):
+        meta_len, = U32.unpack_from(mm, offset)
+        offset += U32.size
+        self.meta = json.loads(mm[offset:offset + meta_len].decode('utf-8'))
+        offset += meta_len
+
+        count, = U32.unpack_from(mm, offset)
+        offset += U32.size
+        index = {}
+        for _ in range(count):
+            name_len, *entry = SCENE_ENTRY.unpack_from(mm, offset)
+            offset += SCENE_ENTRY.size
+            name = mm[offset:offset + name_len].decode('utf-8')
+            offset += name_len
+            index[name] = tuple(entry)
+        self.scenes = BundleScenes(mm, index)
+
+    def __getitem__(self, key):
+        if key == 'scenes':
+            return self.scenes
+        return self.meta[key]
+
+    def __iter__(self):
+        yield from self.meta
+        yield 'scenes'
+
+    def __len__(self):
+        return len(self.meta) + 1
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import time
+import select
+import shutil
+import unicodedata
+
+from game_clock import RealClock
+
+try:
+    import termios
+    import tty as ttymode
+except ImportError:
+    termios = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+CSI = "\x1b["
+CLEAR = CSI + "H" + CSI + "2J" + CSI + "3J"
+HOME = CSI + "H"
+CLEAR_LINE = CSI + "K"
+CLEAR_BELOW = CSI + "J"
+RESET = CSI + "0m"
+ANSI_SEQUENCE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+# Символы, ширину которых терминалы считают по-разному: такие строки переписываются целиком
+UNSTABLE_WIDTH = re.compile('[\u200d\ufe0e\ufe0f]')
+# Частота кадров печатной машинки: за кадр одним write выводится всё, что «накопилось»
+# по задержке. Кадр длиннее обычной задержки символа (0.03 с), так что за кадр уходит
+# несколько символов, а не по одному
+FRAME_RATE = 15
+# Начатое слово допечатывается целиком, поэтому write приходится на слово (~6 символов),
+# а не на 2 символа кадра. Это примерно в 6 раз меньше write, чем посимвольная печать,
+# а не в 100: столько дала бы только печать строками, но текст перестал бы «печататься».
+# Без записи вообще обходятся выключенные анимации
+WORD_END = re.compile(r'\s|$')
+
+
+def typewriter_due(text, elapsed, delay):
+    # Сколько символов должно быть на экране через elapsed секунд, с округлением до конца слова
+    due = min(len(text), int(elapsed / delay) + 1)
+    return WORD_END.search(text, due - 1).end() if due < len(text) else len(text)
+
+
+def detect_capabilities(stream, env=None):
+    # Определяется один раз на сессию: дальше экран чистится без внешних процессов
+    env = os.environ if env is None else env
+    try:
+        tty = stream.isatty()
+    except Exception:
+        tty = False
+    term = env.get("TERM", "")
+
+    if os.name == 'nt':
+        # Windows Terminal и ANSICON понимают escape-коды сами, старую консоль переводит colorama
+        ansi = tty and bool(env.get("WT_SESSION") or env.get("ANSICON") or term or 'colorama' in sys.modules)
+    else:
+        ansi = tty and term not in ("", "dumb")
+
+    if not ansi or "NO_COLOR" in env:
+        colors = 0
+    elif env.get("COLORTERM") in ("truecolor", "24bit"):
+        colors = 1 << 24
+    elif "256color" in term:
+        colors = 256
+    else:
+        colors = 16
+
+    size = shutil.get_terminal_size((80, 24))
+    encoding = (getattr(stream, "encoding", None) or "").lower()
+    return {
+        "tty": tty,
+        "ansi": ansi,
+        "colors": colors,
+        "unicode": encoding.startswith("utf"),
+        "width": size.columns,
+        "height": size.lines
+    }
+
+
+class KeyWatcher:
+    # На время печати переводит терминал в cbreak, чтобы заметить любую клавишу
+    # без Enter; нажатия поглощаются и не попадают в следующий input()
+    def __init__(self, stream):
+        self.stream = stream
+        self.fd = None
+        self.saved = None
+
+    def __enter__(self):
+        try:
+            if self.stream.isatty():
+                self.fd = self.stream.fileno()
+        except Exception:
+            self.fd = None
+        if self.fd is not None and termios:
+            try:
+                self.saved = termios.tcgetattr(self.fd)
+                ttymode.setcbreak(self.fd)
+            except termios.error:
+                self.fd = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.saved is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
+            self.saved = None
+
+    def wait(self, timeout):
+        # Ждёт до timeout секунд; True - если за это время нажата клавиша
+        if self.saved is not None:
+            ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+            if ready:
+                termios.tcflush(self.fd, termios.TCIFLUSH)
+                return True
+            return False
+        if self.fd is not None and msvcrt:
+            if msvcrt.kbhit():
+                while msvcrt.kbhit():
+                    msvcrt.getwch()
+                return True
+        time.sleep(max(0.0, timeout))
+        return False
+
+
+def cell_width(text):
+    # Ширина в ячейках терминала: эмодзи и иероглифы - две, комбинируемые знаки - ноль
+    width = 0
+    for ch in text:
+        if unicodedata.combining(ch) or UNSTABLE_WIDTH.match(ch):
+            continue
+        width += 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+    return width
+
+
+def move_to(row, col=1):
+    return f"{CSI}{row + 1};{col}H"
+
+
+class ScreenBuffer:
+    # Двойной буфер: после clear_screen вывод собирается в кадр и сравнивается
+    # построчно с тем, что уже на экране. В терминал уходят только перемещения
+    # курсора и изменившиеся куски строк. Кадр дорисовывается на каждой новой
+    # строке и при flush (input() делает его перед приглашением); вывод после
+    # этого идёт напрямую, а строки от курсора и ниже считаются неизвестными
+    def __init__(self, stream, caps):
+        self.stream = stream
+        self.caps = caps
+        self.screen = None
+        self.frame = None
+        self.drawn = 0
+        self.row = 0
+        self.raw = False
+
+    def begin_frame(self):
+        if self.frame is not None:
+            self.finish_frame()
+        self.frame = [""]
+        self.drawn = 0
+        self.raw = False
+        if self.screen is None:
+            self.stream.write(CLEAR)
+            self.screen = []
+
+    def write(self, text):
+        if self.frame is None:
+            self.row += text.count("\n")
+            self.stream.write(text)
+            return len(text)
+        if "\r" in text or self.raw:
+            # Перезапись строки через \r (анимации) в кадр не ложится - рисуем как есть
+            self.finish_frame()
+            return self.write(text)
+        parts = text.split("\n")
+        self.frame[-1] += parts[0]
+        self.frame.extend(parts[1:])
+        self.draw_complete()
+        return len(text)
+
+    def fits(self, row, line):
+        return row < self.caps["height"] - 1 and cell_width(ANSI_SEQUENCE.sub("", line)) < self.caps["width"]
+
+    def draw_complete(self):
+        out = []
+        while self.drawn < len(self.frame) - 1:
+            row = self.drawn
+            line = self.frame[row]
+            if not self.fits(row, line):
+                # Кадр не помещается или строка переносится: строки съедут,
+                # поэтому рисуем кадр целиком по-старому
+                self.raw = True
+                out.append(CLEAR + "\n".join(self.frame[:-1]) + "\n")
+                self.stream.write("".join(out))
+                self.screen = None
+                self.drawn = len(self.frame) - 1
+                return
+            out.append(self.update_line(row, line))
+            self.drawn += 1
+        if out:
+            self.stream.write("".join(out))
+
+    def update_line(self, row, line):
+        old = self.screen[row] if row < len(self.screen) else None
+        if old == line:
+            return ""
+        if row < len(self.screen):
+            self.screen[row] = line
+        else:
+            self.screen.extend([None] * (row - len(self.screen)))
+            self.screen.append(line)
+        if old is not None and not ANSI_SEQUENCE.search(old + line):
+            same = 0
+            for a, b in zip(old, line):
+                if a != b:
+                    break
+                same += 1
+            if same and not UNSTABLE_WIDTH.search(line[:same]):
+                return move_to(row, cell_width(line[:same]) + 1) + line[same:] + CLEAR_LINE
+        suffix = RESET if ANSI_SEQUENCE.search(line) else ""
+        return move_to(row) + line + suffix + CLEAR_LINE
+
+    def finish_frame(self):
+        if self.raw:
+            self.stream.write(self.frame[-1])
+            self.row = len(self.frame) - 1
+            self.frame = None
+            return
+        self.draw_complete()
+        if self.raw:
+            return self.finish_frame()
+        last = len(self.frame) - 1
+        tail = self.frame[last]
+        # Всё ниже кадра стираем, последнюю строку (обычно под приглашение) пишем целиком:
+        # курсор остаётся там же, где оказался бы после обычного print
+        out = move_to(last) + CLEAR_BELOW + tail
+        if ANSI_SEQUENCE.search(tail):
+            out += RESET
+        self.stream.write(out)
+        del self.screen[last:]
+        self.row = last
+        self.frame = None
+
+    def flush(self):
+        if self.frame is not None:
+            self.finish_frame()
+        if self.screen is not None and self.row + 2 >= self.caps["height"]:
+            # Прямой вывод мог прокрутить экран - содержимое строк больше неизвестно
+            self.screen = None
+        self.stream.flush()
+
+    def isatty(self):
+        return self.stream.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Terminal:
+    def __init__(self, stream=None, caps=None, input_stream=None, clock=None):
+        self.stream = stream or sys.stdout
+        self.input_stream = input_stream or sys.stdin
+        self.caps = caps or detect_capabilities(self.stream)
+        self.clock = clock or RealClock()
+        self.screen = None
+
+    def enable_screen(self):
+        # Вывод через двойной буфер; возвращает поток, которым надо заменить sys.stdout
+        if self.screen is None and self.caps["ansi"]:
+            self.screen = ScreenBuffer(self.stream, self.caps)
+        return self.screen or self.stream
+
+    def write(self, text):
+        (self.screen or self.stream).write(text)
+
+    def write_bytes(self, data):
+        # Уже закодированный вывод (картинки из кэша и пака) пишется в буфер потока напрямую
+        # В Windows пишем через текстовый поток: его оборачивает colorama
+        # Внутри кадра двойного буфера байты тоже идут в кадр
+        buffer = getattr(self.stream, "buffer", None)
+        if buffer is None or os.name == 'nt' or (self.screen and self.screen.frame is not None):
+            self.write(bytes(data).decode('utf-8'))
+            return
+        self.flush()
+        buffer.write(data)
+        buffer.flush()
+        if self.screen:
+            self.screen.row += bytes(data).count(b"\n")
+
+    def flush(self):
+        (self.screen or self.stream).flush()
+
+    def clear(self):
+        if self.screen:
+            self.screen.begin_frame()
+        elif self.caps["ansi"]:
+            self.write(CLEAR)
+            self.flush()
+        elif self.caps["tty"]:
+            # Терминал без ANSI (старая консоль Windows без colorama) - остаётся системная команда
+            os.system('clear' if os.name == 'posix' else 'cls')
+
+    async def typewrite(self, text, delay=0.03):
+        # Вместо write+sleep на каждый символ - кадры с фиксированной частотой:
+        # за кадр выводится кусок текста, положенный по прошедшему времени.
+        # Время - по часам игры, поэтому VirtualClock и ScaledClock ведут печать так же,
+        # как паузы. Любая клавиша допечатывает текст сразу
+        if delay <= 0 or not text:
+            self.write(text + "\n")
+            self.flush()
+            return
+        frame = 1.0 / FRAME_RATE
+        start = self.clock.now()
+        pos = 0
+        frames = 0
+        with KeyWatcher(self.input_stream) as keys:
+            while pos < len(text):
+                due = typewriter_due(text, self.clock.now() - start, delay)
+                if due > pos:
+                    self.write(text[pos:due])
+                    self.flush()
+                    pos = due
+                if pos >= len(text):
+                    break
+                # Просыпаемся строго по сетке кадров, а не к очередному символу
+                frames = max(frames + 1, int((self.clock.now() - start) / frame) + 1)
+                await self.clock.sleep(start + frames * frame - self.clock.now())
+                if keys.wait(0):
+                    self.write(text[pos:])
+                    break
+        self.write("\n")
+        self.flush()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import os
+import sys
+import asyncio
+import tempfile
+
+# Сохранения и сессии теста - во временной папке, а не в ~/.terminal_shadows_ultimate
+os.environ["HOME"] = tempfile.mkdtemp(prefix="ts_hibernate_")
+
+import main
+from io_port import IOPort
+from game_clock import VirtualClock
+
+
+class ScriptPort(IOPort):
+    # Отвечает заготовленными строками; когда они кончились, ждёт - как игрок, ушедший от экрана
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.lines = []
+        self.waiting = asyncio.Event()
+
+    def frame(self):
+        pass
+
+    def text(self, *values, sep=" ", end="\n"):
+        self.lines.append(sep.join(str(value) for value in values))
+
+    async def text_block(self, text, delay=0.03):
+        self.text(text)
+
+    def art(self, name, color=""):
+        pass
+
+    async def prompt(self, message=""):
+        self.text(message)
+        if not self.answers:
+            self.waiting.set()
+            await asyncio.get_running_loop().create_future()
+        return self.answers.pop(0)
+
+
+async def run_until_waiting(game, coroutine, port):
+    # Как GameServer.run_until_idle: ждём, пока движок встанет на выборе, и снимаем состояние
+    task = asyncio.ensure_future(coroutine)
+    waiting = asyncio.ensure_future(port.waiting.wait())
+    await asyncio.wait({task, waiting}, return_when=asyncio.FIRST_COMPLETED)
+    assert not task.done(), "движок завершился, не дойдя до выбора"
+    state = game.session_state()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return state
+
+
+def new_game(port):
+    data = main.GameData(owner="hibernate_test", config=dict(main.GameData().config, animations=False))
+    return main.GameEngine(clock=VirtualClock(), io=port, data=data)
+
+
+async def hibernate_twice():
+    # Главное меню -> настройки, усыпляем. Будим неверным выбором (и Enter после ошибки),
+    # усыпляем снова в тех же настройках и будим ответом «назад»: должны вернуться в главное меню
+    port = ScriptPort(["4"])
+    game = new_game(port)
+    state = await run_until_waiting(game, game.show_main_menu(), port)
+    assert state["menus"] == ["show_main_menu", "settings_menu"], state["menus"]
+
+    port = ScriptPort(["0", ""])
+    game = new_game(port)
+    state = await run_until_waiting(game, game.resume(state), port)
+    assert state["menus"] == ["show_main_menu", "settings_menu"], state["menus"]
+    assert state["pending_choice"]["menu"] == "settings_menu", state["pending_choice"]
+
+    port = ScriptPort(["8"])
+    game = new_game(port)
+    state = await run_until_waiting(game, game.resume(state), port)
+    assert state["menus"] == ["show_main_menu"], state["menus"]
+    assert any("Выберите опцию [1-7]" in line for line in port.lines), "нет главного меню после настроек"
+
+
+def run():
+    print("🔍 Проверка гибернации сессий...")
+    try:
+        asyncio.run(hibernate_twice())
+    except AssertionError as e:
+        print(f"❌ Две гибернации подряд: {e}")
+        return 1
+    print("✅ Две гибернации подряд: стек меню сохраняется")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -98,8 +98,12 @@ class SimpleUpdater:
         try:
             update_items = [
                 "main.py", "updater.py", "requirements.txt", "version.txt",
+                "story_bundle.py", "scene_graph.py", "startup_profiler.py",
+                "startup_cache.py", "save_codecs.py", "autosave.py", "save_journal.py", "save_store.py",
+                "terminal.py", "assets.py", "game_clock.py", "io_port.py", "server.py", "economy.py", "combat.py",
+                "boss_odds.py",
                 "run_game.sh", "install.sh", "update_game.sh", "README.md",
-                "data", "story"
+                "data", "story", "scripts"
             ]
             
             updated_count = 0